@@ -14,6 +14,11 @@ try:
 except ImportError:
     requests = None
 
+try:
+    from .provider_transport import get_transport
+except ImportError:  # requests missing or module run outside the package
+    get_transport = None
+
 DEFAULT_MODEL = os.getenv("TRIAD_MODEL_NAME", "llama3.2:3b")
 DEFAULT_ENDPOINT = os.getenv("TRIAD_ENDPOINT", "http://localhost:11434")
 
@@ -77,11 +82,11 @@ _COMPILED_PATTERNS = [(re.compile(p, re.IGNORECASE), sig) for p, sig in PATTERN_
 def call_model(prompt: str, model: Optional[str] = None, endpoint: Optional[str] = None, timeout: int = 60) -> str:
     model = model or DEFAULT_MODEL
     endpoint = endpoint or DEFAULT_ENDPOINT
-    if requests is None:
+    if requests is None or get_transport is None:
         # Fallback deterministic stub
         return "[]"
     try:
-        resp = requests.post(f"{endpoint}/api/generate", json={"model": model, "prompt": prompt, "stream": False}, timeout=timeout)
+        resp = get_transport().post_json("ollama", f"{endpoint}/api/generate", {"model": model, "prompt": prompt, "stream": False}, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
         return data.get("response", "")
@@ -0,0 +1,205 @@
+# agi/core/answer_cache.py
+"""Answer-level reuse cache for run_triad (v0.1c).
+Maps (prompt_hash, policy_version, stack_hash, policy-file fingerprint, mode, sensitivity)
+to an answer already stored in sovereign_answers. Entries expire after `ttl_seconds`,
+the least recently used are evicted past `max_entries`, and every entry is dropped as
+soon as the policy-file fingerprint changes.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from . import receipt
+from .storage_codec import decode, unpack_audit
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+# model_stack.yaml is covered separately by the stack hash
+POLICY_FILES = ["SOVEREIGN_MODEL_POLICY.md", "constitution/policy_manifest.yml"]
+
+@dataclass
+class AnswerCacheConfig:
+    enabled: bool = False
+    ttl_seconds: int = 24 * 3600
+    max_entries: int = 10000
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "AnswerCacheConfig":
+        data = data or {}
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+_DIGESTS: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+_DIGESTS_LOCK = threading.Lock()
+
+def policy_fingerprint(root: Optional[Path] = None) -> str:
+    """sha256 over the policy files' digests; files are only re-hashed when their stat changes."""
+    root = root or REPO_ROOT
+    parts = []
+    for rel in POLICY_FILES:
+        p = root / rel
+        try:
+            st = os.stat(p)
+        except FileNotFoundError:
+            parts.append(f"{rel}:MISSING")
+            continue
+        key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with _DIGESTS_LOCK:
+            cached = _DIGESTS.get(str(p))
+        if cached is None or cached[0] != key:
+            cached = (key, hashlib.sha256(p.read_bytes()).hexdigest())
+            with _DIGESTS_LOCK:
+                _DIGESTS[str(p)] = cached
+        parts.append(f"{rel}:{cached[1]}")
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+def make_answer_key(prompt_hash: str, policy_version: str, stack_hash: str, fingerprint: str, mode: str, sensitivity: str) -> str:
+    material = {
+        "prompt_hash": prompt_hash,
+        "policy_version": policy_version,
+        "stack_hash": stack_hash,
+        "policy_fingerprint": fingerprint,
+        "mode": mode,
+        "sensitivity": sensitivity,
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+class AnswerCache:
+    """Index over sovereign_answers rows in receipt.DB_PATH; stores pointers, not copies."""
+
+    def __init__(self, config: Optional[AnswerCacheConfig] = None):
+        self.config = config or AnswerCacheConfig(enabled=True)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self._ready: Optional[Path] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        store = receipt.get_receipt_store()
+        conn = store.connection()
+        if self._ready != store.path:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS answer_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    answer_id TEXT NOT NULL,
+                    receipt_id TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_answer_cache_last_access ON answer_cache(last_access)")
+            conn.commit()
+            self._ready = store.path
+        return conn
+
+    def check_fingerprint(self, fingerprint: str) -> None:
+        """Drop every entry recorded under a different policy fingerprint."""
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            conn = self._connect()
+            dropped = conn.execute("DELETE FROM answer_cache WHERE fingerprint != ?", (fingerprint,)).rowcount
+            conn.commit()
+            if self._fingerprint is not None or dropped:
+                self.invalidations += 1
+            self._fingerprint = fingerprint
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached sovereign_answers row (with parsed audit_receipt), or None."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                """
+                SELECT c.created_at, a.answer_id, a.receipt_id, a.raw_answer, a.explained_answer, a.audit_receipt
+                FROM answer_cache c JOIN sovereign_answers a ON a.answer_id = c.answer_id
+                WHERE c.cache_key = ?
+                """,
+                (key,),
+            ).fetchone()
+            if row is None or not row[5] or (self.config.ttl_seconds and now - row[0] > self.config.ttl_seconds):
+                if row is not None:
+                    conn.execute("DELETE FROM answer_cache WHERE cache_key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                return None
+            conn.execute("UPDATE answer_cache SET last_access = ?, hits = hits + 1 WHERE cache_key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+        return {
+            "answer_id": row[1],
+            "receipt_id": row[2],
+            "raw_answer": decode(row[3]),
+            "explained_answer": decode(row[4]),
+            "audit_receipt": unpack_audit(conn, row[5]),
+        }
+
+    def put(self, key: str, answer_id: str, receipt_id: str, fingerprint: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._connect()
+            with receipt.get_receipt_store().transaction() as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO answer_cache (cache_key, answer_id, receipt_id, fingerprint, created_at, last_access, hits)
+                    VALUES (?, ?, ?, ?, ?, ?, 0)
+                    """,
+                    (key, answer_id, receipt_id, fingerprint, now, now),
+                )
+                if self.config.ttl_seconds:
+                    conn.execute("DELETE FROM answer_cache WHERE created_at < ?", (now - self.config.ttl_seconds,))
+                (count,) = conn.execute("SELECT COUNT(*) FROM answer_cache").fetchone()
+                if count > self.config.max_entries:
+                    conn.execute(
+                        "DELETE FROM answer_cache WHERE cache_key IN (SELECT cache_key FROM answer_cache ORDER BY last_access ASC LIMIT ?)",
+                        (count - self.config.max_entries,),
+                    )
+
+    def invalidate(self) -> int:
+        """Explicitly drop all entries (e.g. after editing a policy file in place); returns how many."""
+        with self._lock:
+            conn = self._connect()
+            dropped = conn.execute("DELETE FROM answer_cache").rowcount
+            conn.commit()
+            self.invalidations += 1
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            (count,) = conn.execute("SELECT COUNT(*) FROM answer_cache").fetchone()
+        return {"entries": count, "hits": self.hits, "misses": self.misses, "invalidations": self.invalidations, "max_entries": self.config.max_entries}
+
+_CACHE: AnswerCache | None = None
+_CACHE_LOCK = threading.Lock()
+
+def get_answer_cache(config: Optional[Dict[str, Any]] = None) -> Optional[AnswerCache]:
+    """Process-wide cache built from the model_stack.yaml `answer_cache:` block, or None if disabled."""
+    global _CACHE
+    cfg = AnswerCacheConfig.from_dict(config)
+    if not cfg.enabled:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = AnswerCache(cfg)
+    return _CACHE
+
+def reset_answer_cache() -> None:
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = None
+
+__all__ = ["AnswerCacheConfig", "AnswerCache", "get_answer_cache", "reset_answer_cache", "make_answer_key", "policy_fingerprint"]
@@ -1,9 +1,17 @@
 # agi/core/assistant_channel.py
 from __future__ import annotations
-from typing import Dict, Any, List
 import sqlite3
-from .receipt import store_assistant_message, DB_PATH
-from .model_runner import run_model_for_task
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from .receipt import (
+    store_assistant_message, store_assistant_context, load_assistant_context, clear_assistant_context,
+    store_thread_summary, load_thread_summary, get_receipt_store,
+)
+from .model_runner import estimate_tokens, generate, load_model_stack, resolve_route
 
 ASSISTANT_SYSTEM_PROMPT = (
     "You are the Sovereign assistant channel.\n"
@@ -13,41 +21,252 @@ ASSISTANT_SYSTEM_PROMPT = (
     "- If you detect a serious error or contradiction, say so and request a re-run.\n"
 )
 
+THREAD_SUMMARY_PROMPT = (
+    "You maintain the running summary of a discussion about a Sovereign answer.\n"
+    "Merge the new turns into the previous summary. Keep the user's questions, the points\n"
+    "already explained, open issues and any reported error or contradiction. Do not add\n"
+    "anything that was not said. Reply with the updated summary only.\n"
+)
+
+@dataclass
+class SummaryConfig:
+    enabled: bool = True
+    token_budget: int = 3000        # summary + unsummarised turns + new message, in estimated tokens
+    recent_turns: int = 6           # newest messages always sent verbatim
+    summary_max_tokens: int = 400
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "SummaryConfig":
+        data = data or {}
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
 def get_assistant_system_prompt() -> str:
     return ASSISTANT_SYSTEM_PROMPT
 
-def list_thread_messages(answer_id: str) -> List[Dict[str, Any]]:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT role, message, created_at
-        FROM assistant_messages
-        WHERE answer_id = ?
-        ORDER BY id ASC
-        """,
-        (answer_id,),
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return [{"role": role, "message": msg, "created_at": created_at} for (role, msg, created_at) in rows]
-
-def append_user_message(answer_id: str, receipt_id: str, message: str) -> None:
-    store_assistant_message(answer_id, receipt_id, "user", message)
-
-def append_assistant_message(answer_id: str, receipt_id: str, message: str) -> None:
-    store_assistant_message(answer_id, receipt_id, "assistant", message)
-
-def build_assistant_prompt(system_prompt: str, sovereign_answer: str, thread: List[Dict[str, Any]], new_user_message: str) -> str:
-    lines: List[str] = [system_prompt, "\nSOVEREIGN ANSWER:\n", sovereign_answer, "\nTHREAD:\n"]
+def _summary_config() -> SummaryConfig:
+    return SummaryConfig.from_dict(load_model_stack().get("thread_summary"))
+
+_THREAD_COLUMNS = "SELECT id, role, message, created_at FROM assistant_messages WHERE answer_id = ?"
+
+def _fetch_thread(answer_id: str, since_id: Optional[int] = None, last_n: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Rows in id order via idx_assistant_messages_answer (only the newest `last_n` if given)."""
+    sql, params = _THREAD_COLUMNS, [answer_id]
+    if since_id is not None:
+        sql += " AND id > ?"
+        params.append(since_id)
+    if last_n is not None:
+        rows = get_receipt_store().execute(sql + " ORDER BY id DESC LIMIT ?", (*params, last_n)).fetchall()[::-1]
+    else:
+        rows = get_receipt_store().execute(sql + " ORDER BY id ASC", params).fetchall()
+    return [{"id": mid, "role": role, "message": msg, "created_at": created_at} for (mid, role, msg, created_at) in rows]
+
+class ThreadCache:
+    """LRU of whole threads kept current by append_*; writers outside this process are
+    picked up by an indexed MAX(id) probe before a cached thread is served."""
+
+    def __init__(self, max_threads: int = 256):
+        self.max_threads = max_threads
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._threads: "OrderedDict[Tuple[Path, str], List[Dict[str, Any]]]" = OrderedDict()
+
+    def __contains__(self, answer_id: str) -> bool:
+        return (get_receipt_store().path, answer_id) in self._threads
+
+    def get(self, answer_id: str) -> List[Dict[str, Any]]:
+        key = (get_receipt_store().path, answer_id)
+        count, latest = get_receipt_store().execute(
+            "SELECT COUNT(*), MAX(id) FROM assistant_messages WHERE answer_id = ?", (answer_id,)
+        ).fetchone()
+        with self._lock:
+            thread = self._threads.get(key)
+            if thread is not None:
+                self._threads.move_to_end(key)
+                if len(thread) == count and (not thread or thread[-1]["id"] == latest):
+                    self.hits += 1
+                    return list(thread)
+        self.misses += 1
+        if thread:
+            thread = thread + _fetch_thread(answer_id, since_id=thread[-1]["id"])
+        if thread is None or len(thread) != count:  # not cached, or rows appeared out of id order
+            thread = _fetch_thread(answer_id)
+        with self._lock:
+            self._threads[key] = thread
+            self._threads.move_to_end(key)
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+        return list(thread)
+
+    def append(self, answer_id: str, message: Dict[str, Any]) -> None:
+        """Extend a cached thread; uncached threads are loaded on their next read."""
+        key = (get_receipt_store().path, answer_id)
+        with self._lock:
+            thread = self._threads.get(key)
+            if thread is None:
+                return
+            if not thread or thread[-1]["id"] < message["id"]:
+                self._threads[key] = thread + [message]
+            else:  # a concurrent append landed first; reload on the next read
+                del self._threads[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cached = len(self._threads)
+        return {"threads": cached, "max_threads": self.max_threads, "hits": self.hits, "misses": self.misses}
+
+_THREAD_CACHE = ThreadCache()
+
+def get_thread_cache() -> ThreadCache:
+    return _THREAD_CACHE
+
+def reset_thread_cache(max_threads: int = 256) -> None:
+    global _THREAD_CACHE
+    _THREAD_CACHE = ThreadCache(max_threads)
+
+def list_thread_messages(answer_id: str, last_n: Optional[int] = None, since_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Messages of one thread in id order: all of them, those after `since_id`, and/or the newest `last_n`.
+
+    Whole-thread reads go through the per-thread cache; windowed reads of a thread that is
+    not cached are answered straight from the (answer_id, id) index.
+    """
+    if last_n is not None and last_n <= 0:
+        return []
+    if last_n is None and since_id is None or answer_id in _THREAD_CACHE:
+        thread = _THREAD_CACHE.get(answer_id)
+        if since_id is not None:
+            thread = [m for m in thread if m["id"] > since_id]
+        return thread[-last_n:] if last_n is not None else thread
+    return _fetch_thread(answer_id, since_id=since_id, last_n=last_n)
+
+def _append(answer_id: str, receipt_id: str, role: str, message: str) -> int:
+    now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    message_id = store_assistant_message(answer_id, receipt_id, role, message, created_at=now)
+    _THREAD_CACHE.append(answer_id, {"id": message_id, "role": role, "message": message, "created_at": now})
+    return message_id
+
+def append_user_message(answer_id: str, receipt_id: str, message: str) -> int:
+    return _append(answer_id, receipt_id, "user", message)
+
+def append_assistant_message(answer_id: str, receipt_id: str, message: str) -> int:
+    return _append(answer_id, receipt_id, "assistant", message)
+
+def build_assistant_prompt(
+    system_prompt: str,
+    sovereign_answer: str,
+    thread: List[Dict[str, Any]],
+    new_user_message: str,
+    summary: Optional[str] = None,
+) -> str:
+    lines: List[str] = [system_prompt, "\nSOVEREIGN ANSWER:\n", sovereign_answer]
+    if summary:
+        lines += ["\nSUMMARY OF EARLIER TURNS:\n", summary, "\n"]
+    lines.append("\nTHREAD:\n")
     for msg in thread:
         lines.append(f"{msg['role'].upper()}: {msg['message']}\n")
     lines.append(f"USER: {new_user_message}\nASSISTANT:")
     return "".join(lines)
 
-def generate_assistant_reply(answer_id: str, receipt_id: str, sovereign_answer: str, new_user_message: str) -> str:
-    thread = list_thread_messages(answer_id)
-    prompt = build_assistant_prompt(get_assistant_system_prompt(), sovereign_answer, thread, new_user_message)
-    reply = run_model_for_task(task_type="discussion", prompt=prompt)
-    append_assistant_message(answer_id, receipt_id, reply)
+def build_continuation_prompt(pending: List[Dict[str, Any]], new_user_message: str) -> str:
+    """Turns not yet covered by a stored Ollama context, plus the new user message."""
+    lines: List[str] = [f"{msg['role'].upper()}: {msg['message']}\n" for msg in pending]
+    lines.append(f"USER: {new_user_message}\nASSISTANT:")
+    return "\n" + "".join(lines)
+
+def build_summary_prompt(previous: Optional[str], turns: List[Dict[str, Any]]) -> str:
+    lines: List[str] = [THREAD_SUMMARY_PROMPT, "\nPREVIOUS SUMMARY:\n", previous or "(none)", "\n\nNEW TURNS:\n"]
+    lines += [f"{msg['role'].upper()}: {msg['message']}\n" for msg in turns]
+    lines.append("\nUPDATED SUMMARY:")
+    return "".join(lines)
+
+def _fold_thread(
+    answer_id: str, summary: Optional[Dict[str, Any]], window: List[Dict[str, Any]], new_user_message: str, config: SummaryConfig
+) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """(summary text, messages to send verbatim) for a thread, folding older turns when over budget.
+
+    Only the turns past `covered_through_id` are summarised, together with the previous
+    summary, so each fold costs the same however long the thread is. A failed summary call
+    keeps the previous summary and sends the whole unsummarised window.
+    """
+    text = summary["summary"] if summary else None
+    if not config.enabled or len(window) <= config.recent_turns:
+        return text, window
+    size = estimate_tokens("\n".join([text or "", new_user_message, *(m["message"] for m in window)]))
+    if size <= config.token_budget:
+        return text, window
+    cut = len(window) - config.recent_turns
+    folded, recent = window[:cut], window[cut:]
+    rec = generate(task_type="discussion", prompt=build_summary_prompt(text, folded), max_tokens=config.summary_max_tokens)
+    if rec.status != "success" or not rec.raw_output.strip():
+        return text, window
+    text = rec.raw_output.strip()
+    store_thread_summary(answer_id, text, folded[-1]["id"], rec.model_id)
+    # The stored Ollama context still holds the folded turns verbatim; start over from the compact prompt
+    clear_assistant_context(answer_id)
+    return text, recent
+
+def _pending_since(thread: List[Dict[str, Any]], last_message_id: int) -> Optional[List[Dict[str, Any]]]:
+    """Messages after the context's last message, or None if the handle is stale."""
+    ids = [m["id"] for m in thread]
+    if last_message_id not in ids:
+        return None
+    pending = thread[ids.index(last_message_id) + 1:]
+    # An assistant turn the context never saw means the thread moved on without us
+    if any(m["role"] == "assistant" for m in pending):
+        return None
+    return pending
+
+def _load_context(answer_id: str, model_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        handle = load_assistant_context(answer_id)
+    except sqlite3.OperationalError:  # database predates assistant_contexts
+        return None
+    if handle is None or handle["model_id"] != model_id or not handle["context"]:
+        return None
+    return handle
+
+def generate_assistant_reply(
+    answer_id: str, receipt_id: str, sovereign_answer: str, new_user_message: str, store_user_message: bool = False
+) -> str:
+    """Reply on a thread, continuing the previous turn's Ollama context when it is still valid.
+
+    Falls back to rebuilding the thread prompt when there is no handle, it was
+    produced by another model, routing has moved off the primary model, the thread has
+    assistant turns it never saw, or the continuation call fails. The rebuilt prompt
+    carries the thread's rolling summary plus the turns after it (see `_fold_thread`),
+    never the whole history.
+
+    With `store_user_message`, `new_user_message` is stored on the thread right before the
+    reply, so the stored context's last message still follows every turn it has seen.
+    """
+    try:
+        summary = load_thread_summary(answer_id)
+    except sqlite3.OperationalError:  # database predates assistant_summaries
+        summary = None
+    covered = summary["covered_through_id"] if summary else None
+    thread = list_thread_messages(answer_id, since_id=covered)
+    summary_text, thread = _fold_thread(answer_id, summary, thread, new_user_message, _summary_config())
+    # generate drops `context` off the primary route, so only continue on the primary model
+    route = resolve_route("discussion", "normal")
+    handle = _load_context(answer_id, route.cfg.get("id")) if route.reason == "primary" else None
+    rec = None
+    if handle is not None:
+        pending = _pending_since(thread, handle["last_message_id"])
+        if pending is not None:
+            prompt = build_continuation_prompt(pending, new_user_message)
+            rec = generate(task_type="discussion", prompt=prompt, context=handle["context"], return_context=True)
+            if rec.status != "success" or rec.model_id != handle["model_id"]:
+                rec = None
+    if rec is None:
+        prompt = build_assistant_prompt(get_assistant_system_prompt(), sovereign_answer, thread, new_user_message, summary_text)
+        rec = generate(task_type="discussion", prompt=prompt, return_context=True)
+    reply = rec.raw_output
+    if store_user_message:
+        append_user_message(answer_id, receipt_id, new_user_message)
+    message_id = append_assistant_message(answer_id, receipt_id, reply)
+    if rec.context:
+        try:
+            store_assistant_context(answer_id, rec.model_id, rec.context, message_id)
+        except sqlite3.OperationalError:
+            pass
     return reply
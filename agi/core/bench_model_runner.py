@@ -0,0 +1,186 @@
+# agi/core/bench_model_runner.py
+"""Offline load benchmark for model_runner (v0.1c).
+Drives generate / run_model_for_task / run_triad against the Ollama stand-in at increasing
+concurrency and reports throughput, latency percentiles and error rates as JSON.
+Receipts and answers go to a temporary directory, never to the repo's sovereign_model.sqlite.
+
+    python -m agi.core.bench_model_runner --levels 1,4,16 --requests 64 --latency lognormal:80:0.4
+"""
+from __future__ import annotations
+
+import copy
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import yaml
+
+from . import model_runner, receipt
+from .model_health import reset_health_registry
+from .ollama_standin import OllamaStandin, StandinConfig
+from .stack_registry import StackRegistry
+from .triad_harness import run_triad
+
+TARGETS = ("generate", "run_model_for_task", "run_triad")
+
+@dataclass
+class LevelResult:
+    target: str
+    concurrency: int
+    requests: int
+    errors: int
+    error_rate: float
+    elapsed_s: float
+    throughput_rps: float
+    p50_ms: Optional[float]
+    p95_ms: Optional[float]
+    p99_ms: Optional[float]
+    max_ms: Optional[float]
+
+def _pct(lat: List[float], p: float) -> Optional[float]:
+    return round(lat[min(len(lat) - 1, int(p * len(lat)))], 2) if lat else None
+
+def _call(target: str, task_type: str, i: int, triad_mode: str = "raw", speculative: bool = False) -> bool:
+    """One benchmark request; True when it succeeded end to end."""
+    # Unique prompts so the coalescer and response cache cannot hide upstream cost
+    prompt = f"Benchmark request {i}: summarise lawful property acquisition."
+    if target == "generate":
+        return model_runner.generate(task_type, prompt).status == "success"
+    if target == "run_model_for_task":
+        return model_runner.run_model_for_task(task_type, prompt)["receipt"]["status"] == "success"
+    out = run_triad(prompt, mode=triad_mode, speculative=speculative)  # type: ignore[arg-type]
+    spec_receipt = out["receipt"]["calls"].get("specialist_receipt") or {}
+    return spec_receipt.get("status") == "success"
+
+def run_level(
+    target: str,
+    concurrency: int,
+    requests: int,
+    task_type: str = "governance",
+    triad_mode: str = "raw",
+    speculative: bool = False,
+) -> LevelResult:
+    reset_health_registry()  # breakers from the previous level must not skew this one
+    latencies: List[float] = []
+    errors = 0
+
+    def one(i: int) -> Tuple[float, bool]:
+        t0 = time.perf_counter()
+        try:
+            ok = _call(target, task_type, i, triad_mode, speculative)
+        except Exception:
+            ok = False
+        return (time.perf_counter() - t0) * 1000, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ms, ok in pool.map(one, range(requests)):
+            latencies.append(ms)
+            errors += 0 if ok else 1
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return LevelResult(
+        target=target,
+        concurrency=concurrency,
+        requests=requests,
+        errors=errors,
+        error_rate=round(errors / requests, 4) if requests else 0.0,
+        elapsed_s=round(elapsed, 3),
+        throughput_rps=round(requests / elapsed, 2) if elapsed > 0 else 0.0,
+        p50_ms=_pct(latencies, 0.50),
+        p95_ms=_pct(latencies, 0.95),
+        p99_ms=_pct(latencies, 0.99),
+        max_ms=round(latencies[-1], 2) if latencies else None,
+    )
+
+@contextmanager
+def bench_environment(endpoint: str) -> Iterator[Path]:
+    """Point model_runner at `endpoint` and receipt storage at a temp dir for the duration."""
+    stack = copy.deepcopy(yaml.safe_load(model_runner.STACK_PATH.read_text(encoding="utf-8")) or {})
+    stack.setdefault("providers", {}).setdefault("ollama", {})["endpoint"] = endpoint
+    stack.setdefault("response_cache", {})["enabled"] = False
+    saved = (model_runner._STACK_REGISTRY, receipt.DB_PATH, receipt.RECEIPTS_DIR)
+    with tempfile.TemporaryDirectory(prefix="bench_model_runner_") as tmp:
+        receipt.DB_PATH = Path(tmp) / "bench.sqlite"
+        receipt.RECEIPTS_DIR = Path(tmp) / "receipts"
+        receipt.RECEIPTS_DIR.mkdir()
+        receipt.init_db()
+        model_runner._STACK_REGISTRY = StackRegistry.from_mapping(stack)
+        try:
+            yield Path(tmp)
+        finally:
+            model_runner._STACK_REGISTRY, receipt.DB_PATH, receipt.RECEIPTS_DIR = saved
+            receipt.reset_receipt_stores()
+            reset_health_registry()
+
+def run_benchmark(
+    levels: Sequence[int] = (1, 2, 4, 8),
+    requests: int = 32,
+    targets: Sequence[str] = TARGETS,
+    task_type: str = "governance",
+    standin: Optional[StandinConfig] = None,
+    endpoint: Optional[str] = None,
+    triad_mode: str = "raw",
+    speculative: bool = False,
+) -> Dict[str, Any]:
+    """Benchmark each target at each concurrency level; starts a stand-in unless `endpoint` is given."""
+    for t in targets:
+        if t not in TARGETS:
+            raise ValueError(f"Unknown benchmark target '{t}' (expected one of {', '.join(TARGETS)})")
+    server = None if endpoint else OllamaStandin(standin).start()
+    url = endpoint or server.url  # type: ignore[union-attr]
+    try:
+        with bench_environment(url):
+            results = [asdict(run_level(t, c, requests, task_type, triad_mode, speculative)) for t in targets for c in levels]
+    finally:
+        if server is not None:
+            server.stop()
+    return {
+        "endpoint": url,
+        "task_type": task_type,
+        "triad_mode": triad_mode,
+        "speculative": speculative,
+        "standin": asdict(server.config) if server is not None else None,
+        "server": server.stats() if server is not None else None,
+        "results": results,
+    }
+
+def _main(argv: Optional[Sequence[str]] = None) -> None:
+    import argparse
+    ap = argparse.ArgumentParser(description="Load benchmark for model_runner against a local Ollama stand-in")
+    ap.add_argument("--levels", default="1,2,4,8", help="comma-separated concurrency levels")
+    ap.add_argument("--requests", type=int, default=32, help="requests per target and level")
+    ap.add_argument("--targets", default=",".join(TARGETS))
+    ap.add_argument("--task-type", default="governance")
+    ap.add_argument("--triad-mode", default="raw", choices=["raw", "explained", "discussion"])
+    ap.add_argument("--speculative", action="store_true", help="run_triad with speculative interpreter")
+    ap.add_argument("--endpoint", default=None, help="benchmark an existing server instead of the stand-in")
+    ap.add_argument("--out", default=None, help="write the JSON report here instead of stdout")
+    for name, field_ in StandinConfig.__dataclass_fields__.items():
+        ap.add_argument(f"--{name.replace('_', '-')}", type=type(field_.default), default=field_.default)
+    args = ap.parse_args(argv)
+    report = run_benchmark(
+        levels=[int(x) for x in args.levels.split(",") if x],
+        requests=args.requests,
+        targets=[t for t in args.targets.split(",") if t],
+        task_type=args.task_type,
+        standin=StandinConfig(**{k: getattr(args, k) for k in StandinConfig.__dataclass_fields__}),
+        endpoint=args.endpoint,
+        triad_mode=args.triad_mode,
+        speculative=args.speculative,
+    )
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+__all__ = ["LevelResult", "run_level", "run_benchmark", "bench_environment"]
+
+if __name__ == "__main__":
+    _main()
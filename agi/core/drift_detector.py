@@ -1,8 +1,8 @@
 # agi/core/drift_detector.py
 from __future__ import annotations
-import hashlib, sqlite3
+import hashlib, os, sqlite3, threading, time
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 DB_PATH = Path(__file__).resolve().parent / "drift_store.sqlite"
 FILES_TO_TRACK = [
@@ -65,6 +65,124 @@ def detect_drift(root: Path) -> List[Dict]:
     conn.close()
     return drifts
 
+StatKey = Tuple[int, int, int]
+
+def _stat_key(path: Path) -> Optional[StatKey]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+class DriftMonitor:
+    """Same result as detect_drift(root), but file digests and the baseline rows are cached
+    by (st_mtime_ns, st_size, st_ino) and only re-read when that changes. snapshot()
+    re-stats at most every `check_interval_s`; with start() a watcher thread does the
+    polling and snapshot() never touches the disk."""
+
+    def __init__(self, root: Path, check_interval_s: float = 1.0):
+        self.root = Path(root)
+        self.check_interval_s = check_interval_s
+        self.rehashes = 0
+        self._lock = threading.Lock()
+        self._digests: Dict[str, Tuple[StatKey, str]] = {}
+        self._baseline: Dict[str, str] = {}
+        self._baseline_key: Optional[Tuple[str, Optional[StatKey]]] = None
+        self._drifts: Optional[List[Dict]] = None
+        self._next_check = 0.0
+        self._stop: Optional[threading.Event] = None
+
+    def _digest(self, p: Path) -> Optional[str]:
+        key = _stat_key(p)
+        if key is None:
+            return None
+        cached = self._digests.get(str(p))
+        if cached and cached[0] == key:
+            return cached[1]
+        h = sha256_file(p)
+        self.rehashes += 1
+        self._digests[str(p)] = (key, h)
+        return h
+
+    def _load_baseline(self) -> Dict[str, str]:
+        key = (str(DB_PATH), _stat_key(DB_PATH))
+        if key != self._baseline_key:
+            rows: Dict[str, str] = {}
+            if key[1] is not None:
+                conn = sqlite3.connect(DB_PATH)
+                try:
+                    rows = dict(conn.execute("SELECT path, hash FROM file_hashes").fetchall())
+                except sqlite3.OperationalError:
+                    rows = {}  # no baseline recorded yet
+                finally:
+                    conn.close()
+            self._baseline, self._baseline_key = rows, key
+        return self._baseline
+
+    def refresh(self) -> List[Dict]:
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval_s
+            baseline_hashes = self._load_baseline()
+            drifts: List[Dict] = []
+            for rel in FILES_TO_TRACK:
+                p = (self.root / rel).resolve()
+                current = self._digest(p)
+                if current is None:
+                    continue
+                old = baseline_hashes.get(str(p))
+                if old and old != current:
+                    drifts.append({"path": str(p), "old_hash": old, "new_hash": current})
+            self._drifts = drifts
+            return drifts
+
+    def snapshot(self) -> List[Dict]:
+        """Current drift list in detect_drift() format."""
+        drifts = self._drifts
+        if drifts is None or (self._stop is None and time.monotonic() >= self._next_check):
+            drifts = self.refresh()
+        return [dict(d) for d in drifts]
+
+    def start(self, poll_interval_s: float = 2.0) -> None:
+        if self._stop is not None:
+            return
+        self.refresh()
+        self._stop = stop = threading.Event()
+
+        def _loop() -> None:
+            while not stop.wait(poll_interval_s):
+                try:
+                    self.refresh()
+                except Exception:
+                    pass  # keep the last good snapshot; retry next tick
+
+        threading.Thread(target=_loop, name="drift-watcher", daemon=True).start()
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+_MONITORS: Dict[str, DriftMonitor] = {}
+_MONITORS_LOCK = threading.Lock()
+
+def get_drift_monitor(root: Path) -> DriftMonitor:
+    key = str(Path(root).resolve())
+    mon = _MONITORS.get(key)
+    if mon is None:
+        with _MONITORS_LOCK:
+            mon = _MONITORS.setdefault(key, DriftMonitor(Path(key)))
+    return mon
+
+def drift_snapshot(root: Path) -> List[Dict]:
+    """Cached equivalent of detect_drift(root) for the request path."""
+    return get_drift_monitor(root).snapshot()
+
+def reset_drift_monitors() -> None:
+    with _MONITORS_LOCK:
+        for mon in _MONITORS.values():
+            mon.stop()
+        _MONITORS.clear()
+
 def baseline(root: Path) -> None:
     init_db(); record_hashes(root)
     print(f"[DRIFT] Baseline recorded for {len(FILES_TO_TRACK)} files under {root}")
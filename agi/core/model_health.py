@@ -0,0 +1,163 @@
+# agi/core/model_health.py
+"""Per-model-key health tracking for latency-aware routing (v0.1c).
+Rolling latency/error stats, circuit breakers with half-open probing, and SLO checks
+used by model_runner.resolve_route to walk the fallback chains in model_stack.yaml.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Tuple
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+@dataclass
+class HealthConfig:
+    window: int = 50               # samples kept per key
+    window_s: float = 300.0        # samples older than this are ignored
+    min_samples: int = 5           # SLO checks need at least this many samples
+    failure_threshold: int = 3     # consecutive failures that open the breaker
+    cooldown_s: float = 30.0       # open -> half_open after this long
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "HealthConfig":
+        data = data or {}
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+class RollingStats:
+    def __init__(self, window: int, window_s: float):
+        self.window_s = window_s
+        self._samples: Deque[Tuple[float, int, bool]] = deque(maxlen=window)
+
+    def add(self, latency_ms: int, ok: bool) -> None:
+        self._samples.append((time.monotonic(), latency_ms, ok))
+
+    def _recent(self):
+        cutoff = time.monotonic() - self.window_s
+        return [s for s in self._samples if s[0] >= cutoff]
+
+    def summary(self) -> Dict[str, Any]:
+        recent = self._recent()
+        lat = sorted(s[1] for s in recent)
+        errors = sum(1 for s in recent if not s[2])
+
+        def pct(p: float) -> Optional[int]:
+            return lat[min(len(lat) - 1, int(p * len(lat)))] if lat else None
+
+        return {
+            "samples": len(recent),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "error_rate": round(errors / len(recent), 4) if recent else 0.0,
+        }
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, cooldown_s: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+        self.trips = 0
+
+    def allow(self, claim: bool = True) -> bool:
+        """True if a call may go through; in half-open only one probe is let through at a time.
+
+        With `claim=False` this only checks whether the key is routable (not open); the
+        caller that actually contacts the model claims the probe and must `record` its
+        outcome, so callers sharing that call (coalesced, cached) never hold the probe.
+        """
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown_s:
+            self.state = HALF_OPEN
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN:
+            if not claim:
+                return True
+            # A probe that never reported back (e.g. a crashed caller) expires after one cooldown
+            if not self.probe_in_flight or time.monotonic() - self.probe_started >= self.cooldown_s:
+                self.probe_in_flight = True
+                self.probe_started = time.monotonic()
+                return True
+        return False
+
+    def record(self, ok: bool) -> None:
+        self.probe_in_flight = False
+        if ok:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.trips += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+class HealthRegistry:
+    def __init__(self, config: Optional[HealthConfig] = None):
+        self.config = config or HealthConfig()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, RollingStats] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def _get(self, key: str) -> Tuple[RollingStats, CircuitBreaker]:
+        if key not in self._stats:
+            self._stats[key] = RollingStats(self.config.window, self.config.window_s)
+            self._breakers[key] = CircuitBreaker(self.config.failure_threshold, self.config.cooldown_s)
+        return self._stats[key], self._breakers[key]
+
+    def record(self, key: str, latency_ms: int, ok: bool) -> None:
+        with self._lock:
+            stats, breaker = self._get(key)
+            stats.add(latency_ms, ok)
+            breaker.record(ok)
+
+    def slo_violation(self, key: str, slo: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Name of the violated SLO dimension for `key`, or None."""
+        if not slo:
+            return None
+        with self._lock:
+            summary = self._get(key)[0].summary()
+        if summary["samples"] < self.config.min_samples:
+            return None
+        if "p95_ms" in slo and summary["p95_ms"] is not None and summary["p95_ms"] > slo["p95_ms"]:
+            return "p95_ms"
+        if "max_error_rate" in slo and summary["error_rate"] > slo["max_error_rate"]:
+            return "error_rate"
+        return None
+
+    def allow(self, key: str, claim: bool = True) -> bool:
+        with self._lock:
+            return self._get(key)[1].allow(claim)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            out = {}
+            for key, stats in self._stats.items():
+                br = self._breakers[key]
+                out[key] = {**stats.summary(), "breaker": br.state, "consecutive_failures": br.consecutive_failures, "trips": br.trips}
+            return out
+
+_REGISTRY: HealthRegistry | None = None
+_REGISTRY_LOCK = threading.Lock()
+
+def get_health_registry(config: Optional[Dict[str, Any]] = None) -> HealthRegistry:
+    """Process-wide registry; `config` (model_stack.yaml `health:` block) applies on first use."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = HealthRegistry(HealthConfig.from_dict(config))
+    return _REGISTRY
+
+def reset_health_registry() -> None:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        _REGISTRY = None
+
+__all__ = ["HealthConfig", "RollingStats", "CircuitBreaker", "HealthRegistry", "get_health_registry", "reset_health_registry"]
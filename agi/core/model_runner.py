@@ -5,9 +5,20 @@ Provides forensic metadata (latency, token estimates, cost) for every model invo
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Dict, Literal, Tuple, Optional
-import requests, yaml, time, os
-from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Mapping, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json, threading, time, os, uuid
+from dataclasses import dataclass, asdict, field, replace
+
+from .provider_transport import get_transport
+from .provider_executor import get_executor, concurrency_limit
+from .response_cache import get_response_cache, make_cache_key
+from .model_warmup import get_warmup_manager
+from .model_health import get_health_registry
+from .singleflight import SingleFlight
+from .stack_registry import RoutingTable, StackConfigError, StackRegistry
 
 # Optional Anthrop ic import (remote provider)
 try:
@@ -17,7 +28,11 @@ except Exception:  # pragma: no cover
 
 ROOT_DIR = Path(__file__).resolve().parent
 STACK_PATH = ROOT_DIR / "model_stack.yaml"
-_StackCache: Dict[str, Any] | None = None
+DEFAULT_OLLAMA_ENDPOINT = "http://localhost:11434"
+# Compiled, hot-reloaded view of model_stack.yaml (re-stat at most once per second)
+_STACK_REGISTRY = StackRegistry(STACK_PATH, check_interval_s=1.0)
+# Table pinned for the current context (batch runs), bypassing hot reload
+_PINNED_TABLE: ContextVar[Optional[RoutingTable]] = ContextVar("pinned_stack_table", default=None)
 
 Sensitivity = Literal["normal", "high"]
 Provider = Literal["ollama", "cloud-llm", "anthropic"]
@@ -34,6 +49,19 @@ class ModelReceipt:
     status: str  # success|error
     raw_output: str
     error_msg: Optional[str] = None
+    queue_wait_ms: Optional[int] = None  # async path only: time spent waiting for a provider slot
+    ttft_ms: Optional[int] = None  # streaming only: time to first text chunk
+    tokens_per_sec: Optional[float] = None  # streaming only: output tokens / time after first chunk
+    call_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    cache_hit: bool = False
+    origin_call_id: Optional[str] = None  # call_id of the upstream receipt this one was served from
+    cold_start: bool = False  # the call paid for loading the model into the server
+    model_key: Optional[str] = None  # stack key actually used
+    route_reason: Optional[str] = None  # why that key was chosen (primary / fallback / failover)
+    coalesced: bool = False  # shared another caller's in-flight upstream call (see origin_call_id)
+    context: Optional[List[int]] = field(default=None, repr=False)  # Ollama continuation handle (return_context=True only)
+    stack_version: Optional[str] = None  # model_stack.yaml policy_version used for routing
+    stack_hash: Optional[str] = None  # sha256 of the model_stack.yaml content used for routing
 
 PRICING_PER_MILLION = {
     # Example pricing (update as needed)
@@ -45,31 +73,102 @@ PRICING_PER_MILLION = {
 class ModelRunnerError(Exception):
     pass
 
-def load_model_stack() -> Dict[str, Any]:
-    global _StackCache
-    if _StackCache is None:
-        if not STACK_PATH.exists():
-            raise ModelRunnerError(f"model_stack.yaml not found at {STACK_PATH}")
-        with STACK_PATH.open("r", encoding="utf-8") as f:
-            _StackCache = yaml.safe_load(f) or {}
-    return _StackCache
-
-def resolve_model_key(task_type: str, sensitivity: Sensitivity) -> Tuple[str, Dict[str, Any]]:
-    stack = load_model_stack()
-    routing = stack.get("routing_rules", {})
-    default_key = routing.get("default", "local_small")
-    key = routing.get("by_task_type", {}).get(task_type, default_key)
-    if sensitivity == "high":
-        ov = routing.get("overrides", {}).get("high_sensitivity", {})
-        if not ov.get("allow_remote", True) and key == "remote_tier":
-            key = ov.get("fallback", default_key)
-    models = stack.get("models", {})
-    cfg = models.get(key)
-    if not cfg:
-        raise ModelRunnerError(f"Model key '{key}' not defined for task '{task_type}'")
-    return key, cfg
-
-def _estimate_tokens(text: str) -> int:
+def stack_table() -> RoutingTable:
+    pinned = _PINNED_TABLE.get()
+    if pinned is not None:
+        return pinned
+    try:
+        return _STACK_REGISTRY.current()
+    except StackConfigError as e:
+        raise ModelRunnerError(str(e)) from e
+
+@contextmanager
+def pinned_stack(table: Optional[RoutingTable] = None) -> Iterator[RoutingTable]:
+    """Resolve every call in this context (and contexts copied from it) against one table."""
+    table = table or stack_table()
+    token = _PINNED_TABLE.set(table)
+    try:
+        yield table
+    finally:
+        _PINNED_TABLE.reset(token)
+
+def load_model_stack() -> Mapping[str, Any]:
+    """Current (read-only) model stack; edits to model_stack.yaml are picked up without restart."""
+    return stack_table().stack
+
+def stack_info() -> Dict[str, Any]:
+    """Version/hash of the active stack plus reload counters, for receipts and health endpoints."""
+    return _STACK_REGISTRY.info()
+
+def _stack_section(name: str) -> Dict[str, Any]:
+    try:
+        return load_model_stack().get(name) or {}
+    except ModelRunnerError:
+        return {}
+
+def _provider_endpoint(provider: str, default: Optional[str] = None) -> Optional[str]:
+    return (_stack_section("providers").get(provider) or {}).get("endpoint", default)
+
+def _transport():
+    # Pool sizes/timeouts come from the `transport:` block of model_stack.yaml
+    return get_transport(_stack_section("transport"))
+
+def resolve_model_key(task_type: str, sensitivity: Sensitivity) -> Tuple[str, Mapping[str, Any]]:
+    try:
+        return stack_table().resolve(task_type, sensitivity)
+    except StackConfigError as e:
+        raise ModelRunnerError(str(e)) from e
+
+@dataclass(frozen=True)
+class Route:
+    key: str
+    cfg: Mapping[str, Any]
+    reason: str
+    failover: Tuple[str, ...] = ()  # remaining chain members to try if the call fails
+    available: bool = True  # False when every candidate's circuit breaker is open
+    stack_version: Optional[str] = None
+    stack_hash: Optional[str] = None
+    table: Optional[RoutingTable] = field(default=None, repr=False, compare=False)  # the table this route came from
+
+def _health():
+    return get_health_registry(_stack_section("health"))
+
+def resolve_route(task_type: str, sensitivity: Sensitivity) -> Route:
+    """Health-aware routing on top of `resolve_model_key`.
+
+    Walks the primary key plus its precompiled `fallback_chains` entry, skipping keys
+    whose circuit breaker is open or whose rolling stats break their `slo` entry (breakers
+    are only checked here; a half-open probe is claimed by the call itself). Under
+    high sensitivity, remote fallbacks are dropped unless the override allows them.
+    """
+    table = stack_table()
+    try:
+        compiled = table.route(task_type, sensitivity)
+    except StackConfigError as e:
+        raise ModelRunnerError(str(e)) from e
+    primary, chain = compiled.key, compiled.chain
+    models = table.stack.get("models", {})
+    stamp = {"stack_version": table.version, "stack_hash": table.stack_hash, "table": table}
+    health = _health()
+    slos = table.stack.get("slo") or {}
+    skipped = []
+    for i, key in enumerate(chain):
+        violation = health.slo_violation(key, slos.get(key))
+        if violation:
+            skipped.append(f"{key}:slo_{violation}")
+            continue
+        if not health.allow(key, claim=False):
+            skipped.append(f"{key}:circuit_open")
+            continue
+        reason = "primary" if i == 0 else f"fallback from {primary} ({', '.join(skipped)})"
+        return Route(key, models[key], reason, chain[i + 1:], **stamp)
+    # Nothing meets its SLO: settle for any key whose breaker still lets calls through
+    for i, key in enumerate(chain):
+        if health.allow(key, claim=False):
+            return Route(key, models[key], f"degraded ({', '.join(skipped)})", chain[i + 1:], **stamp)
+    return Route(primary, compiled.cfg, f"no healthy route ({', '.join(skipped)})", available=False, **stamp)
+
+def estimate_tokens(text: str) -> int:
     # Rough heuristic: 1 token ? 4 chars or split by spaces; choose smaller for safety
     if not text:
         return 0
@@ -82,23 +181,55 @@ def _calc_cost(model_id: str, input_toks: int, output_toks: int) -> float:
     cost = (input_toks / 1_000_000 * pricing["input"]) + (output_toks / 1_000_000 * pricing["output"])
     return round(cost, 6)
 
-def call_ollama(model_id: str, prompt: str, **kwargs: Any) -> str:
-    url = "http://localhost:11434/api/generate"
+def ollama_generate(model_id: str, prompt: str, timeout: Optional[float] = None, **kwargs: Any) -> Dict[str, Any]:
+    """Non-streaming /api/generate call returning the full response body (timings, context, ...)."""
+    url = f"{_provider_endpoint('ollama', DEFAULT_OLLAMA_ENDPOINT)}/api/generate"
     payload = {"model": model_id, "prompt": prompt, "stream": False}
     payload.update(kwargs)
-    resp = requests.post(url, json=payload, timeout=120)
+    resp = _transport().post_json("ollama", url, payload, timeout=timeout)
     if resp.status_code != 200:
         raise ModelRunnerError(f"Ollama HTTP {resp.status_code}: {resp.text}")
-    data = resp.json()
+    return resp.json()
+
+def call_ollama(model_id: str, prompt: str, timeout: Optional[float] = None, **kwargs: Any) -> str:
+    data = ollama_generate(model_id, prompt, timeout=timeout, **kwargs)
     return (data.get("response") or data.get("output") or "").strip()
 
+def _warmup():
+    return get_warmup_manager(_stack_section("warmup"))
+
+def _ollama_options() -> Dict[str, Any]:
+    # keep_alive hint on every call keeps warmed models resident between requests
+    mgr = _warmup()
+    return {"keep_alive": mgr.config.keep_alive} if mgr.config.enabled else {}
+
+def warm_up_stack(background: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Preload the stack's Ollama models (the `warmup:` block picks which) and start the keeper thread."""
+    mgr = _warmup()
+    models_cfg = load_model_stack().get("models", {})
+    keys = mgr.config.models or list(models_cfg)
+    models = {k: models_cfg[k]["id"] for k in keys if models_cfg.get(k, {}).get("provider") == "ollama"}
+
+    def load(model_id: str, keep_alive: str) -> Dict[str, Any]:
+        return ollama_generate(model_id, "", keep_alive=keep_alive)
+
+    def run() -> None:
+        mgr.warm_up(models, load)
+        mgr.start_keeper(models, load)
+
+    if background:
+        threading.Thread(target=run, name="model-warmup", daemon=True).start()
+        return mgr.states()
+    run()
+    return mgr.states()
+
 def call_anthropic(model_id: str, prompt: str, system: str, max_tokens: int = 1024, temperature: float = 0.0) -> Dict[str, Any]:
     if anthropic is None:
         raise ModelRunnerError("Anthropic library not available")
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         raise ModelRunnerError("ANTHROPIC_API_KEY missing from environment")
-    client = anthropic.Anthropic(api_key=api_key)
+    client = _transport().anthropic_client(api_key, base_url=_provider_endpoint("anthropic"))
     resp = client.messages.create(
         model=model_id,
         max_tokens=max_tokens,
@@ -112,39 +243,183 @@ def call_anthropic(model_id: str, prompt: str, system: str, max_tokens: int = 10
         "output_tokens": getattr(resp.usage, "output_tokens", 0),
     }
 
-def generate(
-    task_type: str,
+def stream_ollama(model_id: str, prompt: str, timeout: Optional[float] = None, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """Yield Ollama NDJSON events; the last one carries `done: true` and eval counters."""
+    url = f"{_provider_endpoint('ollama', DEFAULT_OLLAMA_ENDPOINT)}/api/generate"
+    payload = {"model": model_id, "prompt": prompt, "stream": True}
+    payload.update(kwargs)
+    resp = _transport().post_json("ollama", url, payload, timeout=timeout, stream=True)
+    try:
+        if resp.status_code != 200:
+            raise ModelRunnerError(f"Ollama HTTP {resp.status_code}: {resp.text}")
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event.get("error"):
+                raise ModelRunnerError(f"Ollama stream error: {event['error']}")
+            yield event
+    finally:
+        resp.close()
+
+def stream_anthropic(model_id: str, prompt: str, system: str, max_tokens: int = 1024, temperature: float = 0.0) -> Iterator[Dict[str, Any]]:
+    """Yield {"text": ...} chunks then a final {"done": True, input/output token counts}."""
+    if anthropic is None:
+        raise ModelRunnerError("Anthropic library not available")
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ModelRunnerError("ANTHROPIC_API_KEY missing from environment")
+    client = _transport().anthropic_client(api_key, base_url=_provider_endpoint("anthropic"))
+    with client.messages.stream(
+        model=model_id,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        system=system,
+        messages=[{"role": "user", "content": prompt}],
+    ) as stream:
+        for text in stream.text_stream:
+            yield {"text": text}
+        final = stream.get_final_message()
+    yield {
+        "done": True,
+        "input_tokens": getattr(final.usage, "input_tokens", 0),
+        "output_tokens": getattr(final.usage, "output_tokens", 0),
+    }
+
+def _invoke_provider(
+    provider: str,
+    model_id: str,
     prompt: str,
-    sensitivity: Sensitivity = "normal",
-    system_prompt: Optional[str] = None,
-    max_tokens: int = 1024,
-    temperature: float = 0.0,
+    system_prompt: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    context: Optional[List[int]] = None,
+    return_context: bool = False,
+) -> Tuple[str, int, int, Dict[str, Any]]:
+    """Single upstream call; returns (output, input_tokens, output_tokens, extra receipt fields)."""
+    if provider == "ollama":
+        opts = _ollama_options()
+        if context:
+            opts["context"] = context
+        data = ollama_generate(model_id=model_id, prompt=prompt, **opts)
+        output = (data.get("response") or data.get("output") or "").strip()
+        extra: Dict[str, Any] = {"cold_start": _warmup().note_call(model_id, data.get("load_duration"))}
+        if return_context:
+            extra["context"] = data.get("context")
+        return output, estimate_tokens(prompt), estimate_tokens(output), extra
+    if provider == "cloud-llm":
+        # Placeholder remote stub
+        output = f"[REMOTE_STUB:{model_id}] {prompt[:180]}"
+        return output, estimate_tokens(prompt), estimate_tokens(output), {}
+    if provider == "anthropic":
+        system = system_prompt or "You are a helpful assistant."  # required for anthropic
+        data = call_anthropic(model_id=model_id, prompt=prompt, system=system, max_tokens=max_tokens, temperature=temperature)
+        return data["text"], data["input_tokens"], data["output_tokens"], {}
+    raise ModelRunnerError(f"Unsupported provider '{provider}'")
+
+def _response_cache(use_cache: Optional[bool]):
+    cfg = _stack_section("response_cache")
+    enabled = cfg.get("enabled", False) if use_cache is None else use_cache
+    return get_response_cache({**cfg, "enabled": True}) if enabled else None
+
+def _receipt_from_cache(cached: Dict[str, Any], start: float) -> ModelReceipt:
+    stored = ModelReceipt(**{k: v for k, v in cached.items() if k in ModelReceipt.__dataclass_fields__})
+    # Served locally: new identity and timing, no spend, pointer back to the call that produced it
+    return replace(
+        stored,
+        timestamp=time.time(),
+        latency_ms=int((time.time() - start) * 1000),
+        cost_usd=0.0,
+        queue_wait_ms=None,
+        ttft_ms=None,
+        tokens_per_sec=None,
+        cold_start=False,
+        call_id=uuid.uuid4().hex,
+        cache_hit=True,
+        origin_call_id=stored.origin_call_id or stored.call_id,
+    )
+
+_FLIGHT = SingleFlight()
+
+def coalescing_stats() -> Dict[str, int]:
+    return _FLIGHT.stats()
+
+def _generate_on(
+    key: str,
+    cfg: Dict[str, Any],
+    prompt: str,
+    system_prompt: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    use_cache: Optional[bool],
+    context: Optional[List[int]] = None,
+    return_context: bool = False,
+) -> ModelReceipt:
+    """Run one call on a resolved model key, coalescing identical deterministic calls in flight."""
+    start = time.time()
+    provider = cfg.get("provider", "ollama")
+    model_id = cfg.get("id")
+    if context is not None or return_context:
+        # Conversation state is not part of the cache key: never cache or share these calls
+        return _generate_once(key, cfg, prompt, system_prompt, max_tokens, temperature, False, None, context, return_context)
+    if temperature != 0.0 or not _stack_section("coalesce").get("enabled", True):
+        return _generate_once(key, cfg, prompt, system_prompt, max_tokens, temperature, use_cache, None)
+    params = {"max_tokens": max_tokens, "temperature": temperature}
+    call_key = make_cache_key(provider, model_id, prompt, system_prompt, params, load_model_stack().get("policy_version"))
+    receipt, shared = _FLIGHT.do(call_key, lambda: _generate_once(key, cfg, prompt, system_prompt, max_tokens, temperature, use_cache, call_key))
+    if not shared:
+        return receipt
+    return replace(
+        receipt,
+        timestamp=time.time(),
+        latency_ms=int((time.time() - start) * 1000),
+        cost_usd=0.0,
+        call_id=uuid.uuid4().hex,
+        coalesced=True,
+        origin_call_id=receipt.origin_call_id or receipt.call_id,
+    )
+
+def _generate_once(
+    key: str,
+    cfg: Dict[str, Any],
+    prompt: str,
+    system_prompt: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    use_cache: Optional[bool],
+    cache_key: Optional[str],
+    context: Optional[List[int]] = None,
+    return_context: bool = False,
 ) -> ModelReceipt:
     start = time.time()
-    key, cfg = resolve_model_key(task_type, sensitivity)
     provider: Provider = cfg.get("provider", "ollama")  # type: ignore
     model_id = cfg.get("id")
+    cache = _response_cache(use_cache) if temperature == 0.0 else None
+    if cache is not None:
+        if cache_key is None:
+            params = {"max_tokens": max_tokens, "temperature": temperature}
+            cache_key = make_cache_key(provider, model_id, prompt, system_prompt, params, load_model_stack().get("policy_version"))
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return _receipt_from_cache(cached, start)
+    if not _health().allow(key):  # after the cache: a hit never holds the half-open probe
+        return ModelReceipt(
+            timestamp=time.time(),
+            model_id=model_id,
+            provider=provider,
+            input_tokens=0,
+            output_tokens=0,
+            latency_ms=0,
+            cost_usd=0.0,
+            status="error",
+            raw_output="",
+            error_msg=f"circuit open: {key} probe in flight",
+        )
     try:
-        if provider == "ollama":
-            output = call_ollama(model_id=model_id, prompt=prompt)
-            in_toks = _estimate_tokens(prompt)
-            out_toks = _estimate_tokens(output)
-        elif provider == "cloud-llm":
-            # Placeholder remote stub
-            output = f"[REMOTE_STUB:{model_id}] {prompt[:180]}"
-            in_toks = _estimate_tokens(prompt)
-            out_toks = _estimate_tokens(output)
-        elif provider == "anthropic":
-            system = system_prompt or "You are a helpful assistant."  # required for anthropic
-            data = call_anthropic(model_id=model_id, prompt=prompt, system=system, max_tokens=max_tokens, temperature=temperature)
-            output = data["text"]
-            in_toks = data["input_tokens"]
-            out_toks = data["output_tokens"]
-        else:
-            raise ModelRunnerError(f"Unsupported provider '{provider}'")
+        output, in_toks, out_toks, extra = _invoke_provider(provider, model_id, prompt, system_prompt, max_tokens, temperature, context, return_context)
         latency_ms = int((time.time() - start) * 1000)
         cost = _calc_cost(model_id, in_toks, out_toks)
-        return ModelReceipt(
+        receipt = ModelReceipt(
             timestamp=time.time(),
             model_id=model_id,
             provider=provider,
@@ -154,9 +429,11 @@ def generate(
             cost_usd=cost,
             status="success",
             raw_output=output,
+            **extra,
         )
     except Exception as e:  # Capture failure receipt
         latency_ms = int((time.time() - start) * 1000)
+        _health().record(key, latency_ms, ok=False)
         return ModelReceipt(
             timestamp=time.time(),
             model_id=model_id,
@@ -169,6 +446,82 @@ def generate(
             raw_output="",
             error_msg=str(e),
         )
+    _health().record(key, latency_ms, ok=True)
+    if cache is not None:
+        cache.put(cache_key, asdict(receipt))
+    return receipt
+
+def generate(
+    task_type: str,
+    prompt: str,
+    sensitivity: Sensitivity = "normal",
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 1024,
+    temperature: float = 0.0,
+    use_cache: Optional[bool] = None,
+    context: Optional[List[int]] = None,
+    return_context: bool = False,
+) -> ModelReceipt:
+    """Route and run one model call.
+
+    `use_cache` overrides the `response_cache.enabled` stack setting; only
+    temperature 0.0 calls are ever served from or written to the cache.
+    A failed call fails over along the route's fallback chain, except when an
+    Ollama `context` is passed: that handle belongs to one model, so the call
+    is pinned to it, and it is dropped when routing skipped the primary key.
+    `return_context=True` puts the new handle on the receipt.
+    """
+    start = time.time()
+    route = resolve_route(task_type, sensitivity)
+    # Failover configs, cache and coalescing keys all read the table this route came from
+    with pinned_stack(route.table):
+        return _generate_routed(route, start, prompt, system_prompt, max_tokens, temperature, use_cache, context, return_context)
+
+def _generate_routed(
+    route: Route,
+    start: float,
+    prompt: str,
+    system_prompt: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    use_cache: Optional[bool],
+    context: Optional[List[int]],
+    return_context: bool,
+) -> ModelReceipt:
+    if not route.available:
+        return ModelReceipt(
+            timestamp=time.time(),
+            model_id=route.cfg.get("id"),
+            provider=route.cfg.get("provider", "ollama"),
+            input_tokens=0,
+            output_tokens=0,
+            latency_ms=0,
+            cost_usd=0.0,
+            status="error",
+            raw_output="",
+            error_msg=f"circuit open: {route.reason}",
+            model_key=route.key,
+            route_reason=route.reason,
+            stack_version=route.stack_version,
+            stack_hash=route.stack_hash,
+        )
+    if route.reason != "primary":
+        context = None  # a continuation handle never reaches a fallback model
+    receipt = _generate_on(route.key, route.cfg, prompt, system_prompt, max_tokens, temperature, use_cache, context, return_context)
+    receipt.model_key, receipt.route_reason = route.key, route.reason
+    models = load_model_stack().get("models", {})  # pinned to route.table by generate
+    for key in route.failover if context is None else ():
+        if receipt.status == "success":
+            break
+        if not _health().allow(key, claim=False):
+            continue
+        failed_key, error = receipt.model_key, receipt.error_msg
+        receipt = _generate_on(key, models[key], prompt, system_prompt, max_tokens, temperature, use_cache, None, return_context)
+        receipt.model_key = key
+        receipt.route_reason = f"failover from {failed_key} ({error})"
+        receipt.latency_ms = int((time.time() - start) * 1000)
+    receipt.stack_version, receipt.stack_hash = route.stack_version, route.stack_hash
+    return receipt
 
 def generate_dict(*args: Any, **kwargs: Any) -> Dict[str, Any]:
     """Helper returning receipt as dict plus convenience 'text'."""
@@ -177,11 +530,232 @@ def generate_dict(*args: Any, **kwargs: Any) -> Dict[str, Any]:
     data["text"] = receipt.raw_output
     return data
 
+class StreamingGeneration:
+    """Iterable of text chunks from a streamed model call.
+
+    `receipt` is populated once iteration finishes, fails or is abandoned, with `ttft_ms`,
+    `tokens_per_sec` and total `latency_ms`. Failures end the stream early and are
+    reported on the receipt, mirroring `generate`; when every breaker on the route is
+    open nothing is streamed.
+    """
+
+    def __init__(self, task_type: str, prompt: str, sensitivity: Sensitivity = "normal", system_prompt: Optional[str] = None, max_tokens: int = 1024, temperature: float = 0.0):
+        self.task_type = task_type
+        self.prompt = prompt
+        self.sensitivity = sensitivity
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.receipt: Optional[ModelReceipt] = None
+
+    def _events(self, provider: str, model_id: str) -> Iterator[Dict[str, Any]]:
+        if provider == "ollama":
+            for event in stream_ollama(model_id=model_id, prompt=self.prompt, **_ollama_options()):
+                out = {"text": event.get("response", "")}
+                if event.get("done"):
+                    out.update(
+                        done=True,
+                        input_tokens=event.get("prompt_eval_count"),
+                        output_tokens=event.get("eval_count"),
+                        cold_start=_warmup().note_call(model_id, event.get("load_duration")),
+                    )
+                yield out
+        elif provider == "anthropic":
+            system = self.system_prompt or "You are a helpful assistant."
+            yield from stream_anthropic(model_id, self.prompt, system, self.max_tokens, self.temperature)
+        elif provider == "cloud-llm":
+            # Placeholder remote stub: whole output as one chunk
+            yield {"text": f"[REMOTE_STUB:{model_id}] {self.prompt[:180]}", "done": True}
+        else:
+            raise ModelRunnerError(f"Unsupported provider '{provider}'")
+
+    def __iter__(self) -> Iterator[str]:
+        start = time.perf_counter()
+        route = resolve_route(self.task_type, self.sensitivity)
+        cfg = route.cfg
+        provider = cfg.get("provider", "ollama")
+        model_id = cfg.get("id")
+        chunks: List[str] = []
+        first: Optional[float] = None
+        in_toks: Optional[int] = None
+        out_toks: Optional[int] = None
+        cold = False
+        error: Optional[str] = None if route.available else f"circuit open: {route.reason}"
+        claimed = error is None and _health().allow(route.key)  # routing only checked the breaker
+        if error is None and not claimed:
+            error = f"circuit open: {route.key} probe in flight"
+        closed = True  # stays True only if the consumer stops iterating early
+        try:
+            if error is None:
+                for event in self._events(provider, model_id):
+                    text = event.get("text") or ""
+                    if text:
+                        if first is None:
+                            first = time.perf_counter()
+                        chunks.append(text)
+                        yield text
+                    if event.get("done"):
+                        in_toks = event.get("input_tokens") or in_toks
+                        out_toks = event.get("output_tokens") or out_toks
+                        cold = bool(event.get("cold_start", cold))
+            closed = False
+        except Exception as e:  # Capture failure receipt
+            error, closed = str(e), False
+        finally:
+            end = time.perf_counter()
+            if closed:
+                error = "stream closed by consumer"  # the model was answering: not a health failure
+            if claimed:
+                _health().record(route.key, int((end - start) * 1000), ok=closed or error is None)
+            output = "".join(chunks)
+            billed = error is None or closed
+            in_toks = in_toks if in_toks is not None else estimate_tokens(self.prompt)
+            out_toks = out_toks if out_toks is not None else estimate_tokens(output)
+            decode_s = end - first if first is not None else 0.0
+            self.receipt = ModelReceipt(
+                timestamp=time.time(),
+                model_id=model_id,
+                provider=provider,
+                input_tokens=in_toks if billed else 0,
+                output_tokens=out_toks if billed else 0,
+                latency_ms=int((end - start) * 1000),
+                cost_usd=_calc_cost(model_id, in_toks, out_toks) if billed else 0.0,
+                status="success" if error is None else "error",
+                raw_output=output.strip() if error is None else output,
+                error_msg=error,
+                ttft_ms=int((first - start) * 1000) if first is not None else None,
+                tokens_per_sec=round(out_toks / decode_s, 2) if decode_s > 0 and out_toks else None,
+                cold_start=cold,
+                model_key=route.key,
+                route_reason=route.reason,
+                stack_version=route.stack_version,
+                stack_hash=route.stack_hash,
+            )
+
+def generate_stream(
+    task_type: str,
+    prompt: str,
+    sensitivity: Sensitivity = "normal",
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 1024,
+    temperature: float = 0.0,
+) -> StreamingGeneration:
+    """Stream text chunks as they arrive; read `.receipt` after iterating."""
+    return StreamingGeneration(task_type, prompt, sensitivity, system_prompt, max_tokens, temperature)
+
+async def agenerate(
+    task_type: str,
+    prompt: str,
+    sensitivity: Sensitivity = "normal",
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 1024,
+    temperature: float = 0.0,
+    use_cache: Optional[bool] = None,
+) -> ModelReceipt:
+    """asyncio variant of `generate`.
+
+    Callers are queued on a per-provider semaphore sized from the `concurrency:` block of
+    model_stack.yaml, so any number of coroutines share a bounded set of worker threads.
+    """
+    # Primary provider picks the executor; generate() does the health-aware routing itself
+    _, cfg = resolve_model_key(task_type, sensitivity)
+    executor = get_executor(cfg.get("provider", "ollama"), _stack_section("concurrency"))
+    receipt, wait_ms = await executor.run(
+        generate,
+        task_type=task_type,
+        prompt=prompt,
+        sensitivity=sensitivity,
+        system_prompt=system_prompt,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        use_cache=use_cache,
+    )
+    receipt.queue_wait_ms = wait_ms
+    return receipt
+
+async def agenerate_dict(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+    receipt = await agenerate(*args, **kwargs)
+    data = asdict(receipt)
+    data["text"] = receipt.raw_output
+    return data
+
+@dataclass
+class BatchResult:
+    receipts: List[ModelReceipt]  # same order as the input batch
+    elapsed_ms: int
+    succeeded: int
+    failed: int
+    cache_hits: int
+    prompts_per_sec: float
+    tokens_per_sec: float  # output tokens across the batch / wall time
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("receipts")
+        return data
+
+def generate_many(batch: Iterable[Dict[str, Any]], max_concurrency: int = 8) -> BatchResult:
+    """Run many `generate` calls on a worker pool, preserving input order.
+
+    Each item is a dict of `generate` keyword arguments. Besides `max_concurrency`,
+    calls are capped per model key (`models.<key>.max_concurrency`) and per provider
+    (`concurrency:` block), whichever is tighter.
+    """
+    items = list(batch)
+    limits = _stack_section("concurrency")
+    gates: Dict[str, threading.BoundedSemaphore] = {}
+    gates_lock = threading.Lock()
+
+    def gate(name: str, limit: int) -> threading.BoundedSemaphore:
+        with gates_lock:
+            if name not in gates:
+                gates[name] = threading.BoundedSemaphore(max(1, limit))
+            return gates[name]
+
+    def run_one(item: Dict[str, Any]) -> ModelReceipt:
+        try:
+            key, cfg = resolve_model_key(item["task_type"], item.get("sensitivity", "normal"))
+        except Exception as e:
+            return ModelReceipt(
+                timestamp=time.time(),
+                model_id="unresolved",
+                provider="none",
+                input_tokens=0,
+                output_tokens=0,
+                latency_ms=0,
+                cost_usd=0.0,
+                status="error",
+                raw_output="",
+                error_msg=str(e),
+            )
+        provider = cfg.get("provider", "ollama")
+        provider_gate = gate(f"provider:{provider}", concurrency_limit(provider, limits))
+        key_gate = gate(f"model:{key}", int(cfg.get("max_concurrency") or concurrency_limit(provider, limits)))
+        with key_gate, provider_gate:
+            return generate(**item)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="generate-many") as pool:
+        receipts = list(pool.map(run_one, items))
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for r in receipts if r.status != "success")
+    out_tokens = sum(r.output_tokens for r in receipts)
+    return BatchResult(
+        receipts=receipts,
+        elapsed_ms=int(elapsed * 1000),
+        succeeded=len(receipts) - failed,
+        failed=failed,
+        cache_hits=sum(1 for r in receipts if r.cache_hit),
+        prompts_per_sec=round(len(receipts) / elapsed, 2) if elapsed > 0 else 0.0,
+        tokens_per_sec=round(out_tokens / elapsed, 2) if elapsed > 0 else 0.0,
+    )
+
 # Backwards compatibility function used by specialist
 def run_model_for_task(task_type: str, prompt: str, sensitivity: Sensitivity = "normal") -> Dict[str, Any]:
     rec = generate(task_type=task_type, prompt=prompt, sensitivity=sensitivity)
     return {"model_key": task_type, "model_id": rec.model_id, "provider": rec.provider, "text": rec.raw_output, "receipt": asdict(rec), "sensitivity": sensitivity}
 
 if __name__ == "__main__":  # quick manual test
+    print(warm_up_stack())
     r = generate("governance", "List three principles of sovereign property analysis.")
     print(asdict(r))
@@ -0,0 +1,149 @@
+# agi/core/model_warmup.py
+"""Model warm-up and keep-alive pinning for the Ollama model stack (v0.1c).
+Preloads configured models, keeps them resident via `keep_alive` hints and tracks
+per-model load state so receipts can say whether a call paid for a cold load.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_KEEP_ALIVE = "30m"
+DEFAULT_COLD_THRESHOLD_MS = 500
+
+@dataclass
+class WarmupConfig:
+    enabled: bool = False
+    keep_alive: str = DEFAULT_KEEP_ALIVE   # Ollama duration ("30m", "2h") or "-1" to pin forever
+    models: Optional[List[str]] = None     # model keys; None = every ollama model in the stack
+    cold_threshold_ms: int = DEFAULT_COLD_THRESHOLD_MS
+    refresh_interval_s: float = 0.0        # >0 starts a keeper thread that re-pings before expiry
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "WarmupConfig":
+        data = data or {}
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+@dataclass
+class ModelLoadState:
+    model_id: str
+    loaded: bool = False
+    last_loaded_at: Optional[float] = None
+    last_used_at: Optional[float] = None
+    last_load_ms: Optional[int] = None
+    cold_starts: int = 0
+    warmups: int = 0
+    warmup_errors: int = 0
+
+def keep_alive_seconds(value: Any) -> Optional[float]:
+    """Seconds for an Ollama keep_alive value; None means 'forever'."""
+    text = str(value).strip()
+    if text.startswith("-"):
+        return None
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([smh]?)", text)
+    if not m:
+        return None
+    return float(m.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600}[m.group(2)]
+
+class WarmupManager:
+    def __init__(self, config: Optional[WarmupConfig] = None):
+        self.config = config or WarmupConfig()
+        self._states: Dict[str, ModelLoadState] = {}
+        self._lock = threading.Lock()
+        self._keeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _state(self, model_id: str) -> ModelLoadState:
+        st = self._states.get(model_id)
+        if st is None:
+            st = self._states[model_id] = ModelLoadState(model_id=model_id)
+        return st
+
+    def _expired(self, st: ModelLoadState, now: float) -> bool:
+        ttl = keep_alive_seconds(self.config.keep_alive)
+        last = max(st.last_used_at or 0.0, st.last_loaded_at or 0.0)
+        return ttl is not None and now - last > ttl
+
+    def note_call(self, model_id: str, load_duration_ns: Optional[int] = None) -> bool:
+        """Record a completed call; returns True if it paid for a model load."""
+        now = time.time()
+        with self._lock:
+            st = self._state(model_id)
+            if load_duration_ns is not None:
+                load_ms = int(load_duration_ns / 1_000_000)
+                cold = load_ms >= self.config.cold_threshold_ms
+            else:
+                # No server timing available: infer from our own view of residency
+                load_ms = None
+                cold = not st.loaded or self._expired(st, now)
+            if cold:
+                st.cold_starts += 1
+                st.last_loaded_at = now
+                st.last_load_ms = load_ms
+            st.loaded = True
+            st.last_used_at = now
+            return cold
+
+    def warm_up(self, models: Dict[str, str], load: Callable[[str, str], Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Preload `models` ({key: model_id}); `load(model_id, keep_alive)` returns the Ollama response."""
+        for key, model_id in models.items():
+            start = time.time()
+            try:
+                data = load(model_id, self.config.keep_alive)
+            except Exception:
+                with self._lock:
+                    self._state(model_id).warmup_errors += 1
+                continue
+            with self._lock:
+                st = self._state(model_id)
+                st.loaded = True
+                st.warmups += 1
+                st.last_loaded_at = time.time()
+                ns = data.get("load_duration") if isinstance(data, dict) else None
+                st.last_load_ms = int(ns / 1_000_000) if ns is not None else int((time.time() - start) * 1000)
+        return self.states()
+
+    def start_keeper(self, models: Dict[str, str], load: Callable[[str, str], Dict[str, Any]]) -> None:
+        """Background thread re-pinging `models` every refresh_interval_s."""
+        interval = self.config.refresh_interval_s
+        if interval <= 0 or (self._keeper and self._keeper.is_alive()):
+            return
+        self._stop.clear()
+
+        def _loop() -> None:
+            while not self._stop.wait(interval):
+                self.warm_up(models, load)
+
+        self._keeper = threading.Thread(target=_loop, name="model-keepalive", daemon=True)
+        self._keeper.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def states(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {mid: asdict(st) for mid, st in self._states.items()}
+
+_MANAGER: WarmupManager | None = None
+_MANAGER_LOCK = threading.Lock()
+
+def get_warmup_manager(config: Optional[Dict[str, Any]] = None) -> WarmupManager:
+    """Process-wide manager; `config` (model_stack.yaml `warmup:` block) applies on first use."""
+    global _MANAGER
+    if _MANAGER is None:
+        with _MANAGER_LOCK:
+            if _MANAGER is None:
+                _MANAGER = WarmupManager(WarmupConfig.from_dict(config))
+    return _MANAGER
+
+def reset_warmup_manager() -> None:
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is not None:
+            _MANAGER.stop()
+        _MANAGER = None
+
+__all__ = ["WarmupConfig", "ModelLoadState", "WarmupManager", "get_warmup_manager", "reset_warmup_manager", "keep_alive_seconds"]
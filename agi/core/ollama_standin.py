@@ -0,0 +1,217 @@
+# agi/core/ollama_standin.py
+"""Deterministic local stand-in for the Ollama /api/generate endpoint (v0.1c).
+Used by bench_model_runner and tests to measure model_runner without a real model
+server: configurable latency distribution, token rate, cold loads, parallel slots,
+error injection and NDJSON streaming.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+_WORDS = (
+    "sovereign policy evidence ledger audit receipt model answer clear lawful "
+    "risk context review signal record trust node manifest seal verify"
+).split()
+
+@dataclass
+class StandinConfig:
+    latency: str = "fixed:50"        # time to first token: fixed:<ms> | uniform:<lo>:<hi> | lognormal:<median_ms>:<sigma>
+    tokens_per_sec: float = 50.0     # decode rate after the first token
+    output_tokens: str = "32"        # "<n>" or "<lo>:<hi>"
+    load_ms: float = 0.0             # extra delay on a model's first call / after keep_alive expiry
+    keep_alive_s: float = 300.0
+    error_rate: float = 0.0          # fraction of requests answered with HTTP 500
+    parallel: int = 0                # concurrent generation slots (0 = unlimited), like OLLAMA_NUM_PARALLEL
+    seed: int = 0
+
+def _sample_ms(spec: str, rng: random.Random) -> float:
+    kind, *args = spec.split(":")
+    vals = [float(a) for a in args]
+    if kind == "fixed":
+        return vals[0]
+    if kind == "uniform":
+        return rng.uniform(vals[0], vals[1])
+    if kind == "lognormal":
+        import math
+        return rng.lognormvariate(math.log(vals[0]), vals[1])
+    raise ValueError(f"Unknown latency distribution '{spec}'")
+
+def _sample_count(spec: str, rng: random.Random) -> int:
+    parts = [int(p) for p in spec.split(":")]
+    return parts[0] if len(parts) == 1 else rng.randint(parts[0], parts[1])
+
+class OllamaStandin:
+    def __init__(self, config: Optional[StandinConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StandinConfig()
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, float] = {}
+        self._slots = threading.BoundedSemaphore(self.config.parallel) if self.config.parallel > 0 else None
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "OllamaStandin":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ollama-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "OllamaStandin":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "loaded_models": sorted(self._loaded)}
+
+    # -- request planning -------------------------------------------------
+    def _plan(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Everything random about one request, drawn up front from a per-request RNG."""
+        with self._lock:
+            self.requests += 1
+            n = self.requests
+            model = body.get("model", "")
+            now = time.monotonic()
+            last = self._loaded.get(model)
+            cold = last is None or now - last > self.config.keep_alive_s
+            self._loaded[model] = now
+        seed = hashlib.sha256(f"{self.config.seed}|{n}|{body.get('prompt', '')}".encode("utf-8")).hexdigest()
+        rng = random.Random(seed)
+        fail = rng.random() < self.config.error_rate
+        if fail:
+            with self._lock:
+                self.errors += 1
+        # Output text depends only on the prompt, so repeated prompts give identical answers
+        text_rng = random.Random(hashlib.sha256(body.get("prompt", "").encode("utf-8")).hexdigest())
+        count = 0 if body.get("prompt", "") == "" else _sample_count(self.config.output_tokens, rng)
+        tokens = [text_rng.choice(_WORDS) + " " for _ in range(count)]
+        return {
+            "fail": fail,
+            "load_ms": self.config.load_ms if cold else 0.0,
+            "ttft_ms": _sample_ms(self.config.latency, rng),
+            "tokens": tokens,
+            "context": list(body.get("context") or []) + list(range(len(tokens) + 1)),
+        }
+
+    def _final(self, body: Dict[str, Any], plan: Dict[str, Any], elapsed_ns: int) -> Dict[str, Any]:
+        prompt = body.get("prompt", "")
+        return {
+            "model": body.get("model"),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "done": True,
+            "context": plan["context"],
+            "total_duration": elapsed_ns,
+            "load_duration": int(plan["load_ms"] * 1_000_000),
+            "prompt_eval_count": max(1, len(prompt.split())),
+            "eval_count": len(plan["tokens"]),
+        }
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body are separate writes; avoid delayed-ACK stalls
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send_json(self, status: int, data: Dict[str, Any]) -> None:
+                out = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def do_GET(self) -> None:
+                if self.path == "/api/tags":
+                    self._send_json(200, {"models": [{"name": m} for m in standin.stats()["loaded_models"]]})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self) -> None:
+                if self.path != "/api/generate":
+                    self._send_json(404, {"error": "not found"})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                plan = standin._plan(body)
+                if plan["fail"]:
+                    self._send_json(500, {"error": "injected failure"})
+                    return
+                if standin._slots:
+                    standin._slots.acquire()
+                try:
+                    self._generate(body, plan)
+                finally:
+                    if standin._slots:
+                        standin._slots.release()
+
+            def _generate(self, body: Dict[str, Any], plan: Dict[str, Any]) -> None:
+                start = time.perf_counter_ns()
+                time.sleep((plan["load_ms"] + plan["ttft_ms"]) / 1000)
+                per_token = 1.0 / standin.config.tokens_per_sec if standin.config.tokens_per_sec > 0 else 0.0
+                tokens: List[str] = plan["tokens"]
+                if body.get("stream", True) is False:
+                    time.sleep(per_token * max(len(tokens) - 1, 0))
+                    final = standin._final(body, plan, time.perf_counter_ns() - start)
+                    final["response"] = "".join(tokens).strip()
+                    self._send_json(200, final)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, tok in enumerate(tokens):
+                    if i:
+                        time.sleep(per_token)
+                    self._chunk({"model": body.get("model"), "response": tok, "done": False})
+                final = standin._final(body, plan, time.perf_counter_ns() - start)
+                final["response"] = ""
+                self._chunk(final)
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _chunk(self, data: Dict[str, Any]) -> None:
+                line = json.dumps(data).encode("utf-8") + b"\n"
+                self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+__all__ = ["StandinConfig", "OllamaStandin"]
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Run a deterministic Ollama stand-in server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11434)
+    for name, field_ in StandinConfig.__dataclass_fields__.items():
+        ap.add_argument(f"--{name.replace('_', '-')}", type=type(field_.default), default=field_.default)
+    args = ap.parse_args()
+    cfg = StandinConfig(**{k: getattr(args, k) for k in StandinConfig.__dataclass_fields__})
+    srv = OllamaStandin(cfg, host=args.host, port=args.port).start()
+    print(json.dumps({"url": srv.url, "config": asdict(cfg)}))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.stop()
@@ -0,0 +1,117 @@
+# agi/core/provider_executor.py
+"""Concurrency-limited executors for async model calls (v0.1c).
+Each provider gets a fixed-size worker pool and an asyncio semaphore of the same size,
+so waiting coroutines queue cheaply instead of each holding an OS thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_CONCURRENCY = 4
+
+@dataclass
+class ExecutorMetrics:
+    limit: int
+    queue_depth: int = 0        # coroutines waiting for a slot right now
+    max_queue_depth: int = 0
+    in_flight: int = 0
+    completed: int = 0
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+
+    @property
+    def avg_wait_ms(self) -> float:
+        return round(self.total_wait_ms / self.completed, 3) if self.completed else 0.0
+
+class ProviderExecutor:
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.metrics = ExecutorMetrics(limit=self.limit)
+        self._pool = ThreadPoolExecutor(max_workers=self.limit, thread_name_prefix=f"model-{name}")
+        self._lock = threading.Lock()
+        # asyncio primitives are bound to one loop; keep one semaphore per running loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        with self._lock:
+            sem = self._semaphores.get(loop)
+            if sem is None:
+                sem = asyncio.Semaphore(self.limit)
+                self._semaphores[loop] = sem
+            return sem
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, int]:
+        """Run `fn` on the provider pool once a slot is free; returns (result, queue_wait_ms)."""
+        loop = asyncio.get_running_loop()
+        m = self.metrics
+        enqueued = time.perf_counter()
+        with self._lock:
+            m.queue_depth += 1
+            m.max_queue_depth = max(m.max_queue_depth, m.queue_depth)
+        acquired = False
+        try:
+            async with self._semaphore(loop):
+                acquired = True
+                wait_ms = (time.perf_counter() - enqueued) * 1000
+                with self._lock:
+                    m.queue_depth -= 1
+                    m.in_flight += 1
+                    m.total_wait_ms += wait_ms
+                    m.max_wait_ms = max(m.max_wait_ms, wait_ms)
+                try:
+                    result = await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+                finally:
+                    with self._lock:
+                        m.in_flight -= 1
+                        m.completed += 1
+                return result, int(wait_ms)
+        finally:
+            if not acquired:  # cancelled while queued
+                with self._lock:
+                    m.queue_depth -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            data = asdict(self.metrics)
+            data["avg_wait_ms"] = self.metrics.avg_wait_ms
+            return data
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+_EXECUTORS: Dict[str, ProviderExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+def concurrency_limit(name: str, config: Optional[Dict[str, Any]] = None) -> int:
+    config = config or {}
+    return int(config.get(name, config.get("default", DEFAULT_CONCURRENCY)))
+
+def get_executor(name: str, config: Optional[Dict[str, Any]] = None) -> ProviderExecutor:
+    """Executor for a provider; `config` is the model_stack.yaml `concurrency:` block."""
+    ex = _EXECUTORS.get(name)
+    if ex is None:
+        with _EXECUTORS_LOCK:
+            ex = _EXECUTORS.get(name)
+            if ex is None:
+                ex = ProviderExecutor(name, concurrency_limit(name, config))
+                _EXECUTORS[name] = ex
+    return ex
+
+def executor_metrics() -> Dict[str, Dict[str, Any]]:
+    return {name: ex.snapshot() for name, ex in list(_EXECUTORS.items())}
+
+def reset_executors() -> None:
+    with _EXECUTORS_LOCK:
+        for ex in _EXECUTORS.values():
+            ex.shutdown(wait=False)
+        _EXECUTORS.clear()
+
+__all__ = ["ExecutorMetrics", "ProviderExecutor", "get_executor", "executor_metrics", "reset_executors", "concurrency_limit"]
@@ -0,0 +1,195 @@
+# agi/core/provider_transport.py
+"""Shared provider transport layer (v0.1c).
+Holds one pooled keep-alive HTTP session per (provider, endpoint) and one cached
+client per remote SDK credential, so repeated model calls reuse connections.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+@dataclass
+class TransportConfig:
+    pool_connections: int = 4      # distinct hosts kept per session
+    pool_maxsize: int = 16         # keep-alive sockets per host
+    keep_alive: bool = True
+    connect_timeout_s: float = 5.0
+    read_timeout_s: float = 120.0
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "TransportConfig":
+        data = data or {}
+        known = {k: data[k] for k in cls.__dataclass_fields__ if k in data}
+        return cls(**known)
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        return (self.connect_timeout_s, self.read_timeout_s)
+
+@dataclass
+class EndpointStats:
+    provider: str
+    endpoint: str
+    requests: int = 0
+    new_connections: int = 0
+    errors: int = 0
+
+    @property
+    def reused_connections(self) -> int:
+        return max(self.requests - self.new_connections, 0)
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["reused_connections"] = self.reused_connections
+        return data
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools report every fresh socket to an EndpointStats."""
+
+    def __init__(self, stats: EndpointStats, lock: threading.Lock, **kwargs: Any):
+        self._stats = stats
+        self._lock = lock
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        stats, lock = self._stats, self._lock
+
+        class _HTTPPool(HTTPConnectionPool):
+            def _new_conn(self):  # type: ignore[override]
+                with lock:
+                    stats.new_connections += 1
+                return super()._new_conn()
+
+        class _HTTPSPool(HTTPSConnectionPool):
+            def _new_conn(self):  # type: ignore[override]
+                with lock:
+                    stats.new_connections += 1
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {"http": _HTTPPool, "https": _HTTPSPool}
+
+def _endpoint_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+class ProviderTransport:
+    def __init__(self, config: Optional[TransportConfig] = None):
+        self.config = config or TransportConfig()
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[str, str], requests.Session] = {}
+        self._stats: Dict[Tuple[str, str], EndpointStats] = {}
+        self._clients: Dict[Tuple[str, str, str], Any] = {}
+
+    def session(self, provider: str, endpoint: str) -> requests.Session:
+        key = (provider, endpoint)
+        with self._lock:
+            sess = self._sessions.get(key)
+            if sess is None:
+                stats = self._stats.setdefault(key, EndpointStats(provider=provider, endpoint=endpoint))
+                adapter = _CountingAdapter(
+                    stats,
+                    self._lock,
+                    pool_connections=self.config.pool_connections,
+                    pool_maxsize=self.config.pool_maxsize,
+                )
+                sess = requests.Session()
+                sess.mount("http://", adapter)
+                sess.mount("https://", adapter)
+                sess.headers["Connection"] = "keep-alive" if self.config.keep_alive else "close"
+                self._sessions[key] = sess
+            return sess
+
+    def post_json(
+        self,
+        provider: str,
+        url: str,
+        payload: Dict[str, Any],
+        timeout: Optional[float | Tuple[float, float]] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        endpoint = _endpoint_of(url)
+        sess = self.session(provider, endpoint)
+        stats = self._stats[(provider, endpoint)]
+        with self._lock:
+            stats.requests += 1
+        try:
+            return sess.post(url, json=payload, timeout=timeout if timeout is not None else self.config.timeout, stream=stream)
+        except Exception:
+            with self._lock:
+                stats.errors += 1
+            raise
+
+    def anthropic_client(self, api_key: str, base_url: Optional[str] = None) -> Any:
+        """Return a cached anthropic.Anthropic client backed by a bounded httpx pool."""
+        import anthropic  # type: ignore
+        import httpx  # type: ignore  # anthropic dependency
+
+        key = ("anthropic", hashlib.sha256(api_key.encode("utf-8")).hexdigest(), base_url or "")
+        endpoint = base_url or "default"
+        with self._lock:
+            stats = self._stats.setdefault(("anthropic", endpoint), EndpointStats(provider="anthropic", endpoint=endpoint))
+            stats.requests += 1
+            client = self._clients.get(key)
+            if client is None:
+                # one client == one httpx pool; count it as the "new connection" for reuse accounting
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=self.config.pool_maxsize,
+                        max_keepalive_connections=self.config.pool_maxsize if self.config.keep_alive else 0,
+                    ),
+                    timeout=httpx.Timeout(self.config.read_timeout_s, connect=self.config.connect_timeout_s),
+                )
+                client = anthropic.Anthropic(api_key=api_key, base_url=base_url, http_client=http_client)
+                self._clients[key] = client
+                stats.new_connections += 1
+            return client
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {f"{p}|{e}": s.as_dict() for (p, e), s in self._stats.items()}
+
+    def close(self) -> None:
+        with self._lock:
+            for sess in self._sessions.values():
+                sess.close()
+            for client in self._clients.values():
+                try:
+                    client.close()
+                except Exception:
+                    pass
+            self._sessions.clear()
+            self._clients.clear()
+
+_TRANSPORT: ProviderTransport | None = None
+_TRANSPORT_LOCK = threading.Lock()
+
+def get_transport(config: Optional[Dict[str, Any]] = None) -> ProviderTransport:
+    """Process-wide transport; `config` only applies when the transport is first created."""
+    global _TRANSPORT
+    if _TRANSPORT is None:
+        with _TRANSPORT_LOCK:
+            if _TRANSPORT is None:
+                _TRANSPORT = ProviderTransport(TransportConfig.from_dict(config))
+    return _TRANSPORT
+
+def configure_transport(config: Optional[Dict[str, Any]] = None) -> ProviderTransport:
+    """Replace the process-wide transport (closing pooled connections of the old one)."""
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        if _TRANSPORT is not None:
+            _TRANSPORT.close()
+        _TRANSPORT = ProviderTransport(TransportConfig.from_dict(config))
+    return _TRANSPORT
+
+def transport_stats() -> Dict[str, Dict[str, Any]]:
+    return get_transport().stats()
+
+__all__ = ["TransportConfig", "EndpointStats", "ProviderTransport", "get_transport", "configure_transport", "transport_stats"]
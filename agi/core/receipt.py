@@ -1,12 +1,18 @@
 # agi/core/receipt.py
 from __future__ import annotations
 
+import calendar
 import json
 import sqlite3
+import threading
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Sequence, Tuple
+
+from .receipt_log import ReceiptLog, ReceiptLogConfig, ensure_index, fsync_dir
+from .storage_codec import BLOB_REF, CodecConfig, decode, encode, ensure_blob_table, pack_audit, unpack_audit
 
 DB_PATH = Path(__file__).resolve().parent / "sovereign_model.sqlite"
 RECEIPTS_DIR = Path(__file__).resolve().parent / "receipts"
@@ -28,14 +34,293 @@ class SovereignReceipt:
     drift_detected: bool = False
     drift_details: Optional[List[Dict]] = None
     timestamp: int = int(time.time())
+    reused: bool = False  # answer served from the answer cache; parent_receipt_id is the original
+
+class ReceiptStore:
+    """Owns the SQLite connections for one database file.
+
+    Each thread gets its own long-lived connection (sqlite3 connections must not be shared
+    across threads mid-transaction). The database runs in WAL mode, so readers never block
+    the single writer and vice versa; `synchronous=NORMAL` is durable across application
+    crashes and only risks the last commits on power loss. Statements are prepared once per
+    connection via sqlite3's statement cache, and lock contention waits `busy_timeout_ms`
+    instead of failing immediately.
+    """
+
+    def __init__(self, path: Path, synchronous: str = "NORMAL", busy_timeout_ms: int = 5000, cached_statements: int = 256):
+        self.path = Path(path)
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: Dict[threading.Thread, sqlite3.Connection] = {}
+
+    def open(self) -> sqlite3.Connection:
+        """A new tuned connection the caller owns (e.g. a dedicated writer thread)."""
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use.
+
+        Opening one also closes the connections of threads that have exited (e.g. the
+        receipt log's compression threads), so handles never outnumber live threads.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.open()
+            with self._lock:
+                stale = [self._conns.pop(t) for t in [t for t in self._conns if not t.is_alive()]]
+                self._conns[threading.current_thread()] = conn
+            for old in stale:
+                old.close()
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """BEGIN IMMEDIATE ... COMMIT on this thread's connection (ROLLBACK on error).
+
+        Taking the write lock up front means a busy writer is waited for at BEGIN rather
+        than failing a read-then-write upgrade halfway through.
+        """
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """Run a read (or autocommitted single write) on this thread's connection."""
+        return self.connection().execute(sql, params)
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._conns = list(self._conns.values()), {}
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._local = threading.local()
+
+_STORES: Dict[Path, ReceiptStore] = {}
+_STORES_LOCK = threading.Lock()
+
+def get_receipt_store(path: Optional[Path] = None) -> ReceiptStore:
+    """Process-wide store for `path` (default: the current DB_PATH)."""
+    path = Path(path or DB_PATH)
+    store = _STORES.get(path)
+    if store is None:
+        with _STORES_LOCK:
+            store = _STORES.setdefault(path, ReceiptStore(path))
+    return store
+
+def reset_receipt_stores() -> None:
+    """Close every pooled connection and open receipt log (tests, forks, shutdown)."""
+    reset_receipt_logs()
+    with _STORES_LOCK:
+        stores = list(_STORES.values())
+        _STORES.clear()
+    for store in stores:
+        store.close()
+
+LOG_CONFIG = ReceiptLogConfig()
+CODEC_CONFIG = CodecConfig()  # how raw_answer, explained_answer and audit_receipt are stored
+_LOGS: Dict[Tuple[Path, Path], ReceiptLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+def get_receipt_log(root: Optional[Path] = None) -> ReceiptLog:
+    """Process-wide segmented log for `root` (default: RECEIPTS_DIR), indexed in the current DB_PATH."""
+    key = (Path(root or RECEIPTS_DIR), Path(DB_PATH))
+    log = _LOGS.get(key)
+    if log is None:
+        with _LOGS_LOCK:
+            if key not in _LOGS:
+                _LOGS[key] = ReceiptLog(key[0], get_receipt_store(key[1]).connection, LOG_CONFIG)
+            log = _LOGS[key]
+    return log
+
+def reset_receipt_logs() -> None:
+    with _LOGS_LOCK:
+        logs = list(_LOGS.values())
+        _LOGS.clear()
+    for log in logs:
+        log.close()
 
 def _column_exists(cur: sqlite3.Cursor, table: str, column: str) -> bool:
     cur.execute(f"PRAGMA table_info({table})")
     return any(row[1] == column for row in cur.fetchall())
 
 def init_db() -> None:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+    with get_receipt_store().transaction() as conn:
+        _create_schema(conn.cursor())
+
+SCHEMA_VERSION = 6  # PRAGMA user_version once every migration below has run
+
+def _migrate_v1(cur: sqlite3.Cursor) -> None:
+    # Thread reads filter on answer_id and page by id; receipt lookups filter on receipt_id
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_assistant_messages_answer ON assistant_messages(answer_id, id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sovereign_answers_receipt ON sovereign_answers(receipt_id)")
+
+AUDIT_FACTS = ("receipt_id", "answer_id", "model_id", "policy_version", "mode", "arbiter_status", "policy_ok", "drift_detected", "reused", "timestamp")
+
+def _flag(value: Any) -> Optional[int]:
+    return None if value is None else int(bool(value))
+
+def _answering_model(audit: Dict[str, Any], default: Optional[str]) -> Optional[str]:
+    """The model that actually answered (the specialist call), not the receipt's routing label."""
+    calls = audit.get("calls") or {}
+    return ((calls.get("specialist_receipt") if isinstance(calls, dict) else None) or {}).get("model_id") or default
+
+_ANSWERING_MODEL_SQL = "COALESCE(json_extract(audit_receipt, '$.calls.specialist_receipt.model_id'), json_extract(audit_receipt, '$.model_id'))"
+
+def _migrate_v2(cur: sqlite3.Cursor) -> None:
+    # Queryable facts of each audit receipt (audit_receipt itself stays an opaque document)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS audit_index (
+            receipt_id TEXT PRIMARY KEY,
+            answer_id TEXT NOT NULL,
+            model_id TEXT,
+            policy_version TEXT,
+            mode TEXT,
+            arbiter_status TEXT,            -- "OK" | "REFUSED"
+            policy_ok INTEGER,
+            drift_detected INTEGER NOT NULL DEFAULT 0,
+            reused INTEGER NOT NULL DEFAULT 0,
+            timestamp INTEGER NOT NULL      -- receipt timestamp (unix seconds)
+        )
+        """
+    )
+    for cols in ("timestamp", "policy_version, timestamp", "arbiter_status, timestamp", "model_id, timestamp", "drift_detected, timestamp", "policy_ok, timestamp"):
+        name = "idx_audit_index_" + "_".join(c.strip() for c in cols.split(","))
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {name} ON audit_index({cols}, receipt_id)")
+    # Backfill from the stored audit receipts
+    cur.execute(
+        f"""
+        INSERT OR IGNORE INTO audit_index
+        SELECT receipt_id, answer_id,
+               {_ANSWERING_MODEL_SQL},
+               json_extract(audit_receipt, '$.policy_version'),
+               json_extract(audit_receipt, '$.mode'),
+               json_extract(audit_receipt, '$.arbiter_status'),
+               json_extract(audit_receipt, '$.validator.policy_ok'),
+               COALESCE(json_extract(audit_receipt, '$.drift_detected'), 0),
+               COALESCE(json_extract(audit_receipt, '$.reused'), 0),
+               COALESCE(json_extract(audit_receipt, '$.timestamp'), CAST(strftime('%s', created_at) AS INTEGER))
+        FROM sovereign_answers
+        WHERE typeof(audit_receipt) = 'text' AND json_valid(audit_receipt)
+        """
+    )
+    # Rows already stored through the storage codec are decoded here
+    ensure_blob_table(cur.connection)
+    for receipt_id, answer_id, stored, created_at in cur.execute(
+        "SELECT receipt_id, answer_id, audit_receipt, created_at FROM sovereign_answers WHERE typeof(audit_receipt) = 'blob'"
+    ).fetchall():
+        audit = unpack_audit(cur.connection, stored) or {}
+        ts = audit.get("timestamp") or calendar.timegm(time.strptime(created_at, "%Y-%m-%dT%H:%M:%SZ"))
+        cur.execute(
+            f"INSERT OR IGNORE INTO audit_index ({', '.join(AUDIT_FACTS)}) VALUES ({', '.join('?' * len(AUDIT_FACTS))})",
+            (
+                receipt_id,
+                answer_id,
+                _answering_model(audit, audit.get("model_id")),
+                audit.get("policy_version"),
+                audit.get("mode"),
+                audit.get("arbiter_status"),
+                _flag((audit.get("validator") or {}).get("policy_ok")),
+                int(bool(audit.get("drift_detected"))),
+                int(bool(audit.get("reused"))),
+                ts,
+            ),
+        )
+
+def _migrate_v3(cur: sqlite3.Cursor) -> None:
+    # Content-addressed audit sub-documents shared between receipts (see storage_codec)
+    ensure_blob_table(cur.connection)
+
+def _migrate_v4(cur: sqlite3.Cursor) -> None:
+    # Retention: manifest of sealed archive segments (hash chained) and where each archived answer lives
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archive_segments (
+            segment INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            file_sha256 TEXT NOT NULL,
+            prev_hash TEXT NOT NULL,
+            chain_hash TEXT NOT NULL,       -- sha256(prev_hash + file_sha256)
+            records INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            first_created_at TEXT,
+            last_created_at TEXT,
+            sealed_at TEXT NOT NULL
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archive_index (
+            receipt_id TEXT PRIMARY KEY,
+            answer_id TEXT NOT NULL,
+            segment INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            block_offset INTEGER NOT NULL,
+            block_length INTEGER NOT NULL
+        )
+        """
+    )
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_archive_index_answer ON archive_index(answer_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sovereign_answers_created ON sovereign_answers(created_at)")
+
+def _migrate_v5(cur: sqlite3.Cursor) -> None:
+    # Rolling summary of the older turns of an assistant thread (one per answer_id)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS assistant_summaries (
+            answer_id TEXT PRIMARY KEY,
+            summary TEXT NOT NULL,
+            covered_through_id INTEGER NOT NULL,  -- last assistant_messages.id folded into the summary
+            model_id TEXT,
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
+
+def _migrate_v6(cur: sqlite3.Cursor) -> None:
+    # audit_index.model_id held the routing label ("stack-routed"); re-derive the answering model
+    cur.execute(
+        f"""
+        UPDATE audit_index SET model_id = COALESCE((
+            SELECT {_ANSWERING_MODEL_SQL} FROM sovereign_answers
+            WHERE sovereign_answers.receipt_id = audit_index.receipt_id
+              AND typeof(audit_receipt) = 'text' AND json_valid(audit_receipt)
+        ), model_id)
+        """
+    )
+    # Codec BLOB rows, and TEXT rows whose "calls" moved to receipt_blobs, are decoded here
+    ensure_blob_table(cur.connection)
+    for receipt_id, stored in cur.execute(
+        f"SELECT receipt_id, audit_receipt FROM sovereign_answers WHERE typeof(audit_receipt) = 'blob' OR instr(audit_receipt, '\"{BLOB_REF}\"') > 0"
+    ).fetchall():
+        audit = unpack_audit(cur.connection, stored) or {}
+        cur.execute("UPDATE audit_index SET model_id = ? WHERE receipt_id = ?", (_answering_model(audit, audit.get("model_id")), receipt_id))
+
+_MIGRATIONS = [(1, _migrate_v1), (2, _migrate_v2), (3, _migrate_v3), (4, _migrate_v4), (5, _migrate_v5), (6, _migrate_v6)]
+
+def _create_schema(cur: sqlite3.Cursor) -> None:
     # Base table
     cur.execute(
         """
@@ -64,11 +349,28 @@ def init_db() -> None:
         )
         """
     )
+    # Ollama continuation handles for assistant threads (one per answer_id)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS assistant_contexts (
+            answer_id TEXT PRIMARY KEY,
+            model_id TEXT NOT NULL,
+            context TEXT NOT NULL,          -- JSON array of Ollama context tokens
+            last_message_id INTEGER NOT NULL,  -- assistant_messages.id the context ends with
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
     # Migration: ensure audit_receipt column exists (older schema compatibility)
     if not _column_exists(cur, "sovereign_answers", "audit_receipt"):
         cur.execute("ALTER TABLE sovereign_answers ADD COLUMN audit_receipt TEXT")
-    conn.commit()
-    conn.close()
+    ensure_index(cur.connection)
+    (version,) = cur.execute("PRAGMA user_version").fetchone()
+    for target, migrate in _MIGRATIONS:
+        if version < target:
+            migrate(cur)
+            version = target
+    cur.execute(f"PRAGMA user_version={version}")
 
 def write_receipt_json(receipt: SovereignReceipt) -> Path:
     path = RECEIPTS_DIR / f"{receipt.receipt_id}.json"
@@ -76,17 +378,15 @@ def write_receipt_json(receipt: SovereignReceipt) -> Path:
         json.dump(asdict(receipt), f, indent=2, ensure_ascii=False)
     return path
 
-def store_answer_and_receipt(
+def _insert_answer(
+    cur: sqlite3.Cursor,
     receipt: SovereignReceipt,
     question: str,
     raw_answer: str,
-    explained_answer: Optional[str] = None,
-    audit_receipt: Optional[Dict[str, Any]] = None,
+    explained_answer: Optional[str],
+    audit_receipt: Optional[Dict[str, Any]],
 ) -> None:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
     now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-    audit_json = json.dumps(audit_receipt, ensure_ascii=False) if audit_receipt is not None else None
     cur.execute(
         """
         INSERT OR REPLACE INTO sovereign_answers
@@ -97,26 +397,171 @@ def store_answer_and_receipt(
             receipt.answer_id,
             receipt.receipt_id,
             question,
-            raw_answer,
-            explained_answer,
-            audit_json,
+            encode(raw_answer, CODEC_CONFIG),
+            encode(explained_answer, CODEC_CONFIG),
+            pack_audit(cur.connection, audit_receipt, CODEC_CONFIG),
             now,
         ),
     )
-    conn.commit()
-    conn.close()
-
-def store_assistant_message(answer_id: str, receipt_id: str, role: str, message: str) -> None:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    audit = audit_receipt or {}
     cur.execute(
-        """
-        INSERT INTO assistant_messages
-            (answer_id, receipt_id, role, message, created_at)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (answer_id, receipt_id, role, message, now),
+        f"INSERT OR REPLACE INTO audit_index ({', '.join(AUDIT_FACTS)}) VALUES ({', '.join('?' * len(AUDIT_FACTS))})",
+        (
+            receipt.receipt_id,
+            receipt.answer_id,
+            _answering_model(audit, receipt.model_id),
+            receipt.policy_version,
+            receipt.mode,
+            audit.get("arbiter_status"),
+            _flag((audit.get("validator") or {}).get("policy_ok")),
+            int(bool(receipt.drift_detected)),
+            int(bool(receipt.reused)),
+            receipt.timestamp,
+        ),
     )
-    conn.commit()
-    conn.close()
+
+def store_answer_and_receipt(
+    receipt: SovereignReceipt,
+    question: str,
+    raw_answer: str,
+    explained_answer: Optional[str] = None,
+    audit_receipt: Optional[Dict[str, Any]] = None,
+) -> None:
+    with get_receipt_store().transaction() as conn:
+        _insert_answer(conn.cursor(), receipt, question, raw_answer, explained_answer, audit_receipt)
+
+def receipt_path(receipt_id: str) -> Path:
+    """Where receipts were written before the segmented log (still read as a fallback)."""
+    return RECEIPTS_DIR / f"{receipt_id}.json"
+
+ReceiptRecord = Tuple[SovereignReceipt, Dict[str, Any], str, str, Optional[str]]  # receipt, audit, question, raw, explained
+
+def persist_receipts(
+    records: Sequence[ReceiptRecord],
+    fsync: bool = False,
+    conn: Optional[sqlite3.Connection] = None,
+    timings: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> List[str]:
+    """Append enriched receipts to the receipt log and commit their answer and index rows in one transaction.
+
+    Returns one "<segment path>#<offset>" locator per record. Readers only find a receipt
+    through its committed index row, so a failed insert leaves unreachable bytes, never a
+    partial receipt. `timings`, if given, receives {"receipt_write": ..., "db_store": ...}
+    as (perf_start, ms).
+    """
+    log = get_receipt_log()
+    t_write = time.perf_counter()
+    with log.append([(rec.receipt_id, audit) for rec, audit, *_ in records], fsync) as entries:
+        t_db = time.perf_counter()
+        with (get_receipt_store().transaction() if conn is None else conn) as tx:
+            cur = tx.cursor()
+            for rec, audit, question, raw_answer, explained_answer in records:
+                _insert_answer(cur, rec, question, raw_answer, explained_answer, audit)
+            log.index(cur, entries)
+        db_ms = (time.perf_counter() - t_db) * 1000
+    if timings is not None:
+        timings["receipt_write"] = (t_write, (t_db - t_write) * 1000)
+        timings["db_store"] = (t_db, db_ms)
+    return [log.locator(e) for e in entries]
+
+def persist_receipt(
+    receipt: SovereignReceipt,
+    audit_receipt: Dict[str, Any],
+    question: str,
+    raw_answer: str,
+    explained_answer: Optional[str] = None,
+    fsync: bool = False,
+    timings: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> str:
+    """Append the enriched receipt and commit its sovereign_answers row in one pass."""
+    return persist_receipts([(receipt, audit_receipt, question, raw_answer, explained_answer)], fsync, timings=timings)[0]
+
+def load_receipt(receipt_id: str) -> Optional[Dict[str, Any]]:
+    """Enriched receipt by id: the receipt log, a legacy JSON file, the audit_receipt stored with the answer, then the archive."""
+    found = get_receipt_log().read(receipt_id)
+    if found is not None:
+        return found
+    try:
+        return json.loads(receipt_path(receipt_id).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        pass
+    store = get_receipt_store()
+    row = store.execute("SELECT audit_receipt FROM sovereign_answers WHERE receipt_id = ?", (receipt_id,)).fetchone()
+    if row:
+        return unpack_audit(store.connection(), row[0])
+    from .retention import load_archived
+
+    archived = load_archived(receipt_id=receipt_id)
+    return archived["receipt"] if archived else None
+
+def load_answer(answer_id: str) -> Optional[Dict[str, Any]]:
+    row = get_receipt_store().execute(
+        "SELECT answer_id, receipt_id, question, raw_answer, explained_answer, created_at FROM sovereign_answers WHERE answer_id = ?",
+        (answer_id,),
+    ).fetchone()
+    if row is None:
+        from .retention import load_archived
+
+        archived = load_archived(answer_id=answer_id)
+        return archived["answer"] if archived else None
+    keys = ("answer_id", "receipt_id", "question", "raw_answer", "explained_answer", "created_at")
+    return dict(zip(keys, (*row[:3], decode(row[3]), decode(row[4]), row[5])))
+
+def store_assistant_message(answer_id: str, receipt_id: str, role: str, message: str, created_at: Optional[str] = None) -> int:
+    now = created_at or time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    with get_receipt_store().transaction() as conn:
+        cur = conn.execute(
+            """
+            INSERT INTO assistant_messages
+                (answer_id, receipt_id, role, message, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (answer_id, receipt_id, role, message, now),
+        )
+    return cur.lastrowid
+
+def store_assistant_context(answer_id: str, model_id: str, context: List[int], last_message_id: int) -> None:
+    now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    with get_receipt_store().transaction() as conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO assistant_contexts
+                (answer_id, model_id, context, last_message_id, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (answer_id, model_id, json.dumps(context), last_message_id, now),
+        )
+
+def load_assistant_context(answer_id: str) -> Optional[Dict[str, Any]]:
+    row = get_receipt_store().execute(
+        "SELECT model_id, context, last_message_id FROM assistant_contexts WHERE answer_id = ?",
+        (answer_id,),
+    ).fetchone()
+    if row is None:
+        return None
+    return {"model_id": row[0], "context": json.loads(row[1]), "last_message_id": row[2]}
+
+def clear_assistant_context(answer_id: str) -> None:
+    with get_receipt_store().transaction() as conn:
+        conn.execute("DELETE FROM assistant_contexts WHERE answer_id = ?", (answer_id,))
+
+def store_thread_summary(answer_id: str, summary: str, covered_through_id: int, model_id: Optional[str] = None) -> None:
+    now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    with get_receipt_store().transaction() as conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO assistant_summaries
+                (answer_id, summary, covered_through_id, model_id, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (answer_id, summary, covered_through_id, model_id, now),
+        )
+
+def load_thread_summary(answer_id: str) -> Optional[Dict[str, Any]]:
+    row = get_receipt_store().execute(
+        "SELECT summary, covered_through_id, model_id, updated_at FROM assistant_summaries WHERE answer_id = ?",
+        (answer_id,),
+    ).fetchone()
+    if row is None:
+        return None
+    return {"summary": row[0], "covered_through_id": row[1], "model_id": row[2], "updated_at": row[3]}
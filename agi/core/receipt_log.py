@@ -0,0 +1,409 @@
+# agi/core/receipt_log.py
+"""Segmented append-only receipt log (v0.1c).
+Enriched receipts are appended as compact JSON lines to rolling segment files
+(segment-000001.log, ...) instead of one file per receipt. An index table
+(receipt_id -> segment, offset, length) in the receipt database is committed in the
+same transaction as the answer row, so a lookup is one primary-key probe plus one read.
+Sealed segments can be rewritten as zlib blocks (segment-000001.zlog); the index then
+also records which block holds the receipt.
+
+    python -m agi.core.receipt_log migrate [--keep]   # pack legacy {receipt_id}.json files
+    python -m agi.core.receipt_log compact            # compress sealed segments
+    python -m agi.core.receipt_log stats
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: segments stay per-writer, but sealing is only tracked in-process
+    fcntl = None  # type: ignore[assignment]
+
+SEGMENT_RE = re.compile(r"^segment-(\d{6})\.(log|zlog)$")
+INDEX_TABLE = "receipt_log_index"
+
+@dataclass
+class ReceiptLogConfig:
+    segment_max_bytes: int = 64 * 1024 * 1024
+    compress_sealed: bool = True          # compress a segment in the background once it is sealed
+    block_bytes: int = 64 * 1024          # uncompressed bytes per zlib block in a sealed segment
+    compress_level: int = 6
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "ReceiptLogConfig":
+        data = data or {}
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+LogEntry = Tuple[str, int, int, int]  # receipt_id, segment, offset, length
+DIR_LOCK = ".segment-dir.lock"
+
+def _flock(fh: Any, blocking: bool = True) -> bool:
+    """Exclusive advisory lock on `fh` (held until it is closed); False if busy and not blocking."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        return False
+    return True
+
+def ensure_index(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {INDEX_TABLE} (
+            receipt_id TEXT PRIMARY KEY,
+            segment INTEGER NOT NULL,
+            offset INTEGER NOT NULL,        -- byte offset in the raw segment, or inside the block
+            length INTEGER NOT NULL,
+            block_offset INTEGER,           -- NULL until the segment is compressed
+            block_length INTEGER
+        )
+        """
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{INDEX_TABLE}_segment ON {INDEX_TABLE}(segment)")
+
+def fsync_dir(path: Path) -> None:
+    """Make renames in `path` durable (no-op where directories cannot be opened, e.g. Windows)."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+PackedEntry = Tuple[int, int, int, int]  # offset inside block, block_offset, block_length, length
+
+def pack_blocks(fh: Any, payloads: Sequence[bytes], block_bytes: int, level: int = 6) -> List[PackedEntry]:
+    """Write `payloads` to `fh` as independent zlib blocks of about `block_bytes` each."""
+    out: List[PackedEntry] = []
+    i = 0
+    while i < len(payloads):
+        block, members = bytearray(), []
+        while i < len(payloads) and (not block or len(block) < block_bytes):
+            members.append((len(block), len(payloads[i])))
+            block += payloads[i] + b"\n"
+            i += 1
+        packed = zlib.compress(bytes(block), level)
+        start = fh.tell()
+        fh.write(packed)
+        out.extend((inner, start, len(packed), length) for inner, length in members)
+    return out
+
+def read_packed(path: Path, block_offset: int, block_length: int, offset: int, length: int) -> bytes:
+    """One payload written by `pack_blocks`: a seek, one block read and one decompress."""
+    with open(path, "rb") as f:
+        f.seek(block_offset)
+        return zlib.decompress(f.read(block_length))[offset:offset + length]
+
+class ReceiptLog:
+    """Append-only segment files under `root`; `connect` returns a connection to the index database.
+
+    Every writer (each ReceiptLog instance, in any process) appends only to segments it
+    created itself and holds an exclusive flock on its active segment, so offsets never
+    interleave. A raw segment counts as sealed once no writer holds its lock; only sealed
+    segments are compressed or dropped.
+    """
+
+    def __init__(self, root: Path, connect: Callable[[], sqlite3.Connection], config: Optional[ReceiptLogConfig] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.config = config or ReceiptLogConfig()
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._inflight = threading.Condition(self._lock)
+        self._pending: Dict[int, int] = {}      # segment -> appended batches not yet committed
+        self._held: Dict[int, Any] = {}         # rolled segments kept locked until their batches commit
+        self._compressing: set = set()
+        self._active: Optional[int] = None
+        self._fh = None
+        self.compressed = 0
+
+    # -- paths --------------------------------------------------------------
+    def segment_path(self, segment: int, compressed: bool = False) -> Path:
+        return self.root / f"segment-{segment:06d}.{'zlog' if compressed else 'log'}"
+
+    def segments(self) -> Dict[int, Path]:
+        """segment number -> current file (the .zlog once compressed)."""
+        found: Dict[int, Path] = {}
+        for p in self.root.iterdir():
+            m = SEGMENT_RE.match(p.name)
+            if m and (m.group(2) == "zlog" or int(m.group(1)) not in found):
+                found[int(m.group(1))] = p
+        return dict(sorted(found.items()))
+
+    def locator(self, entry: LogEntry) -> str:
+        return f"{self.segment_path(entry[1])}#{entry[2]}"
+
+    # -- ownership ------------------------------------------------------------
+    @contextmanager
+    def _dir_lock(self) -> Iterator[None]:
+        """Serialises segment creation against claiming, across processes."""
+        with open(self.root / DIR_LOCK, "ab") as fh:
+            _flock(fh)
+            yield
+
+    def _claim(self, segment: int) -> Optional[Any]:
+        """Lock a raw segment no writer owns any more; None while one does (or it is gone)."""
+        with self._dir_lock():
+            try:
+                fh = open(self.segment_path(segment), "rb")
+            except FileNotFoundError:
+                return None
+            if not _flock(fh, blocking=False) or os.fstat(fh.fileno()).st_nlink == 0:
+                fh.close()  # still being written, or compressed and unlinked meanwhile
+                return None
+        return fh
+
+    # -- append ---------------------------------------------------------------
+    def _open_active(self) -> None:
+        """Create a fresh segment owned by this writer (never reopens an existing one)."""
+        if self._fh is not None:
+            return
+        with self._dir_lock():
+            segment = max(self.segments(), default=0) + 1
+            while True:
+                try:
+                    fd = os.open(self.segment_path(segment), os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+                    break
+                except FileExistsError:
+                    segment += 1
+            self._fh = os.fdopen(fd, "ab")
+            _flock(self._fh)
+        self._active = segment
+
+    def _roll(self) -> None:
+        sealed, fh = self._active, self._fh
+        self._fh = self._active = None
+        if self._pending.get(sealed):  # type: ignore[arg-type]
+            self._held[sealed] = fh  # type: ignore[index]
+        else:
+            fh.close()
+        if self.config.compress_sealed:
+            threading.Thread(target=self.compress_segment, args=(sealed,), name="receipt-log-compress", daemon=True).start()
+
+    @contextmanager
+    def append(self, records: Sequence[Tuple[str, Dict[str, Any]]], fsync: bool = False) -> Iterator[List[LogEntry]]:
+        """Append (receipt_id, receipt) records; yields their log entries for the caller to index.
+
+        Commit the entries (see `index`) inside the block: a segment stays locked, and so
+        is not compressed by any process, until every batch appended to it has left its
+        `append` block, so no index row can point at a raw segment that has already been
+        rewritten. Bytes whose index rows never commit are orphans, skipped by compression.
+        """
+        entries: List[LogEntry] = []
+        with self._lock:
+            self._open_active()
+            if self._fh.tell() >= self.config.segment_max_bytes:
+                self._roll()
+                self._open_active()
+            new_file = self._fh.tell() == 0
+            offset = self._fh.tell()
+            chunks = []
+            for receipt_id, data in records:
+                blob = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                entries.append((receipt_id, self._active, offset, len(blob)))  # type: ignore[arg-type]
+                chunks.append(blob + b"\n")
+                offset += len(blob) + 1
+            self._fh.write(b"".join(chunks))
+            self._fh.flush()
+            if fsync:
+                os.fsync(self._fh.fileno())
+                if new_file:
+                    fsync_dir(self.root)
+            segment = self._active
+            self._pending[segment] = self._pending.get(segment, 0) + 1  # type: ignore[index]
+        try:
+            yield entries
+        finally:
+            with self._lock:
+                self._pending[segment] -= 1  # type: ignore[index]
+                if not self._pending[segment] and segment in self._held:
+                    self._held.pop(segment).close()
+                self._inflight.notify_all()
+
+    @staticmethod
+    def index(cur: sqlite3.Cursor, entries: Sequence[LogEntry]) -> None:
+        cur.executemany(
+            f"INSERT OR REPLACE INTO {INDEX_TABLE} (receipt_id, segment, offset, length, block_offset, block_length) VALUES (?, ?, ?, ?, NULL, NULL)",
+            entries,
+        )
+
+    # -- read -----------------------------------------------------------------
+    def read(self, receipt_id: str) -> Optional[Dict[str, Any]]:
+        """The receipt from the log, or None if it is not indexed."""
+        for _ in range(2):  # a concurrent compression may move the receipt between probe and read
+            try:
+                row = self._connect().execute(
+                    f"SELECT segment, offset, length, block_offset, block_length FROM {INDEX_TABLE} WHERE receipt_id = ?",
+                    (receipt_id,),
+                ).fetchone()
+            except sqlite3.OperationalError:  # index table not created yet
+                return None
+            if row is None:
+                return None
+            segment, offset, length, block_offset, block_length = row
+            try:
+                if block_offset is None:
+                    with open(self.segment_path(segment), "rb") as f:
+                        f.seek(offset)
+                        blob = f.read(length)
+                else:
+                    blob = read_packed(self.segment_path(segment, compressed=True), block_offset, block_length, offset, length)
+            except FileNotFoundError:
+                continue
+            return json.loads(blob)
+        return None
+
+    # -- sealed segments ----------------------------------------------------------
+    def compress_segment(self, segment: int) -> bool:
+        """Rewrite a sealed segment as zlib blocks and repoint its index rows; False if skipped."""
+        with self._lock:
+            if segment == self._active or segment in self._compressing or not self.segment_path(segment).exists():
+                return False
+            self._compressing.add(segment)
+            while self._pending.get(segment):
+                self._inflight.wait()
+        try:
+            fh = self._claim(segment)
+            if fh is None:
+                return False
+            try:
+                return self._compress(segment)
+            finally:
+                fh.close()
+        finally:
+            with self._lock:
+                self._compressing.discard(segment)
+
+    def _compress(self, segment: int) -> bool:
+        raw_path, out_path = self.segment_path(segment), self.segment_path(segment, compressed=True)
+        conn = self._connect()
+        rows = conn.execute(
+            f"SELECT receipt_id, offset, length FROM {INDEX_TABLE} WHERE segment = ? AND block_offset IS NULL ORDER BY offset",
+            (segment,),
+        ).fetchall()
+        data = raw_path.read_bytes()
+        tmp = out_path.with_name(f".{out_path.name}.tmp")
+        with tmp.open("wb") as f:
+            packed = pack_blocks(f, [data[offset:offset + length] for _, offset, length in rows], self.config.block_bytes, self.config.compress_level)
+            f.flush()
+            os.fsync(f.fileno())
+        updates = [(inner, start, size, rid) for (rid, _, _), (inner, start, size, _) in zip(rows, packed)]
+        os.replace(tmp, out_path)
+        fsync_dir(self.root)
+        with conn:
+            conn.executemany(
+                f"UPDATE {INDEX_TABLE} SET offset = ?, block_offset = ?, block_length = ? WHERE receipt_id = ?",
+                updates,
+            )
+        raw_path.unlink()
+        self.compressed += 1
+        return True
+
+    def compact(self) -> int:
+        """Compress every sealed raw segment; returns how many were compressed."""
+        return sum(self.compress_segment(n) for n, p in self.segments().items() if p.suffix == ".log" and n != self._active)
+
+    def drop_drained_segments(self) -> int:
+        """Delete sealed segments none of whose receipts are indexed any more (e.g. archived)."""
+        with self._lock:
+            busy = set(self._compressing) | set(self._held) | {n for n, c in self._pending.items() if c} | {self._active}
+        conn, dropped = self._connect(), 0
+        for n, path in self.segments().items():
+            if n in busy or conn.execute(f"SELECT 1 FROM {INDEX_TABLE} WHERE segment = ? LIMIT 1", (n,)).fetchone():
+                continue
+            if path.suffix == ".zlog":
+                path.unlink(missing_ok=True)
+                dropped += 1
+                continue
+            fh = self._claim(n)
+            if fh is None:
+                continue
+            try:
+                path.unlink(missing_ok=True)
+                dropped += 1
+            finally:
+                fh.close()
+        return dropped
+
+    def close(self) -> None:
+        """Release this writer's segments; they are sealed from here on."""
+        with self._lock:
+            for fh in [self._fh, *self._held.values()]:
+                if fh is not None:
+                    fh.close()
+            self._fh, self._active = None, None
+            self._held.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        segs = self.segments()
+        (indexed,) = self._connect().execute(f"SELECT COUNT(*) FROM {INDEX_TABLE}").fetchone()
+        return {
+            "root": str(self.root),
+            "segments": len(segs),
+            "compressed_segments": sum(p.suffix == ".zlog" for p in segs.values()),
+            "bytes": sum(p.stat().st_size for p in segs.values()),
+            "indexed": indexed,
+            "active_segment": self._active,
+        }
+
+def migrate(log: ReceiptLog, legacy_dir: Path, keep: bool = False, batch: int = 1000) -> Dict[str, int]:
+    """Pack legacy `{receipt_id}.json` files in `legacy_dir` into `log`; removes them unless `keep`."""
+    conn = log._connect()
+    ensure_index(conn)
+    files = sorted(p for p in Path(legacy_dir).glob("*.json") if not p.name.startswith("."))
+    packed = skipped = 0
+    for i in range(0, len(files), batch):
+        chunk = files[i:i + batch]
+        known = {r[0] for r in conn.execute(
+            f"SELECT receipt_id FROM {INDEX_TABLE} WHERE receipt_id IN ({','.join('?' * len(chunk))})",
+            [p.stem for p in chunk],
+        )}
+        records = [(p.stem, json.loads(p.read_text(encoding="utf-8"))) for p in chunk if p.stem not in known]
+        skipped += len(chunk) - len(records)
+        if records:
+            with log.append(records, fsync=True) as entries, conn:
+                log.index(conn.cursor(), entries)
+            packed += len(records)
+        if not keep:
+            for p in chunk:
+                p.unlink()
+    return {"packed": packed, "already_indexed": skipped, "removed": 0 if keep else len(files)}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from . import receipt
+
+    ap = argparse.ArgumentParser(prog="python -m agi.core.receipt_log", description="Manage the segmented receipt log.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    mig = sub.add_parser("migrate", help="pack legacy per-receipt JSON files into the log")
+    mig.add_argument("--keep", action="store_true", help="leave the JSON files in place")
+    sub.add_parser("compact", help="compress sealed segments")
+    sub.add_parser("stats")
+    args = ap.parse_args(argv)
+    receipt.init_db()
+    log = receipt.get_receipt_log()
+    if args.cmd == "migrate":
+        out: Dict[str, Any] = migrate(log, receipt.RECEIPTS_DIR, keep=args.keep)
+    elif args.cmd == "compact":
+        out = {"compressed": log.compact()}
+    else:
+        out = log.stats()
+    print(json.dumps(out, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
+
+__all__ = ["ReceiptLogConfig", "ReceiptLog", "LogEntry", "ensure_index", "fsync_dir", "migrate", "pack_blocks", "read_packed", "INDEX_TABLE"]
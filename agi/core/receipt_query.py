@@ -0,0 +1,152 @@
+# agi/core/receipt_query.py
+"""Governance queries over the audit_index facts table (v0.1c).
+Filters map onto indexed columns, results come newest first, and pages are chained with
+an opaque keyset cursor, so a report over months of answers never parses audit JSON.
+
+    python -m agi.core.receipt_query --policy-version v0.1c --arbiter-status REFUSED --since 2025-11-01
+    python -m agi.core.receipt_query --drift --count
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from . import receipt
+
+EQUALITY_FILTERS = ("receipt_id", "answer_id", "model_id", "policy_version", "mode", "arbiter_status")
+BOOLEAN_FILTERS = ("policy_ok", "drift_detected", "reused")
+MAX_LIMIT = 1000
+
+TimeBound = Union[int, float, str]
+
+def _epoch(value: TimeBound) -> int:
+    """Unix seconds from a number or an ISO-8601 date/datetime (UTC unless it has an offset)."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+def _encode_cursor(ts: int, receipt_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([ts, receipt_id]).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> Tuple[int, str]:
+    try:
+        ts, receipt_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return int(ts), str(receipt_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'") from e
+
+def _where(filters: Optional[Dict[str, Any]]) -> Tuple[List[str], List[Any]]:
+    clauses: List[str] = []
+    params: List[Any] = []
+    for key, value in (filters or {}).items():
+        if value is None:
+            continue
+        if key in EQUALITY_FILTERS:
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            clauses.append(f"{key} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        elif key in BOOLEAN_FILTERS:
+            clauses.append(f"{key} = ?")
+            params.append(int(bool(value)))
+        elif key == "since":
+            clauses.append("timestamp >= ?")
+            params.append(_epoch(value))
+        elif key == "until":
+            clauses.append("timestamp < ?")
+            params.append(_epoch(value))
+        else:
+            raise ValueError(f"Unknown receipt filter '{key}'")
+    return clauses, params
+
+def query_receipts(
+    filters: Optional[Dict[str, Any]] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    full: bool = False,
+) -> Dict[str, Any]:
+    """One page of receipt facts matching `filters`, newest first.
+
+    Filters: receipt_id, answer_id, model_id, policy_version, mode, arbiter_status (value or
+    list of values); policy_ok, drift_detected, reused (bool); since/until (unix seconds or
+    ISO date, `until` exclusive). Pass the returned `next_cursor` back to get the next page.
+    With `full`, each item also carries the enriched receipt under "receipt".
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    clauses, params = _where(filters)
+    if cursor:
+        ts, receipt_id = _decode_cursor(cursor)
+        clauses.append("(timestamp < ? OR (timestamp = ? AND receipt_id < ?))")
+        params.extend([ts, ts, receipt_id])
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = receipt.get_receipt_store().execute(
+        f"SELECT {', '.join(receipt.AUDIT_FACTS)} FROM audit_index {where} ORDER BY timestamp DESC, receipt_id DESC LIMIT ?",
+        (*params, limit + 1),
+    ).fetchall()
+    items = []
+    for row in rows[:limit]:
+        item = dict(zip(receipt.AUDIT_FACTS, row))
+        for key in BOOLEAN_FILTERS:
+            if item[key] is not None:
+                item[key] = bool(item[key])
+        if full:
+            item["receipt"] = receipt.load_receipt(item["receipt_id"])
+        items.append(item)
+    next_cursor = _encode_cursor(items[-1]["timestamp"], items[-1]["receipt_id"]) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+def count_receipts(filters: Optional[Dict[str, Any]] = None, group_by: Optional[str] = None) -> Dict[str, int]:
+    """Number of matching receipts, optionally per value of one indexed column."""
+    clauses, params = _where(filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    store = receipt.get_receipt_store()
+    if group_by is None:
+        (n,) = store.execute(f"SELECT COUNT(*) FROM audit_index {where}", params).fetchone()
+        return {"total": n}
+    if group_by not in EQUALITY_FILTERS + BOOLEAN_FILTERS:
+        raise ValueError(f"Cannot group receipts by '{group_by}'")
+    rows = store.execute(f"SELECT {group_by}, COUNT(*) FROM audit_index {where} GROUP BY {group_by}", params).fetchall()
+    return {str(k): n for k, n in rows}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m agi.core.receipt_query", description="Query sovereign audit receipts.")
+    for key in EQUALITY_FILTERS:
+        ap.add_argument(f"--{key.replace('_', '-')}", action="append", help="repeatable")
+    ap.add_argument("--policy-ok", dest="policy_ok", action="store_true", default=None)
+    ap.add_argument("--policy-violation", dest="policy_ok", action="store_false")
+    ap.add_argument("--drift", dest="drift_detected", action="store_true", default=None)
+    ap.add_argument("--no-drift", dest="drift_detected", action="store_false")
+    ap.add_argument("--reused", dest="reused", action="store_true", default=None)
+    ap.add_argument("--since", help="unix seconds or ISO date (inclusive)")
+    ap.add_argument("--until", help="unix seconds or ISO date (exclusive)")
+    ap.add_argument("--last-days", type=float, help="shorthand for --since now-N days")
+    ap.add_argument("--limit", type=int, default=100)
+    ap.add_argument("--cursor")
+    ap.add_argument("--full", action="store_true", help="include the enriched receipts")
+    ap.add_argument("--count", action="store_true", help="print counts instead of rows")
+    ap.add_argument("--group-by")
+    args = ap.parse_args(argv)
+    filters: Dict[str, Any] = {k: getattr(args, k) for k in EQUALITY_FILTERS + BOOLEAN_FILTERS}
+    for key in ("since", "until"):
+        value = getattr(args, key)
+        filters[key] = int(value) if value and value.isdigit() else value
+    if args.last_days is not None:
+        filters["since"] = int(time.time() - args.last_days * 86400)
+    receipt.init_db()
+    if args.count or args.group_by:
+        out: Dict[str, Any] = count_receipts(filters, args.group_by)
+    else:
+        out = query_receipts(filters, args.limit, args.cursor, args.full)
+    print(json.dumps(out, indent=2, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
+
+__all__ = ["query_receipts", "count_receipts", "EQUALITY_FILTERS", "BOOLEAN_FILTERS"]
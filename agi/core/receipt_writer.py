@@ -0,0 +1,171 @@
+# agi/core/receipt_writer.py
+"""Background group-commit writer for triad receipts (v0.1c).
+Receipts submitted from many threads are written by one thread, several per SQLite
+transaction. Durability levels:
+  "receipt" - each receipt is fsynced and committed on its own before it is acknowledged
+  "batch"   - files of a batch are fsynced, then one commit covers the whole batch
+  "none"    - no fsync (SQLite synchronous=OFF); submitters are not made to wait
+"""
+from __future__ import annotations
+
+import atexit
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import receipt as _receipt
+from .receipt import SovereignReceipt
+from .tracing import STAGE_HISTOGRAM, get_histograms
+
+DURABILITY_LEVELS = ("receipt", "batch", "none")
+
+@dataclass
+class WriterConfig:
+    durability: str = "batch"
+    max_batch: int = 64
+    max_delay_ms: float = 5.0   # how long the writer waits to fill a batch
+
+    def __post_init__(self) -> None:
+        if self.durability not in DURABILITY_LEVELS:
+            raise ValueError(f"durability must be one of {DURABILITY_LEVELS}, got '{self.durability}'")
+
+@dataclass
+class _Job:
+    receipt: SovereignReceipt
+    audit_receipt: Dict[str, Any]
+    question: str
+    raw_answer: str
+    explained_answer: Optional[str]
+    future: Future
+
+class ReceiptWriter:
+    def __init__(self, config: Optional[WriterConfig] = None):
+        self.config = config or WriterConfig()
+        self.batches = 0
+        self.written = 0
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_path: Optional[Path] = None
+        self._thread = threading.Thread(target=self._run, name="receipt-writer", daemon=True)
+        self._closed = False
+        self._thread.start()
+
+    @property
+    def waits(self) -> bool:
+        """Whether submitters should block until their receipt is durable."""
+        return self.config.durability != "none"
+
+    def submit(
+        self,
+        receipt: SovereignReceipt,
+        audit_receipt: Dict[str, Any],
+        question: str,
+        raw_answer: str,
+        explained_answer: Optional[str] = None,
+    ) -> Future:
+        """Queue one receipt; the future resolves to its receipt-log locator once it is committed."""
+        if self._closed:
+            raise RuntimeError("ReceiptWriter is closed")
+        fut: Future = Future()
+        self._queue.put(_Job(receipt, audit_receipt, question, raw_answer, explained_answer, fut))
+        return fut
+
+    def flush(self) -> None:
+        """Block until everything submitted so far is committed."""
+        fut: Future = Future()
+        self._queue.put(_Job(None, {}, "", "", None, fut))  # type: ignore[arg-type]
+        fut.result()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"durability": self.config.durability, "batches": self.batches, "written": self.written, "queued": self._queue.qsize()}
+
+    # -- writer thread ----------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._conn_path != _receipt.DB_PATH:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn_path = _receipt.DB_PATH
+            self._conn = _receipt.get_receipt_store(self._conn_path).open()
+            sync = {"receipt": "FULL", "batch": "FULL", "none": "OFF"}[self.config.durability]
+            self._conn.execute(f"PRAGMA synchronous={sync}")
+        return self._conn
+
+    def _next_batch(self) -> Tuple[List[_Job], bool]:
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        limit = 1 if self.config.durability == "receipt" else self.config.max_batch
+        timeout = self.config.max_delay_ms / 1000
+        while len(batch) < limit:
+            try:
+                job = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if job is None:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            if batch:
+                self._write(batch)
+        if self._conn is not None:
+            self._conn.close()
+
+    def _write(self, batch: List[_Job]) -> None:
+        records = [(j.receipt, j.audit_receipt, j.question, j.raw_answer, j.explained_answer) for j in batch if j.receipt is not None]
+        timings: Dict[str, Tuple[float, float]] = {}
+        try:
+            locators = iter(_receipt.persist_receipts(records, fsync=self.config.durability != "none", conn=self._connection(), timings=timings))
+        except BaseException as e:
+            for j in batch:
+                j.future.set_exception(e)
+            return
+        self.batches += 1
+        self.written += len(records)
+        for stage, (_, ms) in timings.items():
+            get_histograms().observe(STAGE_HISTOGRAM, ms, stage=f"{stage}_batch")
+        for j in batch:
+            j.future.set_result(next(locators) if j.receipt is not None else None)
+
+_WRITER: Optional[ReceiptWriter] = None
+_WRITER_LOCK = threading.Lock()
+
+def configure_receipt_writer(durability: str = "batch", max_batch: int = 64, max_delay_ms: float = 5.0) -> ReceiptWriter:
+    """Route run_triad persistence through a background group-commit writer."""
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is not None:
+            _WRITER.close()
+        _WRITER = ReceiptWriter(WriterConfig(durability, max_batch, max_delay_ms))
+        return _WRITER
+
+def get_receipt_writer() -> Optional[ReceiptWriter]:
+    """The configured writer, or None when receipts are persisted inline."""
+    return _WRITER
+
+def reset_receipt_writer() -> None:
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is not None:
+            _WRITER.close()
+        _WRITER = None
+
+atexit.register(reset_receipt_writer)  # drain queued receipts on interpreter exit
+
+__all__ = ["WriterConfig", "ReceiptWriter", "configure_receipt_writer", "get_receipt_writer", "reset_receipt_writer"]
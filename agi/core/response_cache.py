@@ -0,0 +1,155 @@
+# agi/core/response_cache.py
+"""Content-addressed response cache for deterministic model calls (v0.1c).
+Keys cover provider, model, prompt/system hashes, generation params and the stack
+policy_version; entries are evicted by TTL, then least-recently-used past the size cap.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+ROOT_DIR = Path(__file__).resolve().parent
+DEFAULT_CACHE_PATH = ROOT_DIR / "response_cache.sqlite"
+
+@dataclass
+class CacheConfig:
+    enabled: bool = False
+    path: str = str(DEFAULT_CACHE_PATH)
+    ttl_seconds: int = 7 * 24 * 3600
+    max_entries: int = 20000
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "CacheConfig":
+        data = data or {}
+        cfg = cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+        if not Path(cfg.path).is_absolute():
+            cfg.path = str(ROOT_DIR / cfg.path)
+        return cfg
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def make_cache_key(
+    provider: str,
+    model_id: str,
+    prompt: str,
+    system_prompt: Optional[str],
+    params: Dict[str, Any],
+    policy_version: Optional[str],
+) -> str:
+    material = {
+        "provider": provider,
+        "model_id": model_id,
+        "prompt_hash": _sha256(prompt),
+        "system_hash": _sha256(system_prompt or ""),
+        "params": params,
+        "policy_version": policy_version,
+    }
+    return _sha256(json.dumps(material, sort_keys=True, separators=(",", ":")))
+
+class ResponseCache:
+    def __init__(self, path: Path | str = DEFAULT_CACHE_PATH, ttl_seconds: int = 7 * 24 * 3600, max_entries: int = 20000):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS response_cache (
+                cache_key TEXT PRIMARY KEY,
+                receipt TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_last_access ON response_cache(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT receipt, created_at FROM response_cache WHERE cache_key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    self._conn.execute("DELETE FROM response_cache WHERE cache_key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE response_cache SET last_access = ?, hits = hits + 1 WHERE cache_key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key: str, receipt: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO response_cache (cache_key, receipt, created_at, last_access, hits)
+                VALUES (?, ?, ?, ?, 0)
+                """,
+                (key, json.dumps(receipt, ensure_ascii=False), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM response_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                """
+                DELETE FROM response_cache WHERE cache_key IN (
+                    SELECT cache_key FROM response_cache ORDER BY last_access ASC LIMIT ?
+                )
+                """,
+                (count - self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()
+        return {"entries": count, "hits": self.hits, "misses": self.misses, "max_entries": self.max_entries}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+_CACHE: ResponseCache | None = None
+_CACHE_LOCK = threading.Lock()
+
+def get_response_cache(config: Optional[Dict[str, Any]] = None) -> Optional[ResponseCache]:
+    """Process-wide cache built from the model_stack.yaml `response_cache:` block, or None if disabled."""
+    global _CACHE
+    cfg = CacheConfig.from_dict(config)
+    if not cfg.enabled:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ResponseCache(cfg.path, cfg.ttl_seconds, cfg.max_entries)
+    return _CACHE
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = cache
+
+__all__ = ["CacheConfig", "ResponseCache", "make_cache_key", "get_response_cache", "set_response_cache"]
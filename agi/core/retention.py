@@ -0,0 +1,300 @@
+# agi/core/retention.py
+"""Retention tiers for the receipt database (v0.1c).
+Answers older than `hot_days` (and whose assistant thread has been quiet as long) move out
+of SQLite into sealed archive segments under RECEIPTS_DIR/archive: zlib blocks holding the
+answer row, its enriched receipt and its thread, written read-only and hash chained through
+the archive_segments manifest. archive_index keeps one small row per archived receipt, so
+load_receipt / load_answer still find them, and audit_index facts stay in place for
+query_receipts. Compaction checkpoints the WAL, VACUUMs and ANALYZEs, and reports the bytes
+reclaimed.
+
+    python -m agi.core.retention run [--hot-days 90] [--dry-run]
+    python -m agi.core.retention compact
+    python -m agi.core.retention verify
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import receipt
+from .receipt_log import fsync_dir, pack_blocks, read_packed
+from .storage_codec import decode, drop_unreferenced_blobs, unpack_audit
+
+GENESIS_HASH = "0" * 64
+ARCHIVE_DIR: Optional[Path] = None  # default: RECEIPTS_DIR / "archive"
+
+@dataclass
+class RetentionConfig:
+    hot_days: float = 90.0
+    batch: int = 1000                   # answers per archive segment (and per write transaction)
+    block_bytes: int = 64 * 1024
+    compress_level: int = 9
+    interval_s: float = 24 * 3600.0     # RetentionScheduler period
+    compact: bool = True                # VACUUM/ANALYZE after a run that archived something
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "RetentionConfig":
+        data = data or {}
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+def archive_dir() -> Path:
+    return Path(ARCHIVE_DIR or receipt.RECEIPTS_DIR / "archive")
+
+def _iso(ts: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _chain(prev_hash: str, file_sha256: str) -> str:
+    return hashlib.sha256(f"{prev_hash}{file_sha256}".encode("ascii")).hexdigest()
+
+def _db_files_bytes() -> int:
+    path = Path(receipt.DB_PATH)
+    return sum(p.stat().st_size for p in (path, path.with_name(path.name + "-wal")) if p.exists())
+
+def _archive_record(conn: sqlite3.Connection, row: tuple) -> Dict[str, Any]:
+    answer_id, receipt_id, question, raw, explained, audit, created_at = row
+    enriched = receipt.get_receipt_log().read(receipt_id)
+    if enriched is None:
+        try:
+            enriched = json.loads(receipt.receipt_path(receipt_id).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            enriched = unpack_audit(conn, audit)
+    messages = conn.execute(
+        "SELECT id, role, message, created_at FROM assistant_messages WHERE answer_id = ? ORDER BY id", (answer_id,)
+    ).fetchall()
+    return {
+        "answer": {
+            "answer_id": answer_id,
+            "receipt_id": receipt_id,
+            "question": question,
+            "raw_answer": decode(raw),
+            "explained_answer": decode(explained),
+            "created_at": created_at,
+        },
+        "receipt": enriched,
+        "messages": [{"id": i, "role": r, "message": m, "created_at": c} for i, r, m, c in messages],
+    }
+
+def _archive_batch(conn: sqlite3.Connection, cutoff: str, config: RetentionConfig) -> Optional[Dict[str, Any]]:
+    """Archive up to `config.batch` cold answers in one write transaction; None when nothing is cold."""
+    rows = conn.execute(
+        """
+        SELECT a.answer_id, a.receipt_id, a.question, a.raw_answer, a.explained_answer, a.audit_receipt, a.created_at
+        FROM sovereign_answers a
+        WHERE a.created_at < ?
+          AND NOT EXISTS (SELECT 1 FROM assistant_messages m WHERE m.answer_id = a.answer_id AND m.created_at >= ?)
+        ORDER BY a.created_at, a.answer_id
+        LIMIT ?
+        """,
+        (cutoff, cutoff, config.batch),
+    ).fetchall()
+    if not rows:
+        return None
+    records = [_archive_record(conn, row) for row in rows]
+    prev = conn.execute("SELECT segment, chain_hash FROM archive_segments ORDER BY segment DESC LIMIT 1").fetchone()
+    segment, prev_hash = (prev[0] + 1, prev[1]) if prev else (1, GENESIS_HASH)
+    root = archive_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / f"archive-{segment:06d}.arc"
+    tmp = path.with_name(f".{path.name}.tmp")
+    with tmp.open("wb") as f:
+        payloads = [json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for r in records]
+        packed = pack_blocks(f, payloads, config.block_bytes, config.compress_level)
+        f.flush()
+        os.fsync(f.fileno())
+    os.chmod(tmp, 0o444)
+    os.replace(tmp, path)
+    fsync_dir(root)
+    file_sha = _file_sha256(path)
+    answer_ids = [(r["answer"]["answer_id"],) for r in records]
+    receipt_ids = [(r["answer"]["receipt_id"],) for r in records]
+    conn.execute(
+        "INSERT INTO archive_segments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (segment, path.name, file_sha, prev_hash, _chain(prev_hash, file_sha), len(records), path.stat().st_size,
+         rows[0][6], rows[-1][6], _iso(time.time())),
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO archive_index VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(r["answer"]["receipt_id"], r["answer"]["answer_id"], segment, inner, length, start, size)
+         for r, (inner, start, size, length) in zip(records, packed)],
+    )
+    conn.executemany("DELETE FROM assistant_messages WHERE answer_id = ?", answer_ids)
+    conn.executemany("DELETE FROM assistant_contexts WHERE answer_id = ?", answer_ids)
+    conn.executemany("DELETE FROM assistant_summaries WHERE answer_id = ?", answer_ids)
+    conn.executemany("DELETE FROM sovereign_answers WHERE answer_id = ?", answer_ids)
+    conn.executemany("DELETE FROM receipt_log_index WHERE receipt_id = ?", receipt_ids)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'answer_cache'").fetchone():
+        conn.executemany("DELETE FROM answer_cache WHERE answer_id = ?", answer_ids)
+    blobs_removed = drop_unreferenced_blobs(conn)  # the bulk of an audit receipt lives in receipt_blobs
+    return {
+        "segment": segment,
+        "path": path,
+        "answers": len(records),
+        "messages": sum(len(r["messages"]) for r in records),
+        "blobs_removed": blobs_removed,
+        "receipt_ids": [rid for (rid,) in receipt_ids],
+    }
+
+def run_retention(config: Optional[RetentionConfig] = None, now: Optional[float] = None, dry_run: bool = False) -> Dict[str, Any]:
+    """Move every cold answer into archive segments; returns what moved (and compaction stats)."""
+    config = config or RetentionConfig()
+    receipt.init_db()
+    cutoff = _iso((now or time.time()) - config.hot_days * 86400)
+    store = receipt.get_receipt_store()
+    conn = store.connection()
+    if dry_run:
+        (cold,) = conn.execute(
+            """
+            SELECT COUNT(*) FROM sovereign_answers a WHERE a.created_at < ?
+              AND NOT EXISTS (SELECT 1 FROM assistant_messages m WHERE m.answer_id = a.answer_id AND m.created_at >= ?)
+            """,
+            (cutoff, cutoff),
+        ).fetchone()
+        return {"cutoff": cutoff, "cold_answers": cold, "dry_run": True}
+    report: Dict[str, Any] = {"cutoff": cutoff, "segments": 0, "answers": 0, "messages": 0, "blobs_removed": 0, "legacy_files_removed": 0}
+    while True:
+        # Selection, segment write and deletes share one IMMEDIATE transaction: no reply can
+        # land in a thread between being read into the archive and being deleted
+        try:
+            with store.transaction() as tx:
+                moved = _archive_batch(tx, cutoff, config)
+        except BaseException:
+            for stray in archive_dir().glob(".archive-*.tmp"):
+                stray.unlink(missing_ok=True)
+            raise
+        if moved is None:
+            break
+        report["segments"] += 1
+        report["answers"] += moved["answers"]
+        report["messages"] += moved["messages"]
+        report["blobs_removed"] += moved["blobs_removed"]
+        for rid in moved["receipt_ids"]:
+            legacy = receipt.receipt_path(rid)
+            if legacy.exists():
+                legacy.unlink()
+                report["legacy_files_removed"] += 1
+    report["log_segments_removed"] = receipt.get_receipt_log().drop_drained_segments() if report["segments"] else 0
+    if config.compact and report["segments"]:
+        report["compaction"] = compact_db()
+    return report
+
+def compact_db() -> Dict[str, Any]:
+    """Checkpoint the WAL, VACUUM and ANALYZE the receipt database; reports bytes reclaimed."""
+    conn = receipt.get_receipt_store().connection()
+    before = _db_files_bytes()
+    t0 = time.perf_counter()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    after = _db_files_bytes()
+    return {"bytes_before": before, "bytes_after": after, "bytes_reclaimed": before - after, "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+def load_archived(receipt_id: Optional[str] = None, answer_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Archived {"answer", "receipt", "messages"} by receipt_id or answer_id, or None."""
+    column, key = ("receipt_id", receipt_id) if receipt_id is not None else ("answer_id", answer_id)
+    try:
+        row = receipt.get_receipt_store().execute(
+            f"""
+            SELECT s.name, i.block_offset, i.block_length, i.offset, i.length
+            FROM archive_index i JOIN archive_segments s ON s.segment = i.segment
+            WHERE i.{column} = ?
+            """,
+            (key,),
+        ).fetchone()
+    except sqlite3.OperationalError:  # database predates the archive tables
+        return None
+    if row is None:
+        return None
+    name, block_offset, block_length, offset, length = row
+    return json.loads(read_packed(archive_dir() / name, block_offset, block_length, offset, length))
+
+def verify_archive() -> Dict[str, Any]:
+    """Recompute every segment's file hash and the chain through the manifest."""
+    errors: List[str] = []
+    prev_hash = GENESIS_HASH
+    rows = receipt.get_receipt_store().execute(
+        "SELECT segment, name, file_sha256, prev_hash, chain_hash FROM archive_segments ORDER BY segment"
+    ).fetchall()
+    for segment, name, file_sha, stored_prev, chain_hash in rows:
+        path = archive_dir() / name
+        if not path.exists():
+            errors.append(f"segment {segment}: {name} is missing")
+        elif _file_sha256(path) != file_sha:
+            errors.append(f"segment {segment}: {name} does not match its recorded sha256")
+        if stored_prev != prev_hash or _chain(stored_prev, file_sha) != chain_hash:
+            errors.append(f"segment {segment}: hash chain broken")
+        prev_hash = chain_hash
+    return {"segments": len(rows), "head": prev_hash, "ok": not errors, "errors": errors}
+
+class RetentionScheduler:
+    """Runs retention (and compaction) every `config.interval_s` on a daemon thread."""
+
+    def __init__(self, config: Optional[RetentionConfig] = None):
+        self.config = config or RetentionConfig()
+        self.last_report: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "RetentionScheduler":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="receipt-retention", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.config.interval_s):
+            try:
+                self.last_report = run_retention(self.config)
+                self.last_error = None
+            except Exception as e:  # keep the schedule alive; the next run retries
+                self.last_error = f"{type(e).__name__}: {e}"
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m agi.core.retention", description="Archive cold receipts and compact the receipt database.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    run = sub.add_parser("run", help="archive answers older than --hot-days")
+    run.add_argument("--hot-days", type=float, default=RetentionConfig.hot_days)
+    run.add_argument("--batch", type=int, default=RetentionConfig.batch)
+    run.add_argument("--no-compact", dest="compact", action="store_false")
+    run.add_argument("--dry-run", action="store_true")
+    sub.add_parser("compact", help="VACUUM + ANALYZE now")
+    sub.add_parser("verify", help="check archive file hashes and the hash chain")
+    args = ap.parse_args(argv)
+    receipt.init_db()
+    if args.cmd == "run":
+        out = run_retention(RetentionConfig(hot_days=args.hot_days, batch=args.batch, compact=args.compact), dry_run=args.dry_run)
+    elif args.cmd == "compact":
+        out = compact_db()
+    else:
+        out = verify_archive()
+    print(json.dumps(out, indent=2, default=str))
+    return 0 if out.get("ok", True) else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
+
+__all__ = ["RetentionConfig", "RetentionScheduler", "run_retention", "compact_db", "load_archived", "verify_archive", "archive_dir"]
@@ -20,4 +20,5 @@ def run_specialist(question: str, context: Dict[str, Any]) -> Dict[str, Any]:
         "role": "specialist",
         "answer": answer_text,
         "meta": {"prompt": prompt, "model_key": result.get("model_key"), "provider": result.get("provider")},
+        "receipt": result.get("receipt"),
     }
@@ -0,0 +1,169 @@
+# agi/core/stack_registry.py
+"""Hot-reloadable, precompiled view of model_stack.yaml (v0.1c).
+The YAML is compiled once into a frozen routing table mapping (task_type, sensitivity)
+to a model key + config and its fallback chain. The registry re-stats the file at most
+every `check_interval_s` and swaps in a new table when its content hash changes.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import yaml
+
+SENSITIVITIES = ("normal", "high")
+
+class StackConfigError(Exception):
+    pass
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+@dataclass(frozen=True)
+class CompiledRoute:
+    key: Optional[str]                  # None when the rule names an undefined model
+    cfg: Optional[Mapping[str, Any]]
+    chain: Tuple[str, ...]              # key followed by its usable fallbacks
+    missing_key: Optional[str] = None   # set instead of key/cfg when the model is undefined
+
+@dataclass(frozen=True)
+class RoutingTable:
+    version: str                        # policy_version from the stack file
+    stack_hash: str                     # sha256 of the stack file bytes (or of the mapping)
+    stack: Mapping[str, Any]
+    routes: Mapping[Tuple[str, str], CompiledRoute]
+    defaults: Mapping[str, CompiledRoute]  # sensitivity -> route for unlisted task types
+    loaded_at: float
+
+    def route(self, task_type: str, sensitivity: str) -> CompiledRoute:
+        r = self.routes.get((task_type, sensitivity)) or self.defaults.get(sensitivity) or self.defaults["normal"]
+        if r.key is None:
+            raise StackConfigError(f"Model key '{r.missing_key}' not defined for task '{task_type}'")
+        return r
+
+    def resolve(self, task_type: str, sensitivity: str) -> Tuple[str, Mapping[str, Any]]:
+        r = self.route(task_type, sensitivity)
+        return r.key, r.cfg  # type: ignore[return-value]
+
+def _compile_route(stack: Mapping[str, Any], key: str, sensitivity: str) -> CompiledRoute:
+    routing = stack.get("routing_rules", {})
+    models = stack.get("models", {})
+    default_key = routing.get("default", "local_small")
+    allow_remote = True
+    if sensitivity == "high":
+        ov = routing.get("overrides", {}).get("high_sensitivity", {})
+        allow_remote = ov.get("allow_remote", True)
+        if not allow_remote and key == "remote_tier":
+            key = ov.get("fallback", default_key)
+    cfg = models.get(key)
+    if not cfg:
+        return CompiledRoute(None, None, (), missing_key=key)
+    chain = [key]
+    for fb in (stack.get("fallback_chains") or {}).get(key, ()):
+        if fb in models and fb not in chain:
+            # High-sensitivity no-remote rule applies to fallbacks as well
+            if not allow_remote and models[fb].get("provider", "ollama") != "ollama":
+                continue
+            chain.append(fb)
+    return CompiledRoute(key, cfg, tuple(chain))
+
+def compile_routing_table(stack: Dict[str, Any], stack_hash: Optional[str] = None) -> RoutingTable:
+    frozen = _freeze(stack or {})
+    routing = frozen.get("routing_rules", {})
+    default_key = routing.get("default", "local_small")
+    routes: Dict[Tuple[str, str], CompiledRoute] = {}
+    for task_type, key in routing.get("by_task_type", {}).items():
+        for sens in SENSITIVITIES:
+            routes[(task_type, sens)] = _compile_route(frozen, key, sens)
+    defaults = {sens: _compile_route(frozen, default_key, sens) for sens in SENSITIVITIES}
+    if stack_hash is None:
+        stack_hash = hashlib.sha256(json.dumps(stack, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return RoutingTable(
+        version=str(frozen.get("policy_version", "")),
+        stack_hash=stack_hash,
+        stack=frozen,
+        routes=MappingProxyType(routes),
+        defaults=MappingProxyType(defaults),
+        loaded_at=time.time(),
+    )
+
+class StackRegistry:
+    def __init__(self, path: Path, check_interval_s: float = 1.0):
+        self.path = Path(path)
+        self.check_interval_s = check_interval_s
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._table: Optional[RoutingTable] = None
+        self._stat_key: Optional[Tuple[int, int, int]] = None
+        self._next_check = 0.0
+
+    @classmethod
+    def from_mapping(cls, stack: Dict[str, Any]) -> "StackRegistry":
+        """Registry pinned to an in-memory stack (tests, embedded use); never reloads."""
+        reg = cls(Path(os.devnull), check_interval_s=float("inf"))
+        reg._table = compile_routing_table(stack)
+        reg._next_check = float("inf")
+        return reg
+
+    def current(self) -> RoutingTable:
+        table = self._table
+        if table is not None and time.monotonic() < self._next_check:
+            return table
+        with self._lock:
+            if self._table is None or time.monotonic() >= self._next_check:
+                self._refresh()
+            return self._table  # type: ignore[return-value]
+
+    def _refresh(self) -> None:
+        self._next_check = time.monotonic() + self.check_interval_s
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            if self._table is None:
+                raise StackConfigError(f"model_stack.yaml not found at {self.path}")
+            self.last_error = f"{self.path} missing; keeping stack {self._table.stack_hash[:12]}"
+            return
+        stat_key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if self._table is not None and stat_key == self._stat_key:
+            return
+        raw = self.path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        self._stat_key = stat_key
+        if self._table is not None and digest == self._table.stack_hash:
+            return  # touched but unchanged
+        try:
+            table = compile_routing_table(yaml.safe_load(raw.decode("utf-8")) or {}, digest)
+        except Exception as e:
+            if self._table is None:
+                raise StackConfigError(f"Invalid model_stack.yaml: {e}") from e
+            self.last_error = f"reload failed, keeping stack {self._table.stack_hash[:12]}: {e}"
+            return
+        if self._table is not None:
+            self.reloads += 1
+        self.last_error = None
+        self._table = table  # single reference swap: readers see old or new table, never a mix
+
+    def info(self) -> Dict[str, Any]:
+        table = self.current()
+        return {
+            "path": str(self.path),
+            "version": table.version,
+            "stack_hash": table.stack_hash,
+            "loaded_at": table.loaded_at,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
+
+__all__ = ["StackConfigError", "CompiledRoute", "RoutingTable", "StackRegistry", "compile_routing_table"]
@@ -0,0 +1,186 @@
+# agi/core/storage_codec.py
+"""Column codec for sovereign_answers (v0.1c).
+Large text values are stored as tagged BLOBs: MAGIC + one codec byte + payload, with
+z = zlib, x = lzma, n = uncompressed UTF-8. Values below `min_bytes` stay plain TEXT, and
+plain TEXT always decodes as itself, so old rows need no conversion. Audit receipts
+additionally move their large top-level sub-documents (validator, calls, drift details,
+...) into the content-addressed receipt_blobs table; identical sub-documents are stored once.
+
+    python -m agi.core.storage_codec recompress [--codec lzma] [--vacuum]
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import lzma
+import sqlite3
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Union
+
+MAGIC = b"\x00SC"
+CODECS = {"zlib": b"z", "lzma": b"x", "none": b"n"}
+BLOB_REF = "$blob"
+
+Stored = Union[str, bytes, None]
+
+@dataclass
+class CodecConfig:
+    codec: str = "zlib"             # "zlib" | "lzma" | "none"
+    level: int = 6
+    min_bytes: int = 256            # shorter values are kept as plain TEXT
+    dedup: bool = True
+    dedup_min_bytes: int = 128      # audit sub-documents at least this large go to receipt_blobs
+
+    def __post_init__(self) -> None:
+        if self.codec not in CODECS:
+            raise ValueError(f"codec must be one of {tuple(CODECS)}, got '{self.codec}'")
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "CodecConfig":
+        data = data or {}
+        return cls(**{k: data[k] for k in cls.__dataclass_fields__ if k in data})
+
+def ensure_blob_table(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE TABLE IF NOT EXISTS receipt_blobs (hash TEXT PRIMARY KEY, data BLOB NOT NULL)")
+
+def encode_bytes(data: bytes, config: CodecConfig) -> bytes:
+    if config.codec == "zlib":
+        payload = zlib.compress(data, config.level)
+    elif config.codec == "lzma":
+        payload = lzma.compress(data, preset=config.level)
+    else:
+        payload = data
+    return MAGIC + CODECS[config.codec] + payload
+
+def decode_bytes(blob: bytes) -> bytes:
+    if not blob.startswith(MAGIC):
+        return blob
+    tag, payload = blob[len(MAGIC):len(MAGIC) + 1], blob[len(MAGIC) + 1:]
+    if tag == b"z":
+        return zlib.decompress(payload)
+    if tag == b"x":
+        return lzma.decompress(payload)
+    if tag == b"n":
+        return payload
+    raise ValueError(f"Unknown storage codec tag {tag!r}")
+
+def encode(text: Optional[str], config: CodecConfig) -> Stored:
+    """Value to store for `text`: plain TEXT when small, otherwise a tagged BLOB."""
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if len(data) < config.min_bytes:
+        return text
+    blob = encode_bytes(data, config)
+    return blob if len(blob) < len(data) or config.codec == "none" else text
+
+def decode(value: Stored) -> Optional[str]:
+    """Inverse of `encode`; plain TEXT (including rows written before the codec) passes through."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return decode_bytes(bytes(value)).decode("utf-8")
+    return value
+
+def pack_audit(conn: sqlite3.Connection, audit: Optional[Dict[str, Any]], config: CodecConfig) -> Stored:
+    """Encode an audit receipt, storing its large sub-documents once in receipt_blobs."""
+    if audit is None:
+        return None
+    doc: Dict[str, Any] = dict(audit)
+    if config.dedup:
+        for key, value in audit.items():
+            if not isinstance(value, (dict, list)):
+                continue
+            canonical = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+            if len(canonical) < config.dedup_min_bytes:
+                continue
+            digest = hashlib.sha256(canonical).hexdigest()
+            conn.execute("INSERT OR IGNORE INTO receipt_blobs (hash, data) VALUES (?, ?)", (digest, encode_bytes(canonical, config)))
+            doc[key] = {BLOB_REF: digest}
+    return encode(json.dumps(doc, ensure_ascii=False), config)
+
+def unpack_audit(conn: sqlite3.Connection, value: Stored) -> Optional[Dict[str, Any]]:
+    """Decode a stored audit receipt and resolve its receipt_blobs references."""
+    text = decode(value)
+    if not text:
+        return None
+    doc = json.loads(text)
+    for key, ref in list(doc.items()):
+        if isinstance(ref, dict) and len(ref) == 1 and BLOB_REF in ref:
+            row = conn.execute("SELECT data FROM receipt_blobs WHERE hash = ?", (ref[BLOB_REF],)).fetchone()
+            if row is None:
+                raise LookupError(f"receipt_blobs entry {ref[BLOB_REF]} referenced by audit receipt is missing")
+            doc[key] = json.loads(decode_bytes(bytes(row[0])))
+    return doc
+
+def drop_unreferenced_blobs(conn: sqlite3.Connection) -> int:
+    """Delete receipt_blobs no stored audit receipt refers to; run inside a write transaction."""
+    live = set()
+    for (audit,) in conn.execute("SELECT audit_receipt FROM sovereign_answers"):
+        text = decode(audit)
+        if text:
+            live.update(v[BLOB_REF] for v in json.loads(text).values() if isinstance(v, dict) and BLOB_REF in v)
+    stale = [h for (h,) in conn.execute("SELECT hash FROM receipt_blobs") if h not in live]
+    conn.executemany("DELETE FROM receipt_blobs WHERE hash = ?", [(h,) for h in stale])
+    return len(stale)
+
+def _db_bytes(conn: sqlite3.Connection) -> int:
+    (pages,) = conn.execute("PRAGMA page_count").fetchone()
+    (size,) = conn.execute("PRAGMA page_size").fetchone()
+    (free,) = conn.execute("PRAGMA freelist_count").fetchone()
+    return (pages - free) * size
+
+def recompress(conn: sqlite3.Connection, config: CodecConfig, batch: int = 500) -> Dict[str, int]:
+    """Re-encode every sovereign_answers row under `config` (idempotent; safe to rerun)."""
+    ensure_blob_table(conn)
+    before = _db_bytes(conn)
+    rows_done, last = 0, 0
+    while True:
+        rows = conn.execute(
+            "SELECT rowid, raw_answer, explained_answer, audit_receipt FROM sovereign_answers WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (last, batch),
+        ).fetchall()
+        if not rows:
+            break
+        with conn:
+            for rowid, raw, explained, audit in rows:
+                conn.execute(
+                    "UPDATE sovereign_answers SET raw_answer = ?, explained_answer = ?, audit_receipt = ? WHERE rowid = ?",
+                    (encode(decode(raw), config), encode(decode(explained), config), pack_audit(conn, unpack_audit(conn, audit), config), rowid),
+                )
+        rows_done += len(rows)
+        last = rows[-1][0]
+    with conn:  # shared sub-documents keep their hash; only their encoding changes
+        for digest, data in conn.execute("SELECT hash, data FROM receipt_blobs").fetchall():
+            conn.execute("UPDATE receipt_blobs SET data = ? WHERE hash = ?", (encode_bytes(decode_bytes(bytes(data)), config), digest))
+    with conn:  # blobs no row points at any more (e.g. re-encoded under another codec)
+        conn.execute("BEGIN IMMEDIATE")  # no writer may reference a blob between the scan and the delete
+        removed = drop_unreferenced_blobs(conn)
+    (blobs,) = conn.execute("SELECT COUNT(*) FROM receipt_blobs").fetchone()
+    return {"rows": rows_done, "blobs": blobs, "blobs_removed": removed, "bytes_before": before, "bytes_after": _db_bytes(conn)}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from . import receipt
+
+    ap = argparse.ArgumentParser(prog="python -m agi.core.storage_codec", description="Maintain the sovereign_answers column codec.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rc = sub.add_parser("recompress", help="re-encode existing rows with the current codec settings")
+    rc.add_argument("--codec", choices=tuple(CODECS), default=receipt.CODEC_CONFIG.codec)
+    rc.add_argument("--level", type=int, default=receipt.CODEC_CONFIG.level)
+    rc.add_argument("--no-dedup", action="store_true")
+    rc.add_argument("--vacuum", action="store_true", help="VACUUM afterwards so freed pages shrink the file")
+    args = ap.parse_args(argv)
+    receipt.init_db()
+    config = CodecConfig.from_dict({**receipt.CODEC_CONFIG.__dict__, "codec": args.codec, "level": args.level, "dedup": not args.no_dedup})
+    conn = receipt.get_receipt_store().connection()
+    out = recompress(conn, config)
+    if args.vacuum:
+        conn.execute("VACUUM")
+        out["file_bytes_after_vacuum"] = receipt.DB_PATH.stat().st_size
+    print(json.dumps(out, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
+
+__all__ = ["CodecConfig", "encode", "decode", "encode_bytes", "decode_bytes", "pack_audit", "unpack_audit", "recompress", "ensure_blob_table", "drop_unreferenced_blobs"]
@@ -0,0 +1,153 @@
+# agi/core/tracing.py
+"""Per-stage timing spans and in-process latency histograms (v0.1c).
+run_triad records one span per stage (drift_check, specialist, validator, arbiter,
+interpreter, receipt_write, db_store); every finished span is also observed into the
+process-wide histogram registry, which can be dumped as JSON or scraped as Prometheus text.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    def __init__(self, name: str, help_text: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[LabelKey, List[Any]] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def _quantile(self, counts: List[int], total: int, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (conservative estimate)."""
+        if total == 0:
+            return None
+        rank, seen = q * total, 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        out: Dict[str, Dict[str, Any]] = {}
+        for key, values in series.items():
+            counts, total_sum = values[:-1], values[-1]
+            total = sum(counts)
+            out[",".join(f"{k}={v}" for k, v in key)] = {
+                "count": total,
+                "sum_ms": round(total_sum, 3),
+                "mean_ms": round(total_sum / total, 3) if total else None,
+                "p50_ms": self._quantile(counts, total, 0.50),
+                "p95_ms": self._quantile(counts, total, 0.95),
+                "p99_ms": self._quantile(counts, total, 0.99),
+            }
+        return out
+
+    def prometheus(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for key, values in sorted(series.items()):
+            labels = ",".join(f'{k}="{v}"' for k, v in key)
+            sep = "," if labels else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {values[-1]:.3f}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+class HistogramRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, help_text: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS_MS) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, help_text, buckets)
+            return self._histograms[name]
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        self.histogram(name).observe(value, **labels)
+
+    def dump(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            hists = list(self._histograms.values())
+        return {h.name: h.snapshot() for h in hists}
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            hists = sorted(self._histograms.values(), key=lambda h: h.name)
+        return "\n".join(line for h in hists for line in h.prometheus()) + "\n"
+
+_REGISTRY = HistogramRegistry()
+STAGE_HISTOGRAM = "triad_stage_ms"
+_REGISTRY.histogram(STAGE_HISTOGRAM, "Duration of run_triad stages in milliseconds")
+
+def get_histograms() -> HistogramRegistry:
+    return _REGISTRY
+
+def reset_histograms() -> None:
+    global _REGISTRY
+    _REGISTRY = HistogramRegistry()
+    _REGISTRY.histogram(STAGE_HISTOGRAM, "Duration of run_triad stages in milliseconds")
+
+class Trace:
+    """Ordered list of stage spans for one request; offsets are relative to the trace start."""
+
+    def __init__(self, histogram: Optional[str] = STAGE_HISTOGRAM):
+        self.started = time.perf_counter()
+        self.histogram = histogram
+        self.spans: List[Dict[str, Any]] = []
+
+    def add(self, name: str, start: float, duration_ms: float, observe: bool = True) -> None:
+        """Record a span that started at perf_counter() value `start`.
+
+        `observe=False` keeps a span shared by several traces (e.g. one batch commit) out of
+        the histogram; the owner of the shared work observes it once.
+        """
+        self.spans.append({
+            "name": name,
+            "start_ms": round((start - self.started) * 1000, 3),
+            "duration_ms": round(duration_ms, 3),
+        })
+        if self.histogram and observe:
+            get_histograms().observe(self.histogram, duration_ms, stage=name)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, (time.perf_counter() - start) * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"total_ms": round((time.perf_counter() - self.started) * 1000, 3), "spans": list(self.spans)}
+
+__all__ = ["Histogram", "HistogramRegistry", "Trace", "get_histograms", "reset_histograms", "STAGE_HISTOGRAM"]
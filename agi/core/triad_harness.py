@@ -1,16 +1,22 @@
 # agi/core/triad_harness.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Any, Literal, Optional
-import time, json, hashlib, uuid
+from typing import Callable, Dict, Any, List, Literal, Optional, Sequence, Tuple
+import contextvars, time, json, hashlib, uuid, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict
 
 from .roles import validator, arbiter, specialist, interpreter
 from .assistant_channel import get_assistant_system_prompt
-from .receipt import SovereignReceipt, write_receipt_json, store_answer_and_receipt, init_db
+from .answer_cache import get_answer_cache, make_answer_key, policy_fingerprint
+from .model_runner import load_model_stack, pinned_stack, stack_table
+from .receipt import SovereignReceipt, ReceiptRecord, persist_receipt, persist_receipts, init_db
+from .receipt_writer import get_receipt_writer
+from .tracing import Trace
 try:
-    from .drift_detector import detect_drift
+    from .drift_detector import drift_snapshot
 except ImportError:
-    def detect_drift(root: Path):
+    def drift_snapshot(root: Path):
         return []
 
 ResponseMode = Literal["raw", "explained", "discussion"]
@@ -21,27 +27,77 @@ DEFAULT_MODEL_ID = "stack-routed"
 def _hash_text(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-def run_triad(question: str, mode: ResponseMode = "raw", parent_receipt_id: Optional[str] = None, sensitivity: str = "normal") -> Dict[str, Any]:
+_SPEC_POOL: Optional[ThreadPoolExecutor] = None
+_SPEC_LOCK = threading.Lock()
+
+def _speculation_pool() -> ThreadPoolExecutor:
+    global _SPEC_POOL
+    if _SPEC_POOL is None:
+        with _SPEC_LOCK:
+            if _SPEC_POOL is None:
+                _SPEC_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="triad-speculative")
+    return _SPEC_POOL
+
+def _timed_interpreter(question: str, raw_answer: str, context: Dict[str, Any]):
+    t0 = time.perf_counter()
+    out = interpreter.run_interpreter(question, raw_answer, context)
+    return out, t0, (time.perf_counter() - t0) * 1000
+
+def _evaluate(
+    question: str,
+    mode: ResponseMode,
+    parent_receipt_id: Optional[str],
+    sensitivity: str,
+    speculative: bool,
+    drifts: List[Dict],
+    trace: Trace,
+) -> Tuple[ReceiptRecord, Dict[str, Any]]:
+    """Everything run_triad does except persistence: (record to persist, result without receipt_path)."""
     context: Dict[str, Any] = {
         "policy_version": DEFAULT_POLICY_VERSION,
         "model_id": DEFAULT_MODEL_ID,
         "question": question,
     }
-    drifts = detect_drift(ROOT_DIR)
     drift_flag = len(drifts) > 0
 
     # Specialist invocation (now returns receipt metadata inside result['receipt'])
-    spec_out = specialist.run_specialist(question, context)
-    val_out = validator.run_validator(spec_out, context)
-    arb_out = arbiter.run_arbiter(spec_out, val_out, context)
+    with trace.span("specialist"):
+        spec_out = specialist.run_specialist(question, context)
+    spec_future: Optional[Future] = None
+    if speculative and mode == "explained":
+        spec_answer_obj = spec_out.get("answer", "")
+        spec_answer = spec_answer_obj if isinstance(spec_answer_obj, str) else str(spec_answer_obj)
+        spec_future = _speculation_pool().submit(
+            contextvars.copy_context().run, _timed_interpreter, question, spec_answer, dict(context)
+        )
+    t_stage = time.perf_counter()
+    with trace.span("validator"):
+        val_out = validator.run_validator(spec_out, context)
+    with trace.span("arbiter"):
+        arb_out = arbiter.run_arbiter(spec_out, val_out, context)
+    val_arb_ms = (time.perf_counter() - t_stage) * 1000
 
     raw_answer_obj = arb_out.get("final_answer", "")
     raw_answer = raw_answer_obj if isinstance(raw_answer_obj, str) else str(raw_answer_obj)
 
     explained_answer: Optional[str] = None
     interpreter_prompt_hash: Optional[str] = None
+    speculation: Optional[Dict[str, Any]] = None
     if mode == "explained":
-        interp_out = interpreter.run_interpreter(question, raw_answer, context)
+        interp_out = None
+        if spec_future is not None:
+            if raw_answer == spec_answer:
+                interp_out, interp_start, interp_ms = spec_future.result()
+                trace.add("interpreter", interp_start, interp_ms)
+                waited_ms = (time.perf_counter() - t_stage) * 1000
+                # Sequential cost would have been validation+arbitration followed by the interpreter
+                speculation = {"used": True, "hit": True, "saved_ms": max(0, int(val_arb_ms + interp_ms - waited_ms))}
+            else:
+                spec_future.cancel()  # arbiter changed the answer (refusal): discard the speculative run
+                speculation = {"used": True, "hit": False, "saved_ms": 0}
+        if interp_out is None:
+            with trace.span("interpreter"):
+                interp_out = interpreter.run_interpreter(question, raw_answer, context)
         exp_obj = interp_out.get("explained_answer", raw_answer)
         explained_answer = exp_obj if isinstance(exp_obj, str) else str(exp_obj)
         interpreter_prompt_hash = _hash_text(interp_out.get("prompt", ""))
@@ -75,36 +131,294 @@ def run_triad(question: str, mode: ResponseMode = "raw", parent_receipt_id: Opti
         timestamp=ts,
     )
 
-    receipt_path = write_receipt_json(receipt)
-
     visible_answer = explained_answer if (mode in ("explained", "discussion") and explained_answer) else raw_answer
 
-    # Enrich receipt JSON with validator + arbiter + model forensic metadata
-    enriched = json.loads(Path(receipt_path).read_text(encoding="utf-8"))
+    # Enriched receipt (validator + arbiter + model forensic metadata) is built once in memory
+    enriched = asdict(receipt)
     enriched["validator"] = {"policy_ok": val_out.get("policy_ok", True), "violations": val_out.get("violations", [])}
     enriched["arbiter_status"] = arb_out.get("status", "OK")
     enriched["calls"] = {"specialist": spec_out.get("meta", {}), "specialist_receipt": spec_out.get("receipt")}
-    Path(receipt_path).write_text(json.dumps(enriched, indent=2), encoding="utf-8")
-
-    # Persist answer with full audit receipt
-    store_answer_and_receipt(
-        receipt,
-        question,
-        raw_answer,
-        explained_answer if mode == "explained" else None,
-        audit_receipt=enriched,
-    )
+    if speculation is not None:
+        enriched["speculation"] = speculation
+    # Stages up to here; receipt_write/db_store happen after the receipt is sealed and are
+    # reported in the returned result and the stage histograms instead
+    enriched["trace"] = trace.to_dict()
 
-    return {
+    explained_to_store = explained_answer if mode == "explained" else None
+    result = {
         "answer": visible_answer,
         "mode": mode,
         "answer_id": answer_id,
         "receipt_id": receipt_id,
         "violations": val_out.get("violations", []),
         "policy_ok": val_out.get("policy_ok", True),
-        "receipt_path": str(receipt_path),
+        "receipt_path": None,
         "receipt": enriched,
     }
+    return (receipt, enriched, question, raw_answer, explained_to_store), result
+
+def _persist(record: ReceiptRecord, trace: Trace) -> Optional[str]:
+    """Persist receipt + answer row in one pass (group-committed when a writer is configured).
+
+    Returns the receipt-log locator, or None when the writer does not make callers wait.
+    """
+    writer = get_receipt_writer()
+    if writer is not None:
+        with trace.span("receipt_persist"):
+            done = writer.submit(*record)
+            return done.result() if writer.waits else None
+    timings: Dict[str, Tuple[float, float]] = {}
+    locator = persist_receipt(*record, timings=timings)
+    for stage, (start, ms) in timings.items():
+        trace.add(stage, start, ms)
+    return locator
+
+def _reuse(question: str, mode: ResponseMode, hit: Dict[str, Any], trace: Trace) -> Tuple[ReceiptRecord, Dict[str, Any]]:
+    """New receipt for a cached answer: same content hashes, parent = the original receipt."""
+    orig = hit["audit_receipt"]
+    raw_answer = hit["raw_answer"]
+    explained_answer: Optional[str] = None
+    if mode == "explained":
+        explained_answer = hit["explained_answer"]
+    elif mode == "discussion":
+        explained_answer = f"[DISCUSSION]\n{raw_answer}"
+    receipt = SovereignReceipt(
+        receipt_id=str(uuid.uuid4()),
+        answer_id=str(uuid.uuid4()),
+        model_id=orig["model_id"],
+        policy_version=orig["policy_version"],
+        mode=mode,
+        agent_path=orig["agent_path"],
+        prompt_hash=orig["prompt_hash"],
+        answer_hash=orig["answer_hash"],
+        interpreter_prompt_hash=orig.get("interpreter_prompt_hash"),
+        assistant_system_prompt_hash=_hash_text(get_assistant_system_prompt()),
+        parent_receipt_id=hit["receipt_id"],
+        drift_detected=False,
+        drift_details=[],
+        timestamp=int(time.time()),
+        reused=True,
+    )
+    enriched = asdict(receipt)
+    for key in ("validator", "arbiter_status", "calls"):
+        enriched[key] = orig.get(key)
+    enriched["trace"] = trace.to_dict()
+    validator_view = orig.get("validator") or {}
+    visible_answer = explained_answer if (mode in ("explained", "discussion") and explained_answer) else raw_answer
+    result = {
+        "answer": visible_answer,
+        "mode": mode,
+        "answer_id": receipt.answer_id,
+        "receipt_id": receipt.receipt_id,
+        "violations": validator_view.get("violations", []),
+        "policy_ok": validator_view.get("policy_ok", True),
+        "receipt_path": None,
+        "receipt": enriched,
+    }
+    return (receipt, enriched, question, raw_answer, hit["explained_answer"] if mode == "explained" else None), result
+
+def _answer_cache(use_cache: Optional[bool]):
+    cfg = dict(load_model_stack().get("answer_cache") or {})
+    enabled = cfg.get("enabled", False) if use_cache is None else use_cache
+    return get_answer_cache({**cfg, "enabled": True}) if enabled else None
+
+Remember = Optional[Callable[[], None]]
+
+def _answer(
+    question: str,
+    mode: ResponseMode,
+    parent_receipt_id: Optional[str],
+    sensitivity: str,
+    speculative: bool,
+    use_cache: Optional[bool],
+    drifts: List[Dict],
+    trace: Trace,
+) -> Tuple[ReceiptRecord, Dict[str, Any], Remember]:
+    """A cached or freshly evaluated answer, not yet persisted.
+
+    The third item, when set, stores a fresh answer in the answer cache; call it only once
+    its receipt is persisted.
+    """
+    cache = _answer_cache(use_cache) if not drifts and parent_receipt_id is None else None
+    if cache is None:
+        return (*_evaluate(question, mode, parent_receipt_id, sensitivity, speculative, drifts, trace), None)
+    with trace.span("answer_cache"):
+        fingerprint = policy_fingerprint()
+        cache.check_fingerprint(fingerprint)
+        cache_key = make_answer_key(_hash_text(question), DEFAULT_POLICY_VERSION, stack_table().stack_hash, fingerprint, mode, sensitivity)
+        hit = cache.get(cache_key)
+    if hit is not None:
+        return (*_reuse(question, mode, hit, trace), None)
+    record, result = _evaluate(question, mode, parent_receipt_id, sensitivity, speculative, drifts, trace)
+
+    def remember() -> None:
+        spec_receipt = result["receipt"]["calls"].get("specialist_receipt")
+        if spec_receipt is None or spec_receipt.get("status") == "success":
+            cache.put(cache_key, result["answer_id"], result["receipt_id"], fingerprint)
+
+    return record, result, remember
+
+def _finish(result: Dict[str, Any], locator: Optional[str], trace: Trace, remember: Remember) -> Dict[str, Any]:
+    result["receipt_path"] = locator
+    result["trace"] = trace.to_dict()
+    if remember is not None:
+        remember()
+    return result
+
+def run_triad(
+    question: str,
+    mode: ResponseMode = "raw",
+    parent_receipt_id: Optional[str] = None,
+    sensitivity: str = "normal",
+    speculative: bool = False,
+    use_cache: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Run specialist -> validator -> arbiter (-> interpreter) and persist the receipt.
+
+    With `speculative=True` in explained mode the interpreter starts on the specialist
+    answer while validation and arbitration run; its result is only used if the arbiter
+    passes that answer through unchanged, so the receipt content matches a sequential run.
+
+    `use_cache` overrides the `answer_cache.enabled` stack setting. A hit (same question,
+    policy version, stack, policy files, mode and sensitivity, no drift, no caller-given
+    parent) skips every model call and returns the stored answer under a new receipt with
+    `reused=True` and `parent_receipt_id` set to the original receipt.
+    """
+    trace = Trace()
+    with trace.span("drift_check"):
+        drifts = drift_snapshot(ROOT_DIR)
+    record, result, remember = _answer(question, mode, parent_receipt_id, sensitivity, speculative, use_cache, drifts, trace)
+    return _finish(result, _persist(record, trace), trace, remember)
+
+def run_triad_batch(
+    questions: Sequence[str],
+    mode: ResponseMode = "raw",
+    workers: int = 4,
+    sensitivity: str = "normal",
+    commit_every: int = 200,
+    use_cache: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Evaluate many questions with the same drift snapshot and routing table.
+
+    Questions run on up to `workers` threads. Receipts go through the configured receipt
+    writer like run_triad's; without one they are persisted `commit_every` per transaction,
+    and a transaction that fails is retried receipt by receipt. Results are in input order
+    and have the shape run_triad returns (trace included); a question whose evaluation or
+    persistence raises gets {"question", "error"} instead of failing the batch.
+    """
+    start = time.perf_counter()
+    batch_trace = Trace()
+    traces = [Trace() for _ in questions]
+    drift_start = time.perf_counter()
+    drifts = drift_snapshot(ROOT_DIR)
+    drift_ms = (time.perf_counter() - drift_start) * 1000
+    batch_trace.add("drift_check", drift_start, drift_ms)
+    for trace in traces:
+        trace.add("drift_check", drift_start, drift_ms, observe=False)
+
+    def one(question: str, trace: Trace) -> Tuple[Optional[Tuple[ReceiptRecord, Dict[str, Any], Remember]], float, Optional[str]]:
+        t0 = time.perf_counter()
+        try:
+            out = _answer(question, mode, None, sensitivity, False, use_cache, drifts, trace)
+            return out, (time.perf_counter() - t0) * 1000, None
+        except Exception as e:
+            return None, (time.perf_counter() - t0) * 1000, f"{type(e).__name__}: {e}"
+
+    results: List[Dict[str, Any]] = [{} for _ in questions]
+    latencies: List[float] = []
+    pending: List[Tuple[int, ReceiptRecord, Remember]] = []
+    submitted: List[Tuple[int, Future, float, float, Remember]] = []
+    writer = get_receipt_writer()
+    writer_batches = writer.batches if writer is not None else 0
+    transactions = 0
+
+    def fail(i: int, e: BaseException) -> None:
+        results[i] = {"question": questions[i], "error": f"{type(e).__name__}: {e}"}
+
+    def flush() -> None:
+        nonlocal transactions
+        if not pending:
+            return
+        timings: Dict[str, Tuple[float, float]] = {}
+        try:
+            locators = persist_receipts([rec for _, rec, _ in pending], timings=timings)
+        except Exception:
+            for i, rec, remember in pending:  # isolate the receipt(s) that cannot be stored
+                try:
+                    locator = _persist(rec, traces[i])
+                except Exception as e:
+                    fail(i, e)
+                    continue
+                transactions += 1
+                _finish(results[i], locator, traces[i], remember)
+        else:
+            transactions += 1
+            for stage, (t0, ms) in timings.items():
+                batch_trace.add(f"{stage}_batch", t0, ms)
+            for (i, _, remember), locator in zip(pending, locators):
+                for stage, (t0, ms) in timings.items():
+                    traces[i].add(stage, t0, ms, observe=False)
+                _finish(results[i], locator, traces[i], remember)
+        pending.clear()
+
+    with pinned_stack() as table, ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="triad-batch") as pool:
+        # Each task runs in a copy of this context so the pinned routing table applies in the workers
+        futures = [pool.submit(contextvars.copy_context().run, one, q, t) for q, t in zip(questions, traces)]
+        for i, fut in enumerate(futures):
+            out, ms, error = fut.result()
+            latencies.append(ms)
+            if out is None:
+                results[i] = {"question": questions[i], "error": error}
+                continue
+            record, results[i], remember = out
+            if writer is None:
+                pending.append((i, record, remember))
+                if len(pending) >= commit_every:
+                    flush()
+                continue
+            t0 = time.perf_counter()
+            try:
+                done = writer.submit(*record)
+            except Exception as e:
+                fail(i, e)
+                continue
+            submitted.append((i, done, t0, (time.perf_counter() - t0) * 1000, remember))
+        flush()
+    for i, done, t0, submit_ms, remember in submitted:
+        try:
+            locator = done.result() if writer.waits else None  # type: ignore[union-attr]
+        except Exception as e:
+            fail(i, e)
+            continue
+        traces[i].add("receipt_persist", t0, (time.perf_counter() - t0) * 1000 if writer.waits else submit_ms)  # type: ignore[union-attr]
+        _finish(results[i], locator, traces[i], remember)
+    if writer is not None:
+        transactions = writer.batches - writer_batches
+    elapsed = time.perf_counter() - start
+    ok = [r for r in results if "error" not in r]
+    latencies.sort()
+
+    def pct(p: float) -> Optional[float]:
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2) if latencies else None
+
+    return {
+        "results": results,
+        "metrics": {
+            "questions": len(questions),
+            "succeeded": len(ok),
+            "errors": len(results) - len(ok),
+            "refused": sum(1 for r in ok if r["receipt"].get("arbiter_status") == "REFUSED"),
+            "workers": workers,
+            "transactions": transactions,
+            "elapsed_s": round(elapsed, 3),
+            "questions_per_sec": round(len(questions) / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "drift_detected": bool(drifts),
+            "stack_hash": table.stack_hash,
+            "trace": batch_trace.to_dict(),
+        },
+    }
 
 if __name__ == "__main__":
     init_db()
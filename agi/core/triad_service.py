@@ -0,0 +1,346 @@
+# agi/core/triad_service.py
+"""Long-lived triad service over stdlib asyncio HTTP/1.1 (v0.1c).
+Keeps the stack, drift monitor, model connections and warm models alive between requests.
+Endpoints:
+  POST /triad              {"question", "mode"?, "sensitivity"?, "parent_receipt_id"?, "speculative"?}
+  POST /assistant/reply    {"answer_id", "receipt_id"?, "sovereign_answer"?, "message"}
+  POST /agency/eval        {"a1": {...}, "a2": {...}, "a3": {...}, "a4": {...}}
+  GET  /receipts/<id>      enriched receipt
+  GET  /health             JSON status
+  GET  /metrics            Prometheus text
+Model-bound work runs on a bounded worker pool; once `workers + queue_size` requests are
+pending, new ones get 429 with Retry-After. SIGINT/SIGTERM stop accepting, drain in-flight
+work (up to `drain_timeout_s`) and flush the receipt writer before exiting.
+
+    python -m agi.core.triad_service --port 8765
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from . import receipt
+from .agency_metrics import compute_agency_vector
+from .assistant_channel import generate_assistant_reply
+from .drift_detector import get_drift_monitor
+from .empathy_state_machine import EmpathyStateMachine
+from .model_runner import stack_info, warm_up_stack
+from .receipt_writer import reset_receipt_writer
+from .retention import RetentionConfig, RetentionScheduler
+from .tracing import get_histograms
+from .triad_harness import ROOT_DIR, run_triad
+
+Response = Tuple[int, Any, Dict[str, str]]
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+@dataclass
+class ServiceConfig:
+    host: str = "127.0.0.1"
+    port: int = 8765
+    workers: int = 4                 # concurrent triad / assistant calls
+    queue_size: int = 32             # waiting requests beyond `workers` before 429
+    drain_timeout_s: float = 30.0
+    max_body_bytes: int = 1_000_000
+    warm_up: bool = True             # preload models from the stack's warmup block at start
+    drift_poll_s: float = 2.0        # background drift watcher interval (0 disables)
+    retention_interval_s: float = 0.0  # archive cold receipts + compact the DB this often (0 disables)
+    retention_hot_days: float = 90.0
+
+class BadRequest(Exception):
+    pass
+
+class TriadService:
+    def __init__(self, config: Optional[ServiceConfig] = None):
+        self.config = config or ServiceConfig()
+        self.port: Optional[int] = None
+        self.started_at = 0.0
+        self.draining = False
+        self.pending = 0
+        self.in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self.counters: Dict[Tuple[str, int], int] = {}
+        self._pool = ThreadPoolExecutor(max_workers=self.config.workers, thread_name_prefix="triad-service")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._conns: Set[asyncio.StreamWriter] = set()
+        self._retention: Optional[RetentionScheduler] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._routes: Dict[Tuple[str, str], Callable[[Dict[str, Any]], Awaitable[Response]]] = {
+            ("POST", "/triad"): self._triad,
+            ("POST", "/assistant/reply"): self._assistant_reply,
+            ("POST", "/agency/eval"): self._agency_eval,
+            ("GET", "/health"): self._health,
+            ("GET", "/metrics"): self._metrics,
+        }
+
+    # -- lifecycle --------------------------------------------------------
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._stop = asyncio.Event()
+        receipt.init_db()
+        if self.config.drift_poll_s > 0:
+            get_drift_monitor(ROOT_DIR).start(self.config.drift_poll_s)
+        if self.config.retention_interval_s > 0:
+            self._retention = RetentionScheduler(RetentionConfig(
+                hot_days=self.config.retention_hot_days, interval_s=self.config.retention_interval_s,
+            )).start()
+        if self.config.warm_up:
+            warm_up_stack(background=True)
+        self._server = await asyncio.start_server(self._handle_conn, self.config.host, self.config.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.started_at = time.time()
+
+    async def shutdown(self) -> None:
+        """Stop accepting, let pending work finish (bounded), then release resources."""
+        self.draining = True
+        if self._server is not None:
+            self._server.close()
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.config.drain_timeout_s)  # type: ignore[union-attr]
+        except asyncio.TimeoutError:
+            pass
+        for w in list(self._conns):
+            w.close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        await asyncio.get_running_loop().run_in_executor(None, reset_receipt_writer)
+        get_drift_monitor(ROOT_DIR).stop()
+        if self._retention is not None:
+            self._retention.stop()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stop.set)  # type: ignore[union-attr]
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows / non-main thread: use stop_background() or Ctrl+C
+        await self._stop.wait()  # type: ignore[union-attr]
+        await self.shutdown()
+
+    def start_background(self) -> "TriadService":
+        """Run the service on its own event loop thread (embedding, tests)."""
+        ready = threading.Event()
+
+        async def _main() -> None:
+            await self.start()
+            ready.set()
+            await self._stop.wait()  # type: ignore[union-attr]
+            await self.shutdown()
+
+        self._thread = threading.Thread(target=asyncio.run, args=(_main(),), name="triad-service-loop", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_background(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._loop.call_soon_threadsafe(self._stop.set)  # type: ignore[union-attr]
+        self._thread.join()
+
+    # -- HTTP plumbing ----------------------------------------------------
+    async def _handle_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._conns.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, _version = line.decode("latin-1").split()
+                except ValueError:
+                    await self._write(writer, (400, {"error": "malformed request line"}, {}), close=True)
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._write(writer, (400, {"error": "invalid Content-Length"}, {}), close=True)
+                    break
+                if length > self.config.max_body_bytes:
+                    await self._write(writer, (413, {"error": "body too large"}, {}), close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                close = headers.get("connection", "").lower() == "close"
+                response = await self._dispatch(method.upper(), target, body)
+                await self._write(writer, response, close=close or self.draining)
+                if close or self.draining:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._conns.discard(writer)
+            writer.close()
+
+    async def _write(self, writer: asyncio.StreamWriter, response: Response, close: bool) -> None:
+        status, payload, headers = response
+        if isinstance(payload, str):
+            body, ctype = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            body, ctype = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+        head = [f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}", f"Content-Type: {ctype}", f"Content-Length: {len(body)}"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        head.append("Connection: close" if close else "Connection: keep-alive")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Response:
+        path = target.split("?", 1)[0]
+        start = time.perf_counter()
+        if path.startswith("/receipts/"):
+            route = "/receipts/<id>"
+        else:  # metric labels stay bounded: unknown paths share one label
+            route = path if any(p == path for _, p in self._routes) else "<unmatched>"
+        try:
+            payload = json.loads(body) if body else {}
+            if not isinstance(payload, dict):
+                raise BadRequest("JSON body must be an object")
+            if route == "/receipts/<id>":
+                response = await self._receipt(method, path[len("/receipts/"):])
+            else:
+                handler = self._routes.get((method, path))
+                if handler is None:
+                    response = (405 if route == path else 404, {"error": f"{method} {path} not supported"}, {})
+                else:
+                    response = await handler(payload)
+        except (BadRequest, json.JSONDecodeError) as e:
+            response = (400, {"error": str(e)}, {})
+        except Exception as e:
+            response = (500, {"error": f"{type(e).__name__}: {e}"}, {})
+        self.counters[(route, response[0])] = self.counters.get((route, response[0]), 0) + 1
+        get_histograms().observe("service_request_ms", (time.perf_counter() - start) * 1000, route=route)
+        return response
+
+    async def _admit(self, fn: Callable[[], Any]) -> Response:
+        """Run blocking model-bound work on the pool, or refuse when the queue is full."""
+        if self.draining:
+            return 503, {"error": "service is shutting down"}, {"Retry-After": "5"}
+        if self.pending >= self.config.workers + self.config.queue_size:
+            return 429, {"error": "too many pending requests"}, {"Retry-After": "1"}
+        self.pending += 1
+        self._idle.clear()  # type: ignore[union-attr]
+
+        def run() -> Any:
+            with self._in_flight_lock:
+                self.in_flight += 1
+            try:
+                return fn()
+            finally:
+                with self._in_flight_lock:
+                    self.in_flight -= 1
+
+        try:
+            return 200, await asyncio.get_running_loop().run_in_executor(self._pool, run), {}
+        finally:
+            self.pending -= 1
+            if self.pending == 0:
+                self._idle.set()  # type: ignore[union-attr]
+
+    # -- endpoints --------------------------------------------------------
+    async def _triad(self, p: Dict[str, Any]) -> Response:
+        question = p.get("question")
+        if not isinstance(question, str) or not question.strip():
+            raise BadRequest("'question' is required")
+        mode = p.get("mode", "raw")
+        if mode not in ("raw", "explained", "discussion"):
+            raise BadRequest(f"unknown mode '{mode}'")
+        sensitivity = p.get("sensitivity", "normal")
+        if sensitivity not in ("normal", "high"):
+            raise BadRequest(f"unknown sensitivity '{sensitivity}'")
+        return await self._admit(lambda: run_triad(
+            question,
+            mode=mode,
+            parent_receipt_id=p.get("parent_receipt_id"),
+            sensitivity=sensitivity,
+            speculative=bool(p.get("speculative", False)),
+        ))
+
+    async def _assistant_reply(self, p: Dict[str, Any]) -> Response:
+        answer_id, message = p.get("answer_id"), p.get("message")
+        if not answer_id or not message:
+            raise BadRequest("'answer_id' and 'message' are required")
+
+        def reply() -> Dict[str, Any]:
+            sovereign_answer, receipt_id = p.get("sovereign_answer"), p.get("receipt_id")
+            if sovereign_answer is None or receipt_id is None:
+                answer = receipt.load_answer(answer_id)
+                if answer is None:
+                    raise BadRequest(f"unknown answer_id '{answer_id}'")
+                sovereign_answer = sovereign_answer if sovereign_answer is not None else answer["raw_answer"]
+                receipt_id = receipt_id or answer["receipt_id"]
+            return {"answer_id": answer_id, "reply": generate_assistant_reply(
+                answer_id, receipt_id, sovereign_answer, message, store_user_message=True,
+            )}
+
+        return await self._admit(reply)
+
+    async def _agency_eval(self, p: Dict[str, Any]) -> Response:
+        vec = compute_agency_vector(p.get("a1") or {}, p.get("a2") or {}, p.get("a3") or {}, p.get("a4") or {})
+        state = EmpathyStateMachine().step(vec)
+        return 200, {**{k: round(v, 4) for k, v in vec.__dict__.items()}, "AgencyScore": round(vec.aggregate, 4), "state": state}, {}
+
+    async def _receipt(self, method: str, receipt_id: str) -> Response:
+        if method != "GET":
+            return 405, {"error": f"{method} not supported"}, {}
+        if not receipt_id or "/" in receipt_id or ".." in receipt_id:
+            raise BadRequest("invalid receipt id")
+        found = await asyncio.get_running_loop().run_in_executor(None, receipt.load_receipt, receipt_id)
+        if found is None:
+            return 404, {"error": f"receipt '{receipt_id}' not found"}, {}
+        return 200, found, {}
+
+    async def _health(self, _p: Dict[str, Any]) -> Response:
+        return 200, {
+            "status": "draining" if self.draining else "ok",
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "pending": self.pending,
+            "in_flight": self.in_flight,
+            "config": asdict(self.config),
+            "stack": stack_info(),
+        }, {}
+
+    async def _metrics(self, _p: Dict[str, Any]) -> Response:
+        lines = [
+            "# TYPE triad_service_pending gauge", f"triad_service_pending {self.pending}",
+            "# TYPE triad_service_in_flight gauge", f"triad_service_in_flight {self.in_flight}",
+            "# TYPE triad_service_requests_total counter",
+        ]
+        lines += [f'triad_service_requests_total{{route="{r}",status="{s}"}} {n}' for (r, s), n in sorted(self.counters.items())]
+        return 200, get_histograms().prometheus_text() + "\n".join(lines) + "\n", {}
+
+def main(argv: Optional[list] = None) -> None:
+    import argparse
+    ap = argparse.ArgumentParser(description="Run the long-lived triad HTTP service")
+    for name, field_ in ServiceConfig.__dataclass_fields__.items():
+        if name != "warm_up":
+            ap.add_argument(f"--{name.replace('_', '-')}", type=type(field_.default), default=field_.default)
+    ap.add_argument("--no-warm-up", dest="warm_up", action="store_false", help="skip model preload at start")
+    args = ap.parse_args(argv)
+    service = TriadService(ServiceConfig(**{k: getattr(args, k) for k in ServiceConfig.__dataclass_fields__}))
+    asyncio.run(service.serve_forever())
+
+__all__ = ["ServiceConfig", "TriadService"]
+
+if __name__ == "__main__":
+    main()
@@ -26,13 +26,36 @@ app.on('window-all-closed', () => {
 });
 
 // IPC stubs  will call python backends later
+// Long-lived python backend: python -m agi.core.triad_service
+const TRIAD_SERVICE = process.env.TRIAD_SERVICE_URL || 'http://127.0.0.1:8765';
+
+async function callTriadService(route, body) {
+  const res = await fetch(`${TRIAD_SERVICE}${route}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body)
+  });
+  const data = await res.json();
+  if (!res.ok) throw new Error(data.error || `HTTP ${res.status}`);
+  return data;
+}
+
 ipcMain.handle('agency:eval', async (_evt, payload) => {
-  // placeholder returns static vector; integrate HTTP fetch to python
-  return { A1:0.62,A2:0.58,A3:0.51,A4:0.55, AgencyScore:0.57, state:'STEADY' };
+  try {
+    return await callTriadService('/agency/eval', payload || {});
+  } catch (err) {
+    // service not running: keep the previous placeholder vector
+    return { A1:0.62,A2:0.58,A3:0.51,A4:0.55, AgencyScore:0.57, state:'STEADY', error: String(err) };
+  }
 });
 
 ipcMain.handle('truth:query', async (_evt, question) => {
-  return { answer: 'Truth engine not wired yet.', cites: [] };
+  try {
+    const out = await callTriadService('/triad', { question, mode: 'raw' });
+    return { answer: out.answer, cites: [], receipt_id: out.receipt_id, policy_ok: out.policy_ok };
+  } catch (err) {
+    return { answer: `Truth engine unavailable: ${err}`, cites: [] };
+  }
 });
 
 ipcMain.handle('sovereign:status', async () => {
@@ -0,0 +1,112 @@
+import pytest
+
+from agi.core import assistant_channel, model_runner, receipt
+from agi.core.stack_registry import StackRegistry
+
+STACK = {
+    "models": {"local_small": {"id": "chat", "provider": "ollama"}},
+    "routing_rules": {"default": "local_small"},
+}
+
+
+@pytest.fixture
+def channel(tmp_path, monkeypatch):
+    db = tmp_path / "sovereign.sqlite"
+    monkeypatch.setattr(receipt, "DB_PATH", db)
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(STACK))
+    receipt.init_db()
+    sent = []
+
+    def fake_generate(model_id, prompt, **kwargs):
+        sent.append({"prompt": prompt, "context": kwargs.get("context")})
+        return {"response": f"reply{len(sent)}", "context": list(range(len(sent) * 3))}
+
+    monkeypatch.setattr(model_runner, "ollama_generate", fake_generate)
+    return sent
+
+
+def test_reply_reuses_ollama_context(channel):
+    first = assistant_channel.generate_assistant_reply("a1", "r1", "ANSWER", "why?")
+    assert first == "reply1"
+    assert channel[0]["context"] is None and "SOVEREIGN ANSWER" in channel[0]["prompt"]
+
+    assistant_channel.append_user_message("a1", "r1", "follow-up")
+    second = assistant_channel.generate_assistant_reply("a1", "r1", "ANSWER", "and then?")
+    assert second == "reply2"
+    assert channel[1]["context"] == [0, 1, 2]
+    assert channel[1]["prompt"] == "\nUSER: follow-up\nUSER: and then?\nASSISTANT:"
+    assert [m["message"] for m in assistant_channel.list_thread_messages("a1")] == ["reply1", "follow-up", "reply2"]
+
+
+def test_stale_context_falls_back_to_full_prompt(channel):
+    assistant_channel.generate_assistant_reply("a2", "r2", "ANSWER", "q1")
+    assistant_channel.append_assistant_message("a2", "r2", "written elsewhere")
+    assistant_channel.generate_assistant_reply("a2", "r2", "ANSWER", "q2")
+    assert channel[1]["context"] is None
+    assert "written elsewhere" in channel[1]["prompt"]
+
+
+def test_context_is_not_sent_to_a_fallback_model(channel, monkeypatch):
+    from agi.core import model_health
+
+    stack = {
+        "models": {"local_small": {"id": "chat", "provider": "ollama"}, "backup": {"id": "other", "provider": "ollama"}},
+        "routing_rules": {"default": "local_small"},
+        "fallback_chains": {"local_small": ["backup"]},
+        "health": {"failure_threshold": 1},
+    }
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(stack))
+    model_health.reset_health_registry()
+    try:
+        assistant_channel.generate_assistant_reply("a3", "r3", "ANSWER", "q1")
+        model_runner._health().record("local_small", 5, ok=False)  # opens the primary's breaker
+        assistant_channel.generate_assistant_reply("a3", "r3", "ANSWER", "q2")
+        assert len(channel) == 2  # no continuation attempt on the fallback
+        assert channel[1]["context"] is None and "SOVEREIGN ANSWER" in channel[1]["prompt"]
+        rec = model_runner.generate("discussion", "more", context=[0, 1, 2])
+        assert rec.model_key == "backup" and channel[2]["context"] is None
+    finally:
+        model_health.reset_health_registry()
+
+
+def test_thread_pages_and_cache(channel):
+    conn = receipt.get_receipt_store().connection()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == receipt.SCHEMA_VERSION
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM assistant_messages WHERE answer_id = ? ORDER BY id DESC LIMIT 2", ("t",)
+    ).fetchall()
+    assert "idx_assistant_messages_answer" in str(plan)
+
+    ids = [assistant_channel.append_user_message("t", "r", f"m{i}") for i in range(5)]
+    assistant_channel.append_user_message("other", "r", "noise")
+    assert [m["message"] for m in assistant_channel.list_thread_messages("t", last_n=2)] == ["m3", "m4"]
+    assert [m["id"] for m in assistant_channel.list_thread_messages("t", since_id=ids[2])] == ids[3:]
+
+    cache = assistant_channel.get_thread_cache()
+    assert len(assistant_channel.list_thread_messages("t")) == 5
+    hits = cache.hits
+    new_id = assistant_channel.append_assistant_message("t", "r", "kept current")
+    assert assistant_channel.list_thread_messages("t", last_n=1)[0]["id"] == new_id
+    assert cache.hits == hits + 1
+    receipt.store_assistant_message("t", "r", "user", "written directly")  # bypasses the cache
+    assert assistant_channel.list_thread_messages("t")[-1]["message"] == "written directly"
+
+
+def test_long_thread_is_folded_into_incremental_summary(channel, monkeypatch):
+    monkeypatch.setattr(assistant_channel, "_summary_config", lambda: assistant_channel.SummaryConfig(token_budget=100, recent_turns=2))
+    ids = [assistant_channel.append_user_message("s", "r", f"turn{i} " + "word " * 50) for i in range(6)]
+    assistant_channel.generate_assistant_reply("s", "r", "ANSWER", "next?")
+    summary_call, reply_call = channel[-2:]
+    assert summary_call["prompt"].startswith(assistant_channel.THREAD_SUMMARY_PROMPT)
+    assert "turn3" in summary_call["prompt"] and "turn4" not in summary_call["prompt"]
+    assert f"SUMMARY OF EARLIER TURNS:\nreply{len(channel) - 1}" in reply_call["prompt"]
+    assert "turn0" not in reply_call["prompt"] and "turn5" in reply_call["prompt"]
+    assert receipt.load_thread_summary("s")["covered_through_id"] == ids[3]
+    assert receipt.load_assistant_context("s") is not None  # context of the compact reply
+
+    for i in range(6, 9):
+        assistant_channel.append_user_message("s", "r", f"turn{i} " + "word " * 50)
+    assistant_channel.generate_assistant_reply("s", "r", "ANSWER", "and now?")
+    second_summary = channel[-2]["prompt"]
+    assert "PREVIOUS SUMMARY:\nreply" in second_summary
+    assert "turn3" not in second_summary and "turn4" in second_summary  # only turns past the old summary
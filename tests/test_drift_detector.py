@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from agi.core import drift_detector
+from agi.core.drift_detector import DriftMonitor, detect_drift
+
+
+@pytest.fixture
+def tracked(tmp_path, monkeypatch):
+    monkeypatch.setattr(drift_detector, "DB_PATH", tmp_path / "drift.sqlite")
+    (tmp_path / "agi" / "core").mkdir(parents=True)
+    (tmp_path / "SOVEREIGN_MODEL_POLICY.md").write_text("policy v1", encoding="utf-8")
+    (tmp_path / "agi" / "core" / "model_stack.yaml").write_text("models: {}", encoding="utf-8")
+    drift_detector.init_db()
+    drift_detector.record_hashes(tmp_path)
+    return tmp_path
+
+
+def test_monitor_matches_detect_drift_and_caches_digests(tracked):
+    mon = DriftMonitor(tracked, check_interval_s=0)
+    assert mon.snapshot() == detect_drift(tracked) == []
+    mon.snapshot()
+    assert mon.rehashes == 2  # unchanged files are not re-hashed
+
+    policy = tracked / "SOVEREIGN_MODEL_POLICY.md"
+    policy.write_text("policy v2", encoding="utf-8")
+    os.utime(policy, ns=(1, 1))
+    assert mon.snapshot() == detect_drift(tracked)
+    assert mon.snapshot()[0]["path"] == str(policy.resolve())
+
+    drift_detector.record_hashes(tracked)  # new baseline clears the drift
+    assert mon.snapshot() == []
+
+
+def test_watcher_serves_snapshot_without_io(tracked):
+    mon = DriftMonitor(tracked)
+    mon.start(poll_interval_s=60)
+    try:
+        (tracked / "SOVEREIGN_MODEL_POLICY.md").write_text("changed", encoding="utf-8")
+        assert mon.snapshot() == []  # watcher has not polled yet
+        assert len(mon.refresh()) == 1
+        assert len(mon.snapshot()) == 1
+    finally:
+        mon.stop()
@@ -0,0 +1,337 @@
+import asyncio
+import threading
+import time
+
+from agi.core import model_runner, provider_executor
+from agi.core.stack_registry import StackRegistry
+
+STACK = {
+    "models": {"local_small": {"id": "stub", "provider": "ollama"}},
+    "routing_rules": {"default": "local_small"},
+    "concurrency": {"ollama": 2},
+}
+
+
+def _ollama(fn):
+    """Adapt a prompt -> text fake to the ollama_generate response shape."""
+    return lambda model_id, prompt, **kwargs: {"response": fn(model_id, prompt, **kwargs)}
+
+
+def test_agenerate_respects_provider_limit(monkeypatch):
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(STACK))
+    provider_executor.reset_executors()
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fake_ollama(model_id, prompt, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return f"ok:{prompt}"
+
+    monkeypatch.setattr(model_runner, "ollama_generate", _ollama(fake_ollama))
+
+    async def main():
+        return await asyncio.gather(*(model_runner.agenerate("discussion", str(i)) for i in range(10)))
+
+    receipts = asyncio.run(main())
+    assert [r.raw_output for r in receipts] == [f"ok:{i}" for i in range(10)]
+    assert all(r.status == "success" for r in receipts)
+    assert peak[0] == 2
+    metrics = provider_executor.executor_metrics()["ollama"]
+    assert metrics["completed"] == 10 and metrics["queue_depth"] == 0
+    assert metrics["max_queue_depth"] >= 8
+    assert max(r.queue_wait_ms for r in receipts) > 0
+    provider_executor.reset_executors()
+
+
+def test_generate_stream_reports_ttft(monkeypatch):
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(STACK))
+
+    def fake_stream(model_id, prompt, **kwargs):
+        time.sleep(0.01)
+        for word in ("alpha ", "beta ", "gamma"):
+            yield {"response": word}
+            time.sleep(0.005)
+        yield {"response": "", "done": True, "prompt_eval_count": 7, "eval_count": 3}
+
+    monkeypatch.setattr(model_runner, "stream_ollama", fake_stream)
+    stream = model_runner.generate_stream("discussion", "q")
+    assert list(stream) == ["alpha ", "beta ", "gamma"]
+    rec = stream.receipt
+    assert rec.status == "success" and rec.raw_output == "alpha beta gamma"
+    assert (rec.input_tokens, rec.output_tokens) == (7, 3)
+    assert rec.ttft_ms is not None and rec.ttft_ms <= rec.latency_ms
+    assert rec.tokens_per_sec and rec.tokens_per_sec > 0
+
+
+def test_generate_stream_refuses_open_circuit_and_records_abandoned_streams(monkeypatch):
+    from agi.core import model_health
+
+    stack = {**STACK, "health": {"failure_threshold": 1, "cooldown_s": 60}}
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(stack))
+    model_health.reset_health_registry()
+    streamed = []
+
+    def fake_stream(model_id, prompt, **kwargs):
+        streamed.append(prompt)
+        for word in ("alpha ", "beta ", "gamma"):
+            yield {"response": word}
+        yield {"response": "", "done": True}
+
+    monkeypatch.setattr(model_runner, "stream_ollama", fake_stream)
+    stream = model_runner.generate_stream("discussion", "q")
+    chunks = iter(stream)
+    assert next(chunks) == "alpha "
+    chunks.close()  # consumer stops early
+    rec = stream.receipt
+    assert rec is not None and rec.error_msg == "stream closed by consumer" and rec.raw_output == "alpha "
+    health = model_health.get_health_registry().snapshot()["local_small"]
+    assert (health["samples"], health["breaker"]) == (1, "closed")
+
+    model_runner._health().record("local_small", 5, ok=False)  # opens the breaker
+    stream = model_runner.generate_stream("discussion", "q")
+    assert list(stream) == [] and len(streamed) == 1
+    assert stream.receipt.status == "error" and stream.receipt.error_msg.startswith("circuit open")
+    model_health.reset_health_registry()
+
+
+def test_response_cache_marks_hits(monkeypatch, tmp_path):
+    from agi.core.response_cache import ResponseCache, set_response_cache
+
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping({**STACK, "policy_version": "v-test"}))
+    calls = []
+    monkeypatch.setattr(model_runner, "ollama_generate", _ollama(lambda model_id, prompt, **kw: calls.append(prompt) or "cached answer"))
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_entries=1)
+    set_response_cache(cache)
+    try:
+        first = model_runner.generate("discussion", "p", use_cache=True)
+        second = model_runner.generate("discussion", "p", use_cache=True)
+        assert calls == ["p"]
+        assert not first.cache_hit and second.cache_hit
+        assert second.origin_call_id == first.call_id and second.call_id != first.call_id
+        assert second.raw_output == "cached answer" and second.cost_usd == 0.0
+        model_runner.generate("discussion", "p", temperature=0.7, use_cache=True)
+        model_runner.generate("discussion", "other", use_cache=True)
+        assert calls == ["p", "p", "other"]
+        assert cache.stats()["entries"] == 1  # size cap evicted the least recently used key
+    finally:
+        set_response_cache(None)
+        cache.close()
+
+
+def test_generate_many_keeps_order_and_counts_failures(monkeypatch):
+    stack = {
+        "models": {"local_small": {"id": "stub", "provider": "ollama", "max_concurrency": 1}},
+        "routing_rules": {"default": "local_small"},
+        "concurrency": {"ollama": 4},
+    }
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(stack))
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fake_ollama(model_id, prompt, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.005 * (5 - int(prompt) % 5))
+        with lock:
+            active[0] -= 1
+        if prompt == "3":
+            raise RuntimeError("boom")
+        return f"r{prompt}"
+
+    monkeypatch.setattr(model_runner, "ollama_generate", _ollama(fake_ollama))
+    batch = [{"task_type": "discussion", "prompt": str(i)} for i in range(6)]
+    result = model_runner.generate_many(batch, max_concurrency=4)
+    assert [r.raw_output for r in result.receipts] == ["r0", "r1", "r2", "", "r4", "r5"]
+    assert (result.succeeded, result.failed) == (5, 1)
+    assert peak[0] == 1  # per-model-key cap wins over provider and pool size
+    assert result.prompts_per_sec > 0
+
+
+def test_cold_start_tracking(monkeypatch):
+    from agi.core import model_warmup
+
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping({**STACK, "warmup": {"enabled": True, "keep_alive": "5m"}}))
+    model_warmup.reset_warmup_manager()
+    sent = []
+
+    def fake_generate(model_id, prompt, **kwargs):
+        sent.append(kwargs.get("keep_alive"))
+        return {"response": "ok", "load_duration": 2_000_000_000 if len(sent) == 1 else 1_000_000}
+
+    monkeypatch.setattr(model_runner, "ollama_generate", fake_generate)
+    first = model_runner.generate("discussion", "a")
+    second = model_runner.generate("discussion", "b")
+    assert (first.cold_start, second.cold_start) == (True, False)
+    assert sent == ["5m", "5m"]
+    assert model_warmup.get_warmup_manager().states()["stub"]["cold_starts"] == 1
+    model_warmup.reset_warmup_manager()
+
+
+def test_breaker_and_fallback_routing(monkeypatch):
+    from agi.core import model_health
+
+    stack = {
+        "models": {
+            "local_large": {"id": "big", "provider": "ollama"},
+            "local_small": {"id": "small", "provider": "ollama"},
+            "remote_tier": {"id": "remote", "provider": "cloud-llm"},
+        },
+        "routing_rules": {
+            "default": "local_small",
+            "by_task_type": {"governance": "local_large"},
+            "overrides": {"high_sensitivity": {"allow_remote": False, "fallback": "local_large"}},
+        },
+        "fallback_chains": {"local_large": ["remote_tier", "local_small"]},
+        "health": {"failure_threshold": 2, "cooldown_s": 60},
+    }
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(stack))
+    model_health.reset_health_registry()
+    hits = []
+
+    def fake_ollama(model_id, prompt, **kwargs):
+        hits.append(model_id)
+        if model_id == "big":
+            raise RuntimeError("timeout")
+        return "fine"
+
+    monkeypatch.setattr(model_runner, "ollama_generate", _ollama(fake_ollama))
+    first = model_runner.generate("governance", "q", sensitivity="high")
+    assert first.status == "success" and first.model_key == "local_small"  # remote skipped under high sensitivity
+    assert first.route_reason.startswith("failover from local_large")
+    model_runner.generate("governance", "q", sensitivity="high")
+    assert model_health.get_health_registry().snapshot()["local_large"]["breaker"] == "open"
+    hits.clear()
+    third = model_runner.generate("governance", "q", sensitivity="high")
+    assert hits == ["small"]  # open breaker: primary not even attempted
+    assert third.route_reason == "fallback from local_large (local_large:circuit_open)"
+    normal = model_runner.generate("governance", "q")
+    assert normal.model_key == "remote_tier"
+    model_health.reset_health_registry()
+
+
+def test_identical_inflight_calls_are_coalesced(monkeypatch):
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(STACK))
+    release = threading.Event()
+    upstream = []
+
+    def slow_ollama(model_id, prompt, **kwargs):
+        upstream.append(prompt)
+        release.wait(2)
+        return "shared"
+
+    monkeypatch.setattr(model_runner, "ollama_generate", _ollama(slow_ollama))
+    before = model_runner.coalescing_stats()["coalesced"]
+    results = [None] * 4
+
+    def worker(i):
+        results[i] = model_runner.generate("discussion", "same question")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    threads[0].start()
+    while not upstream:
+        time.sleep(0.001)
+    for t in threads[1:]:
+        t.start()
+    while model_runner.coalescing_stats()["coalesced"] - before < 3:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert upstream == ["same question"]
+    leader = next(r for r in results if not r.coalesced)
+    followers = [r for r in results if r.coalesced]
+    assert len(followers) == 3
+    assert all(r.origin_call_id == leader.call_id and r.raw_output == "shared" for r in followers)
+    assert len({r.call_id for r in results}) == 4
+
+
+def test_half_open_probe_is_claimed_by_the_flight_leader_only(monkeypatch):
+    from agi.core import model_health
+
+    stack = {**STACK, "health": {"failure_threshold": 1, "cooldown_s": 0.05}}
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(stack))
+    model_health.reset_health_registry()
+    model_runner._health().record("local_small", 5, ok=False)  # registry built with the stack's health block
+    time.sleep(0.06)  # breaker is now half-open
+    release = threading.Event()
+    upstream = []
+
+    def slow_ollama(model_id, prompt, **kwargs):
+        upstream.append(prompt)
+        release.wait(2)
+        return "probe ok"
+
+    monkeypatch.setattr(model_runner, "ollama_generate", _ollama(slow_ollama))
+    before = model_runner.coalescing_stats()["coalesced"]
+    results = [None] * 3
+
+    def worker(i):
+        results[i] = model_runner.generate("discussion", "probe")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+    threads[0].start()
+    while not upstream:
+        time.sleep(0.001)
+    for t in threads[1:]:
+        t.start()
+    deadline = time.monotonic() + 2
+    while model_runner.coalescing_stats()["coalesced"] - before < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert upstream == ["probe"]
+    assert all(r.status == "success" and r.raw_output == "probe ok" for r in results)
+    assert model_health.get_health_registry().snapshot()["local_small"]["breaker"] == "closed"
+    model_health.reset_health_registry()
+
+
+def test_response_cache_hit_leaves_half_open_probe_free(monkeypatch, tmp_path):
+    from agi.core import model_health
+    from agi.core.response_cache import ResponseCache, set_response_cache
+
+    stack = {**STACK, "health": {"failure_threshold": 1, "cooldown_s": 0.05}}
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(stack))
+    monkeypatch.setattr(model_runner, "ollama_generate", _ollama(lambda model_id, prompt, **kw: "answer"))
+    model_health.reset_health_registry()
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    set_response_cache(cache)
+    try:
+        model_runner.generate("discussion", "p", use_cache=True)
+        model_runner._health().record("local_small", 5, ok=False)
+        time.sleep(0.06)  # breaker is now half-open
+        assert model_runner.generate("discussion", "p", use_cache=True).cache_hit
+        assert model_runner._health().allow("local_small")  # the probe is still free for a real call
+    finally:
+        set_response_cache(None)
+        cache.close()
+        model_health.reset_health_registry()
+
+
+def test_failover_uses_the_table_the_route_came_from(monkeypatch):
+    from agi.core import model_health
+
+    old = {
+        "models": {"a": {"id": "model-a", "provider": "ollama"}, "b": {"id": "model-b", "provider": "ollama"}},
+        "routing_rules": {"default": "a"},
+        "fallback_chains": {"a": ["b"]},
+    }
+    new = {"models": {"a": {"id": "model-a2", "provider": "ollama"}}, "routing_rules": {"default": "a"}}
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(old))
+    model_health.reset_health_registry()
+
+    def fake_ollama(model_id, prompt, **kwargs):
+        if model_id == "model-a":
+            monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(new))  # hot reload mid-call
+            raise RuntimeError("timeout")
+        return f"from {model_id}"
+
+    monkeypatch.setattr(model_runner, "ollama_generate", _ollama(fake_ollama))
+    rec = model_runner.generate("discussion", "q")
+    assert (rec.status, rec.model_key, rec.raw_output) == ("success", "b", "from model-b")
+    assert rec.stack_hash == StackRegistry.from_mapping(old).current().stack_hash
+    model_health.reset_health_registry()
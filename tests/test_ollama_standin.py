@@ -0,0 +1,36 @@
+import json
+
+import requests
+
+from agi.core.bench_model_runner import run_benchmark
+from agi.core.ollama_standin import OllamaStandin, StandinConfig
+
+
+def test_standin_is_deterministic_and_streams():
+    cfg = StandinConfig(latency="fixed:1", tokens_per_sec=0, output_tokens="5")
+    with OllamaStandin(cfg) as srv:
+        url = f"{srv.url}/api/generate"
+        a = requests.post(url, json={"model": "m", "prompt": "hi", "stream": False}).json()
+        b = requests.post(url, json={"model": "m", "prompt": "hi", "stream": False}).json()
+        assert a["response"] == b["response"] and a["eval_count"] == 5
+        lines = [json.loads(l) for l in requests.post(url, json={"model": "m", "prompt": "hi"}, stream=True).iter_lines() if l]
+        assert "".join(l["response"] for l in lines).strip() == a["response"]
+        assert lines[-1]["done"] and len(lines) == 6
+
+
+def test_standin_error_injection():
+    with OllamaStandin(StandinConfig(latency="fixed:0", error_rate=1.0)) as srv:
+        resp = requests.post(f"{srv.url}/api/generate", json={"model": "m", "prompt": "x", "stream": False})
+        assert resp.status_code == 500
+        assert srv.stats()["errors"] == 1
+
+
+def test_benchmark_reports_levels():
+    cfg = StandinConfig(latency="fixed:1", tokens_per_sec=0, output_tokens="4")
+    report = run_benchmark(levels=(1, 2), requests=4, standin=cfg)
+    assert [(r["target"], r["concurrency"]) for r in report["results"]] == [
+        (t, c) for t in ("generate", "run_model_for_task", "run_triad") for c in (1, 2)
+    ]
+    for r in report["results"]:
+        assert r["errors"] == 0 and r["throughput_rps"] > 0
+        assert r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"]
@@ -0,0 +1,56 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agi.core import model_runner
+from agi.core.provider_transport import ProviderTransport, TransportConfig
+from agi.core.stack_registry import StackRegistry
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        out = json.dumps({"response": f"echo:{body['prompt']}", "done": True}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_session_reuses_connection(server):
+    transport = ProviderTransport(TransportConfig(pool_maxsize=2))
+    for i in range(3):
+        resp = transport.post_json("ollama", f"{server}/api/generate", {"prompt": str(i)})
+        assert resp.json()["response"] == f"echo:{i}"
+    stats = transport.stats()[f"ollama|{server}"]
+    assert stats["requests"] == 3
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 2
+    transport.close()
+
+
+def test_call_ollama_uses_stack_endpoint(server, monkeypatch):
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping({"providers": {"ollama": {"endpoint": server}}}))
+    transport = ProviderTransport()
+    monkeypatch.setattr(model_runner, "_transport", lambda: transport)
+    assert model_runner.call_ollama("m", "hi") == "echo:hi"
+    assert model_runner.call_ollama("m", "again") == "echo:again"
+    assert transport.stats()[f"ollama|{server}"]["reused_connections"] == 1
@@ -0,0 +1,205 @@
+import threading
+
+from agi.core import receipt
+
+
+def test_receipt_store_wal_readers_do_not_block_writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(receipt, "DB_PATH", tmp_path / "wal.sqlite")
+    receipt.init_db()
+    store = receipt.get_receipt_store()
+    assert store.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    reader = store.open()
+    reader.execute("BEGIN")
+    reader.execute("SELECT COUNT(*) FROM assistant_messages").fetchone()  # holds a read snapshot
+    ids = []
+    t = threading.Thread(target=lambda: ids.append(receipt.store_assistant_message("a1", "r1", "user", "hi")))
+    t.start()
+    t.join(2)
+    assert ids == [1]
+    assert reader.execute("SELECT COUNT(*) FROM assistant_messages").fetchone()[0] == 0  # snapshot unchanged
+    reader.rollback()
+    assert reader.execute("SELECT COUNT(*) FROM assistant_messages").fetchone()[0] == 1
+    reader.close()
+    receipt.reset_receipt_stores()
+
+
+def test_receipt_store_closes_connections_of_exited_threads(tmp_path):
+    import sqlite3
+
+    import pytest
+
+    store = receipt.ReceiptStore(tmp_path / "pool.sqlite")
+    opened = []
+    for _ in range(3):
+        t = threading.Thread(target=lambda: opened.append(store.connection()))
+        t.start()
+        t.join()
+    assert len(store._conns) == 1  # each new thread's connection closed its exited predecessor's
+    store.connection().execute("SELECT 1")
+    assert list(store._conns) == [threading.current_thread()]
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    store.close()
+
+
+def _record(i):
+    rec = receipt.SovereignReceipt(f"r{i}", f"a{i}", "m", "v1", "raw", ["specialist"], "p", "h")
+    return rec, {"receipt_id": f"r{i}", "n": i, "pad": "x" * 200}, f"q{i}", f"answer {i}", None
+
+
+def test_receipt_log_rolls_compresses_and_migrates(tmp_path, monkeypatch):
+    monkeypatch.setattr(receipt, "DB_PATH", tmp_path / "log.sqlite")
+    monkeypatch.setattr(receipt, "RECEIPTS_DIR", tmp_path / "receipts")
+    monkeypatch.setattr(receipt, "LOG_CONFIG", receipt.ReceiptLogConfig(segment_max_bytes=1000, compress_sealed=False, block_bytes=500))
+    receipt.RECEIPTS_DIR.mkdir()
+    (receipt.RECEIPTS_DIR / "legacy.json").write_text('{"receipt_id": "legacy"}', encoding="utf-8")
+    receipt.init_db()
+    locators = [receipt.persist_receipt(*_record(i)) for i in range(12)]
+    assert locators[0] == f"{receipt.RECEIPTS_DIR / 'segment-000001.log'}#0"
+    log = receipt.get_receipt_log()
+    assert len(log.segments()) > 2
+    assert log.compact() == len(log.segments()) - 1
+    assert [p.suffix for p in log.segments().values()][-2:] == [".zlog", ".log"]
+    assert [receipt.load_receipt(f"r{i}")["n"] for i in range(12)] == list(range(12))
+
+    from agi.core.receipt_log import migrate
+
+    assert migrate(log, receipt.RECEIPTS_DIR) == {"packed": 1, "already_indexed": 0, "removed": 1}
+    assert not (receipt.RECEIPTS_DIR / "legacy.json").exists()
+    assert receipt.load_receipt("legacy") == {"receipt_id": "legacy"}
+    receipt.reset_receipt_stores()
+
+
+def test_receipt_log_writers_sharing_a_directory_own_their_segments(tmp_path):
+    import sqlite3
+
+    from agi.core.receipt_log import ReceiptLog, ReceiptLogConfig, ensure_index
+
+    conn = sqlite3.connect(tmp_path / "index.sqlite")
+    ensure_index(conn)
+    config = ReceiptLogConfig(compress_sealed=False)
+    a, b = ReceiptLog(tmp_path, lambda: conn, config), ReceiptLog(tmp_path, lambda: conn, config)
+    for i in range(3):
+        for log, name in ((a, "a"), (b, "b")):
+            with log.append([(f"{name}{i}", {"writer": name, "i": i})]) as entries, conn:
+                log.index(conn.cursor(), entries)
+    assert a._active != b._active
+    assert [a.read(f"{n}{i}") for n in "ab" for i in range(3)] == [{"writer": n, "i": i} for n in "ab" for i in range(3)]
+    assert b.compact() == 0  # a's segment is still held open by its writer
+    a.close()
+    assert b.compact() == 1
+    assert b.read("a2") == {"writer": "a", "i": 2} and b.read("b2") == {"writer": "b", "i": 2}
+    with a.append([("a3", {"writer": "a", "i": 3})]) as entries, conn:
+        a.index(conn.cursor(), entries)
+    assert a.read("a3") == {"writer": "a", "i": 3} and len(a.segments()) == 3
+    a.close()
+    b.close()
+    conn.close()
+
+
+def test_query_receipts_filters_pages_and_backfills(tmp_path, monkeypatch):
+    from agi.core.receipt_query import count_receipts, query_receipts
+
+    monkeypatch.setattr(receipt, "DB_PATH", tmp_path / "query.sqlite")
+    monkeypatch.setattr(receipt, "RECEIPTS_DIR", tmp_path)
+    receipt.init_db()
+    for i in range(6):
+        rec, audit, *rest = _record(i)
+        rec.timestamp, rec.drift_detected = 1_700_000_000 + i, i == 4
+        audit.update({"arbiter_status": "REFUSED" if i % 2 else "OK", "validator": {"policy_ok": i != 3}})
+        audit["calls"] = {"specialist_receipt": {"model_id": "llama" if i < 4 else "mistral", "out": "o" * 200 * (i % 2)}}
+        receipt.persist_receipt(rec, audit, *rest)
+    refused = query_receipts({"policy_version": "v1", "arbiter_status": "REFUSED"}, limit=2)
+    assert [r["receipt_id"] for r in refused["items"]] == ["r5", "r3"]
+    page2 = query_receipts({"arbiter_status": "REFUSED"}, limit=2, cursor=refused["next_cursor"])
+    assert [r["receipt_id"] for r in page2["items"]] == ["r1"] and page2["next_cursor"] is None
+    assert [r["receipt_id"] for r in query_receipts({"drift_detected": True}, full=True)["items"]] == ["r4"]
+    assert query_receipts({"policy_ok": False, "since": 1_700_000_003})["items"][0]["receipt_id"] == "r3"
+    assert count_receipts({"until": "2023-11-14T22:13:22Z"}) == {"total": 2}
+    assert count_receipts(group_by="arbiter_status") == {"OK": 3, "REFUSED": 3}
+    assert count_receipts(group_by="model_id") == {"llama": 4, "mistral": 2}  # the answering model, not the routing label
+
+    conn = receipt.get_receipt_store().connection()
+    conn.execute("DELETE FROM audit_index")
+    conn.execute("PRAGMA user_version=1")
+    conn.commit()
+    receipt.init_db()  # re-runs the v2 migration, which backfills from audit_receipt
+    assert count_receipts({"arbiter_status": "OK", "policy_ok": True}) == {"total": 3}
+    conn.execute("UPDATE audit_index SET model_id = 'stack-routed'")
+    conn.execute("PRAGMA user_version=5")
+    conn.commit()
+    receipt.init_db()  # v6 re-derives model_id from TEXT rows and codec/blob-ref rows alike
+    assert count_receipts(group_by="model_id") == {"llama": 4, "mistral": 2}
+    receipt.reset_receipt_stores()
+
+
+def test_codec_compresses_dedups_and_recompresses(tmp_path, monkeypatch):
+    from agi.core import storage_codec
+
+    monkeypatch.setattr(receipt, "DB_PATH", tmp_path / "codec.sqlite")
+    monkeypatch.setattr(receipt, "RECEIPTS_DIR", tmp_path)
+    receipt.init_db()
+    shared = {"specialist": {"model": "m", "options": list(range(50))}}
+    for i in range(3):
+        rec, audit, q, _, _ = _record(i)
+        audit["calls"] = shared
+        receipt.persist_receipt(rec, audit, q, "long answer " * 50, None)
+    conn = receipt.get_receipt_store().connection()
+    raw, stored = conn.execute("SELECT raw_answer, audit_receipt FROM sovereign_answers WHERE answer_id = 'a0'").fetchone()
+    assert raw.startswith(storage_codec.MAGIC + b"z") and isinstance(stored, bytes)
+    assert conn.execute("SELECT COUNT(*) FROM receipt_blobs").fetchone()[0] == 1  # "calls" stored once
+    assert receipt.load_answer("a0")["raw_answer"] == "long answer " * 50
+    conn.execute("UPDATE sovereign_answers SET audit_receipt = ? WHERE answer_id = 'a2'", ('{"receipt_id": "r2", "plain": true}',))
+    conn.commit()
+    assert receipt.get_receipt_log().read("r2")["n"] == 2  # the log copy is authoritative for load_receipt
+    assert storage_codec.unpack_audit(conn, conn.execute("SELECT audit_receipt FROM sovereign_answers WHERE answer_id = 'a1'").fetchone()[0])["calls"] == shared
+
+    out = storage_codec.recompress(conn, storage_codec.CodecConfig(codec="lzma"))
+    assert (out["rows"], out["blobs"], out["blobs_removed"]) == (3, 1, 0)
+    assert conn.execute("SELECT data FROM receipt_blobs").fetchone()[0].startswith(storage_codec.MAGIC + b"x")
+    (raw,) = conn.execute("SELECT raw_answer FROM sovereign_answers WHERE answer_id = 'a1'").fetchone()
+    assert raw.startswith(storage_codec.MAGIC + b"x")
+    assert receipt.load_answer("a1")["raw_answer"] == "long answer " * 50
+    assert storage_codec.decode(conn.execute("SELECT audit_receipt FROM sovereign_answers WHERE answer_id = 'a2'").fetchone()[0]) == '{"receipt_id": "r2", "plain": true}'
+    receipt.reset_receipt_stores()
+
+
+def test_retention_archives_cold_answers_and_keeps_them_loadable(tmp_path, monkeypatch):
+    from agi.core import assistant_channel, retention
+    from agi.core.receipt_query import query_receipts
+
+    monkeypatch.setattr(receipt, "DB_PATH", tmp_path / "retention.sqlite")
+    monkeypatch.setattr(receipt, "RECEIPTS_DIR", tmp_path)
+    receipt.init_db()
+    for i in range(5):
+        rec, audit, *rest = _record(i)
+        audit.update(calls={"specialist": {"i": i, "out": "y" * 200}}, drift_details=[{"shared": "z" * 200}])
+        receipt.persist_receipt(rec, audit, *rest)
+    assistant_channel.append_user_message("a0", "r0", "old question")
+    conn = receipt.get_receipt_store().connection()
+    conn.execute("UPDATE sovereign_answers SET created_at = '2020-01-01T00:00:00Z' WHERE answer_id IN ('a0', 'a1', 'a2')")
+    conn.execute("UPDATE assistant_messages SET created_at = '2020-01-01T00:00:00Z'")
+    conn.commit()
+
+    assert retention.run_retention(dry_run=True)["cold_answers"] == 3
+    report = retention.run_retention(retention.RetentionConfig(hot_days=30, batch=2))
+    assert (report["segments"], report["answers"], report["messages"]) == (2, 3, 1)
+    assert report["compaction"]["bytes_after"] <= report["compaction"]["bytes_before"]
+    assert conn.execute("SELECT COUNT(*) FROM sovereign_answers").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM receipt_blobs").fetchone()[0] == 3  # 2 hot "calls" + the shared one
+    assert report["blobs_removed"] == 3
+    assert receipt.get_receipt_log().read("r1") is None
+    assert receipt.load_receipt("r1")["n"] == 1
+    assert receipt.load_answer("a2")["raw_answer"] == "answer 2"
+    assert retention.load_archived(answer_id="a0")["messages"][0]["message"] == "old question"
+    assert assistant_channel.list_thread_messages("a0") == []
+    assert len(query_receipts()["items"]) == 5  # audit facts stay queryable
+
+    assert retention.run_retention()["segments"] == 0
+    assert retention.verify_archive() == {"segments": 2, "head": retention.verify_archive()["head"], "ok": True, "errors": []}
+    seg = retention.archive_dir() / "archive-000001.arc"
+    seg.chmod(0o644)
+    seg.write_bytes(seg.read_bytes() + b"x")
+    assert retention.verify_archive()["errors"] == ["segment 1: archive-000001.arc does not match its recorded sha256"]
+    receipt.reset_receipt_stores()
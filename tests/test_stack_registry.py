@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from agi.core.stack_registry import StackConfigError, StackRegistry
+
+STACK_V1 = """
+policy_version: "v1"
+models:
+  small: {id: "s", provider: "ollama"}
+  large: {id: "l", provider: "ollama"}
+  remote_tier: {id: "r", provider: "cloud-llm"}
+routing_rules:
+  default: small
+  by_task_type: {governance: large, code: remote_tier}
+  overrides:
+    high_sensitivity: {allow_remote: false, fallback: large}
+fallback_chains:
+  large: [remote_tier, small]
+"""
+
+
+def test_compiled_routes(tmp_path):
+    path = tmp_path / "stack.yaml"
+    path.write_text(STACK_V1, encoding="utf-8")
+    table = StackRegistry(path).current()
+    assert table.version == "v1"
+    assert table.resolve("governance", "normal")[0] == "large"
+    assert table.resolve("code", "high")[0] == "large"
+    assert table.resolve("unknown", "normal")[0] == "small"
+    assert table.route("governance", "normal").chain == ("large", "remote_tier", "small")
+    assert table.route("governance", "high").chain == ("large", "small")
+    with pytest.raises(TypeError):
+        table.stack["models"]["small"]["id"] = "mutated"
+
+
+def test_hot_reload_swaps_table_and_survives_bad_edit(tmp_path):
+    path = tmp_path / "stack.yaml"
+    path.write_text(STACK_V1, encoding="utf-8")
+    reg = StackRegistry(path, check_interval_s=0)
+    first = reg.current()
+    mtime = path.stat().st_mtime_ns
+    path.write_text(STACK_V1.replace("governance: large", "governance: small").replace('"v1"', '"v2"'), encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime + 10**9))  # same size, so make sure the stat key moves
+    second = reg.current()
+    assert second.version == "v2" and second.stack_hash != first.stack_hash
+    assert second.resolve("governance", "normal")[0] == "small"
+    path.write_text("models: [unclosed", encoding="utf-8")
+    assert reg.current() is second
+    assert reg.info()["last_error"].startswith("reload failed")
+    assert reg.reloads == 1
+
+
+def test_missing_model_raises(tmp_path):
+    reg = StackRegistry.from_mapping({"models": {}, "routing_rules": {"default": "nope"}})
+    with pytest.raises(StackConfigError, match="'nope' not defined for task 'discussion'"):
+        reg.current().resolve("discussion", "normal")
@@ -0,0 +1,157 @@
+import time
+
+import pytest
+
+from agi.core import receipt, triad_harness
+from agi.core.roles import interpreter, specialist
+
+
+@pytest.fixture
+def triad(tmp_path, monkeypatch):
+    monkeypatch.setattr(receipt, "DB_PATH", tmp_path / "sovereign.sqlite")
+    monkeypatch.setattr(receipt, "RECEIPTS_DIR", tmp_path)
+    monkeypatch.setattr(triad_harness, "drift_snapshot", lambda root: [])
+    receipt.init_db()
+    answers = {"q": "A lawful answer.", "bad": "Here is how to make a bomb."}
+    monkeypatch.setattr(specialist, "run_specialist", lambda q, ctx: {"answer": answers[q], "meta": {}})
+    seen = []
+
+    def fake_interpreter(question, raw_answer, context):
+        seen.append(raw_answer)
+        time.sleep(0.05)
+        return {"prompt": f"explain:{raw_answer}", "explained_answer": f"simply: {raw_answer}"}
+
+    monkeypatch.setattr(interpreter, "run_interpreter", fake_interpreter)
+    return seen
+
+
+def _content(out):
+    r = dict(out["receipt"])
+    for k in ("receipt_id", "answer_id", "timestamp", "speculation", "trace"):
+        r.pop(k, None)
+    return out["answer"], r
+
+
+def test_speculative_matches_sequential(triad):
+    seq = triad_harness.run_triad("q", mode="explained")
+    spec = triad_harness.run_triad("q", mode="explained", speculative=True)
+    assert _content(spec) == _content(seq)
+    assert "speculation" not in seq["receipt"]
+    assert spec["receipt"]["speculation"]["used"] and spec["receipt"]["speculation"]["hit"]
+
+
+def test_speculation_discarded_on_refusal(triad):
+    out = triad_harness.run_triad("bad", mode="explained", speculative=True)
+    assert out["receipt"]["arbiter_status"] == "REFUSED"
+    assert out["receipt"]["speculation"] == {"used": True, "hit": False, "saved_ms": 0}
+    assert out["answer"].startswith("simply: I cannot fulfil")
+
+
+@pytest.mark.parametrize("durability", [None, "receipt", "batch", "none"])
+def test_receipt_persisted_once_in_file_and_db(triad, durability):
+    import sqlite3
+
+    from agi.core import receipt_writer
+    from agi.core.storage_codec import unpack_audit
+
+    writer = receipt_writer.configure_receipt_writer(durability) if durability else None
+    try:
+        outs = [triad_harness.run_triad("q", mode="explained") for _ in range(3)]
+        if writer is not None:
+            writer.flush()
+    finally:
+        receipt_writer.reset_receipt_writer()
+    conn = sqlite3.connect(receipt.DB_PATH)
+    rows = dict(conn.execute("SELECT receipt_id, audit_receipt FROM sovereign_answers").fetchall())
+    conn.close()
+    for out in outs:
+        stored = unpack_audit(receipt.get_receipt_store().connection(), rows[out["receipt_id"]])
+        assert receipt.load_receipt(out["receipt_id"]) == out["receipt"] == stored
+        assert (out["receipt_path"] is None) == (durability == "none")
+    assert not list(receipt.RECEIPTS_DIR.glob("*.json"))
+
+
+def test_batch_matches_sequential(triad):
+    questions = ["q", "bad", "q", "q", "bad"]
+    batch = triad_harness.run_triad_batch(questions, mode="explained", workers=3, commit_every=2)
+    seq = [triad_harness.run_triad(q, mode="explained") for q in questions]
+    assert [_content(b) for b in batch["results"]] == [_content(s) for s in seq]
+    m = batch["metrics"]
+    assert (m["questions"], m["succeeded"], m["errors"], m["refused"], m["transactions"]) == (5, 5, 0, 2, 3)
+    for r, s in zip(batch["results"], seq):
+        assert r.keys() == s.keys()
+        assert [x["name"] for x in r["trace"]["spans"]][-2:] == ["receipt_write", "db_store"]
+        assert r["receipt_path"].startswith(str(receipt.RECEIPTS_DIR / "segment-"))
+        assert receipt.load_receipt(r["receipt_id"]) == r["receipt"]
+
+
+def test_batch_uses_writer_and_isolates_persist_errors(triad, monkeypatch):
+    from agi.core import receipt_writer
+
+    writer = receipt_writer.configure_receipt_writer("batch")
+    try:
+        batch = triad_harness.run_triad_batch(["q", "q", "bad"], workers=2)
+    finally:
+        receipt_writer.reset_receipt_writer()
+    assert batch["metrics"]["succeeded"] == 3 and writer.written == 3
+    assert all(r["trace"]["spans"][-1]["name"] == "receipt_persist" for r in batch["results"])
+
+    real = receipt._insert_answer
+
+    def insert(cur, rec, question, *rest):
+        if question == "bad":
+            raise ValueError("disk full")
+        return real(cur, rec, question, *rest)
+
+    monkeypatch.setattr(receipt, "_insert_answer", insert)
+    batch = triad_harness.run_triad_batch(["q", "bad", "q"], workers=2)
+    assert batch["results"][1] == {"question": "bad", "error": "ValueError: disk full"}
+    assert batch["metrics"]["succeeded"] == 2
+    assert all(receipt.load_answer(r["answer_id"]) for r in (batch["results"][0], batch["results"][2]))
+
+
+def test_stage_spans_and_histograms(triad):
+    from agi.core.tracing import get_histograms, reset_histograms
+
+    reset_histograms()
+    out = triad_harness.run_triad("q", mode="explained")
+    sealed = [s["name"] for s in out["receipt"]["trace"]["spans"]]
+    assert sealed == ["drift_check", "specialist", "validator", "arbiter", "interpreter"]
+    assert [s["name"] for s in out["trace"]["spans"]] == sealed + ["receipt_write", "db_store"]
+    stages = get_histograms().dump()["triad_stage_ms"]
+    assert stages["stage=interpreter"]["count"] == 1 and stages["stage=interpreter"]["p50_ms"] >= 50
+    text = get_histograms().prometheus_text()
+    assert 'triad_stage_ms_bucket{stage="db_store",le="+Inf"} 1' in text
+    assert 'triad_stage_ms_count{stage="specialist"} 1' in text
+
+
+def test_answer_cache_reuses_and_invalidates(triad, tmp_path, monkeypatch):
+    import os
+
+    from agi.core import answer_cache
+
+    (tmp_path / "SOVEREIGN_MODEL_POLICY.md").write_text("policy v1", encoding="utf-8")
+    monkeypatch.setattr(answer_cache, "REPO_ROOT", tmp_path)
+    answer_cache.reset_answer_cache()
+    calls = []
+    real = specialist.run_specialist
+    monkeypatch.setattr(specialist, "run_specialist", lambda q, ctx: calls.append(q) or real(q, ctx))
+
+    first = triad_harness.run_triad("q", mode="explained", use_cache=True)
+    second = triad_harness.run_triad("q", mode="explained", use_cache=True)
+    assert len(calls) == 1
+    assert second["answer"] == first["answer"]
+    assert second["receipt"]["reused"] and second["receipt"]["parent_receipt_id"] == first["receipt_id"]
+    assert second["receipt"]["answer_hash"] == first["receipt"]["answer_hash"]
+    assert receipt.load_receipt(second["receipt_id"])["reused"] is True
+
+    triad_harness.run_triad("q", mode="raw", use_cache=True)  # different mode: miss
+    assert len(calls) == 2
+
+    policy = tmp_path / "SOVEREIGN_MODEL_POLICY.md"
+    policy.write_text("policy v2", encoding="utf-8")
+    os.utime(policy, ns=(1, 1))
+    third = triad_harness.run_triad("q", mode="explained", use_cache=True)
+    assert len(calls) == 3 and not third["receipt"]["reused"]
+    assert answer_cache.get_answer_cache({"enabled": True}).invalidations == 1
+    answer_cache.reset_answer_cache()
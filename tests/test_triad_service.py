@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from agi.core import receipt, triad_harness
+from agi.core.roles import specialist
+from agi.core.triad_service import ServiceConfig, TriadService
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(receipt, "DB_PATH", tmp_path / "sovereign.sqlite")
+    monkeypatch.setattr(receipt, "RECEIPTS_DIR", tmp_path)
+    monkeypatch.setattr(triad_harness, "drift_snapshot", lambda root: [])
+    gate = threading.Event()
+    gate.set()
+
+    def fake_specialist(question, ctx):
+        gate.wait(5)
+        return {"answer": f"answer to {question}", "meta": {}}
+
+    monkeypatch.setattr(specialist, "run_specialist", fake_specialist)
+    svc = TriadService(ServiceConfig(port=0, workers=1, queue_size=1, warm_up=False, drift_poll_s=0)).start_background()
+    svc.gate = gate
+    svc.url = f"http://127.0.0.1:{svc.port}"
+    yield svc
+    gate.set()
+    svc.stop_background()
+
+
+def test_triad_and_receipt_lookup(service):
+    out = requests.post(f"{service.url}/triad", json={"question": "q1"}).json()
+    assert out["answer"] == "answer to q1"
+    got = requests.get(f"{service.url}/receipts/{out['receipt_id']}")
+    assert got.status_code == 200 and got.json() == out["receipt"]
+    assert requests.get(f"{service.url}/receipts/missing").status_code == 404
+    assert requests.post(f"{service.url}/triad", json={}).status_code == 400
+    bad = requests.post(f"{service.url}/triad", json={"question": "q", "sensitivity": "HIGH"})
+    assert bad.status_code == 400 and "sensitivity" in bad.json()["error"]
+    assert requests.get(f"{service.url}/health").json()["status"] == "ok"
+    metrics = requests.get(f"{service.url}/metrics").text
+    assert 'triad_service_requests_total{route="/triad",status="200"} 1' in metrics
+    for junk in ("/a", "/b/c"):
+        assert requests.get(f"{service.url}{junk}").status_code == 404
+    assert requests.get(f"{service.url}/triad").status_code == 405
+    metrics = requests.get(f"{service.url}/metrics").text
+    assert 'triad_service_requests_total{route="<unmatched>",status="404"} 2' in metrics
+    assert 'route="/a"' not in metrics and 'triad_service_requests_total{route="/triad",status="405"} 1' in metrics
+
+
+def test_backpressure_returns_429(service):
+    service.gate.clear()
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(
+        requests.post(f"{service.url}/triad", json={"question": f"q{i}"}).status_code)) for i in range(2)]
+    for t in threads:
+        t.start()
+    while service.pending < 2:
+        time.sleep(0.01)
+    rejected = requests.post(f"{service.url}/triad", json={"question": "over"})
+    assert rejected.status_code == 429 and rejected.headers["Retry-After"] == "1"
+    service.gate.set()
+    for t in threads:
+        t.join()
+    assert results == [200, 200]
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_invalid_content_length_returns_400(service, length):
+    import socket
+
+    with socket.create_connection(("127.0.0.1", service.port), timeout=5) as sock:
+        sock.sendall(f"POST /triad HTTP/1.1\r\nHost: x\r\nContent-Length: {length}\r\n\r\n".encode("latin-1"))
+        assert sock.recv(4096).startswith(b"HTTP/1.1 400 Bad Request")
+
+
+def test_assistant_reply_stores_both_turns(service, monkeypatch):
+    from agi.core import model_runner
+    from agi.core.stack_registry import StackRegistry
+
+    stack = {"models": {"local_small": {"id": "chat", "provider": "ollama"}}, "routing_rules": {"default": "local_small"}}
+    monkeypatch.setattr(model_runner, "_STACK_REGISTRY", StackRegistry.from_mapping(stack))
+    prompts = []
+    monkeypatch.setattr(model_runner, "ollama_generate", lambda model_id, prompt, **kw: prompts.append(prompt) or {"response": f"reply{len(prompts)}"})
+    answer = requests.post(f"{service.url}/triad", json={"question": "q1"}).json()
+    for message in ("why?", "and then?"):
+        out = requests.post(f"{service.url}/assistant/reply", json={"answer_id": answer["answer_id"], "message": message})
+        assert out.status_code == 200
+    rows = receipt.get_receipt_store().execute(
+        "SELECT role, message FROM assistant_messages WHERE answer_id = ? ORDER BY id", (answer["answer_id"],)
+    ).fetchall()
+    assert rows == [("user", "why?"), ("assistant", "reply1"), ("user", "and then?"), ("assistant", "reply2")]
+    assert prompts[1].count("why?") == 1 and prompts[1].endswith("USER: and then?\nASSISTANT:")
+
+
+def test_agency_eval(service):
+    out = requests.post(f"{service.url}/agency/eval", json={"a3": {"internal_locus": 1}}).json()
+    assert set(out) == {"A1", "A2", "A3", "A4", "AgencyScore", "state"}
+
+
+def test_shutdown_drains_in_flight(service):
+    service.gate.clear()
+    results = []
+    t = threading.Thread(target=lambda: results.append(requests.post(f"{service.url}/triad", json={"question": "slow"}).status_code))
+    t.start()
+    while service.pending < 1:
+        time.sleep(0.01)
+    stopper = threading.Thread(target=service.stop_background)
+    stopper.start()
+    time.sleep(0.1)
+    service.gate.set()
+    t.join()
+    stopper.join()
+    assert results == [200]